@@ -1,9 +1,5 @@
 import bpy
-import numpy as np
-from mathutils import Vector, Euler, Matrix
-from math import radians
-from collections import deque
-import time
+from .core import random_seed, SEED_MIN, SEED_MAX
 
 bl_info = {
     # required
@@ -41,6 +37,43 @@ path_selection_items = [
     ('RANDOM', "Random Path", "Select randomly from all generated Paths"),
 ]
 
+# enum-items for the objective of the multi-start path search
+path_objective_items = [
+    ('NODES', "Nodes", "Number of crossroads along the path"),
+    ('LENGTH', "Length", "Length of the path"),
+    ('STREETS', "Distinct streets", "Number of distinct streets driven along"),
+    ('STRAIGHT', "Few turns", "Length of the path divided by its number of turns"),
+    ('OBJECTS', "Objects in range", "Number of modifiable objects within scanner range of the path"),
+]
+
+# enum-items for selection of objects to modify between scans
+change_selection_items = [
+    ('ALL', "All objects", "Select objects to modify from the entire city"),
+    ('IN_RANGE', "In scanner range", "Prefer objects within scanner range of the path"),
+    ('WEIGHTED', "Weighted by distance", "Prefer objects closer to the path"),
+]
+
+# enum-items for downsampling of scans
+downsample_mode_items = [
+    ('CENTROID', "Centroid", "Mean of the points of each voxel, labels by majority vote"),
+    ('NEAREST', "Nearest point", "Point of each voxel closest to its center"),
+]
+
+# enum-items for the scan duration and velocity of the scanner
+sampling_mode_items = [
+    ('FIXED', "Fixed velocity", "Scanner moves at a velocity of 0.5 regardless of the points taken"),
+    ('POINTS', "Points per scan", "Scan duration is chosen to take a target number of points"),
+    ('DENSITY', "Points per path length", "Scan duration is chosen to take a target number of points per path length"),
+]
+
+# enum-items for the memory guard of city generation
+estimate_guard_items = [
+    ('OFF', "Off", "Generate cities regardless of their estimated memory"),
+    ('WARN', "Warn", "Print a warning if the estimated memory exceeds the budget"),
+    ('REFUSE', "Refuse", "Do not generate cities whose estimated memory exceeds the budget"),
+    ('SPLIT', "Split into tiles", "Generate a tiled city with tiles that fit into the budget"),
+]
+
 # general properties that should be directly accessible without being tied to a specific settings group
 # for easier registration the properties are defined using a list
 PROPS = [
@@ -57,6 +90,17 @@ PROPS = [
         default="initial, new, removed, moved, rotated, scaled")),
 ]
 
+# status of the set of scans run by the run scans operator, shown in the dataset panel
+# these properties are registered on the window manager, so they are not saved with the blend file
+RUNTIME_PROPS = [
+    ("scans_running", bpy.props.BoolProperty(name="Scans running", default=False)),
+    ("scans_cancel", bpy.props.BoolProperty(name="Cancel scans", default=False)),
+    ("scans_progress", bpy.props.FloatProperty(name="Progress", default=0.0, min=0.0, max=1.0, subtype='FACTOR')),
+    ("scans_status", bpy.props.StringProperty(name="Status", default="")),
+    # estimate of the city for the current city settings
+    ("city_estimate", bpy.props.StringProperty(name="City estimate", default="")),
+]
+
 
 # property group for all settings concerning scan execution
 class DatasetGeneratorDatasetSettings(bpy.types.PropertyGroup):
@@ -64,10 +108,68 @@ class DatasetGeneratorDatasetSettings(bpy.types.PropertyGroup):
     scans_directory: bpy.props.StringProperty(name="Output directory", default="//", subtype='DIR_PATH')
     scans_prefix: bpy.props.StringProperty(name="Prefix for set", default="pcset")
     scans_new_path: bpy.props.BoolProperty(name="Follow new path each scan", default=False)
+    # each scan is rendered along this many paths, the changes of the scan are applied once for all of them
+    trajectories: bpy.props.IntProperty(name="Paths per scan", default=1, min=1, soft_max=8)
+    # writes coarse scans of the preview scanner instead of rendering with vLiDAR, for testing sets quickly
+    fake_scanner: bpy.props.BoolProperty(name="Fake scanner (preview)", default=False)
     generate_city: bpy.props.BoolProperty(name="Generate new city (uses existing city if disabled)", default=False)
     randomize_city_seed: bpy.props.BoolProperty(name="Randomize city seed", default=True)
     randomize_path_seed: bpy.props.BoolProperty(name="Randomize path seed", default=True)
     randomize_scan_seed: bpy.props.BoolProperty(name="Randomize scan seed", default=True)
+    # maximum distance from the scanner path at which the scanner can hit geometry
+    scanner_range: bpy.props.FloatProperty(name="Scanner range", default=10.0, min=0.1, soft_max=50.0)
+    # hides all city objects out of scanner range of the path during each scan
+    cull_out_of_range: bpy.props.BoolProperty(name="Hide objects out of range", default=False)
+    # partial re-scan only renders path segments within range of changed objects
+    # and merges the new points into the points of the previous scan
+    partial_rescan: bpy.props.BoolProperty(name="Re-scan changed regions only", default=False)
+    partial_rescan_tolerance: bpy.props.FloatProperty(
+        name="Tolerance", default=0.05, min=0.001, soft_max=0.5, step=0.1)
+    partial_rescan_verify: bpy.props.BoolProperty(name="Verify against full scan", default=False)
+    # converts each scan to binary columnar files per set, see core/columnar.py
+    binary_output: bpy.props.BoolProperty(name="Convert scans to binary", default=False)
+    # writes <scan>.csv.gz for each scan
+    compress_scans: bpy.props.BoolProperty(name="Compress scans", default=False)
+    # writes <scan>_downsampled.csv with one point per voxel, all other post-processing uses the downsampled scan
+    downsample: bpy.props.BoolProperty(name="Downsample scans", default=False)
+    downsample_voxel_size: bpy.props.FloatProperty(
+        name="Voxel size", default=0.05, min=0.001, soft_max=1.0, step=0.1, precision=3)
+    downsample_mode: bpy.props.EnumProperty(items=downsample_mode_items, name="Mode", default='CENTROID')
+    # the voxel size is doubled until a scan has at most this many points, 0 disables the target
+    downsample_target_points: bpy.props.IntProperty(name="Point target", default=0, min=0)
+    # stores every scan but each K-th as delta to its previous scan, see core/deltas.py
+    delta_storage: bpy.props.BoolProperty(name="Store scans as deltas", default=False)
+    delta_keyframe_interval: bpy.props.IntProperty(name="Keyframe interval", default=8, min=1, soft_max=64)
+    # writes an octree per scan for region queries, see core/octree.py
+    octree_index: bpy.props.BoolProperty(name="Build spatial index", default=False)
+    octree_leaf_size: bpy.props.IntProperty(name="Points per leaf", default=4096, min=16, soft_max=65536)
+    keep_csv: bpy.props.BoolProperty(name="Keep csv scans", default=True)
+    # conversion and compression run on background threads while the next scan is prepared and rendered
+    # a full queue blocks the next scan, without workers scans are processed right after rendering
+    post_processing_workers: bpy.props.IntProperty(name="Workers", default=2, min=0, soft_max=8)
+    post_processing_queue: bpy.props.IntProperty(name="Queue depth", default=2, min=1, soft_max=8)
+    # cuts each scan into columns of block size with a fixed number of points, see core/blocks.py
+    # without processes blocks are extracted by the background workers during the set, otherwise after it
+    blocks_enable: bpy.props.BoolProperty(name="Extract training blocks", default=False)
+    block_size: bpy.props.FloatProperty(name="Block size", default=10.0, min=0.1, soft_max=100.0)
+    block_points: bpy.props.IntProperty(name="Points per block", default=4096, min=1, soft_max=65536)
+    block_min_points: bpy.props.IntProperty(name="Min points", default=100, min=1)
+    block_processes: bpy.props.IntProperty(name="Processes", default=0, min=0, soft_max=16)
+    # labels each point as unchanged, moved or new by its nearest neighbour in the previous scan
+    change_labels: bpy.props.BoolProperty(name="Label changed points", default=False)
+    change_tolerance: bpy.props.FloatProperty(name="Tolerance", default=0.05, min=0.001, soft_max=0.5, step=0.1)
+    change_search_radius: bpy.props.FloatProperty(name="Search radius", default=0.5, min=0.01, soft_max=5.0)
+    # writes <prefix>_statistics.json, sets failing any of the thresholds are marked as degenerate
+    statistics_enable: bpy.props.BoolProperty(name="Write scan statistics", default=False)
+    statistics_min_points: bpy.props.IntProperty(name="Min points", default=1000, min=0)
+    statistics_min_changed_fraction: bpy.props.FloatProperty(
+        name="Min changed", default=0.001, min=0.0, max=1.0, step=0.01, precision=4)
+    statistics_min_points_per_meter: bpy.props.FloatProperty(name="Min points/m", default=0.0, min=0.0)
+    # records timing spans of all stages, written as <prefix>_trace.json and <prefix>_trace_summary.txt
+    trace_enable: bpy.props.BoolProperty(name="Record stage timings", default=False)
+    # registers each finished set with its settings, seeds, files and statistics, see core/catalog.py
+    catalog_enable: bpy.props.BoolProperty(name="Register set in catalog", default=False)
+    catalog_path: bpy.props.StringProperty(name="Catalog", default="//pcdg_catalog.sqlite", subtype='FILE_PATH')
 
 
 # property group for all settings concerning object modification during scans
@@ -109,11 +211,14 @@ class DatasetGeneratorScanSettings(bpy.types.PropertyGroup):
     scale_x: bpy.props.BoolProperty(name="X", default=True)
     scale_y: bpy.props.BoolProperty(name="Y", default=True)
     scale_z: bpy.props.BoolProperty(name="Z", default=True)
+    # objects in range are determined using the scanner range of the dataset settings
+    change_selection: bpy.props.EnumProperty(
+        name="Object selection", items=change_selection_items, default='ALL')
     seed: bpy.props.IntProperty(
         name="Seed",
-        default=np.random.default_rng().integers(10000, 100000000),
-        min=10000,
-        max=99999999)
+        default=random_seed(),
+        min=SEED_MIN,
+        max=SEED_MAX - 1)
 
 
 # property group for all settings for city generation
@@ -127,19 +232,52 @@ class DatasetGeneratorCitySettings(bpy.types.PropertyGroup):
     districts: bpy.props.StringProperty(name="Districts", default="residential, commercial, park")
     seed: bpy.props.IntProperty(
         name="Seed",
-        default=np.random.default_rng().integers(10000, 100000000),
-        min=10000,
-        max=99999999)
+        default=random_seed(),
+        min=SEED_MIN,
+        max=SEED_MAX - 1)
     clear_city: bpy.props.BoolProperty(name="Clear existing city", default=True)
     randomize_seed: bpy.props.BoolProperty(name="Randomize seed", default=True)
+    # buildify buildings are replaced by static meshes, cached in the blend file across cities
+    bake_buildify: bpy.props.BoolProperty(name="Bake Buildify buildings", default=False)
+    # objects with identical meshes share a single mesh after generation
+    share_mesh_data: bpy.props.BoolProperty(name="Share mesh data", default=True)
+    # tiled cities are generated tile by tile into blend files, only tiles around the scanner path are loaded
+    tiled: bpy.props.BoolProperty(name="Tiled city", default=False)
+    tile_size: bpy.props.IntProperty(name="Tile size", default=50, min=10, soft_max=200)
+    tile_directory: bpy.props.StringProperty(name="Tiles", default="//city_tiles/", subtype="DIR_PATH")
+    # number of rings of tiles around the tiles the scanner path passes through which are loaded as well
+    tile_neighbours: bpy.props.IntProperty(name="Neighbouring tiles", default=1, min=0, soft_max=3)
+    # guard applied to the estimated memory of a city (of the tiles loaded around a path for tiled cities)
+    estimate_guard: bpy.props.EnumProperty(items=estimate_guard_items, name="Memory guard", default='WARN')
+    memory_budget: bpy.props.IntProperty(name="Budget (MB)", default=16384, min=256)
+    # measurements of generated cities used to calibrate the estimate
+    calibrate_estimate: bpy.props.BoolProperty(name="Record builds", default=True)
+    calibration_file: bpy.props.StringProperty(
+        name="Calibration", default="//city_calibration.json", subtype="FILE_PATH")
+    # variants re-randomize floors and props of the existing city without changing its layout
+    variant_seed: bpy.props.IntProperty(
+        name="Variant seed",
+        default=random_seed(),
+        min=SEED_MIN,
+        max=SEED_MAX - 1)
+    variant_randomize_seed: bpy.props.BoolProperty(name="Randomize variant seed", default=True)
+    variant_floors: bpy.props.BoolProperty(name="Building floors", default=True)
+    # fraction of props removed and fraction of props given a compatible mesh of another prop
+    variant_removal: bpy.props.FloatProperty(name="Remove props", default=0.1, min=0.0, max=1.0)
+    variant_swap: bpy.props.FloatProperty(name="Swap prop meshes", default=0.2, min=0.0, max=1.0)
+    # meshes are compatible if they have the same tag and all dimensions differ by at most this fraction
+    variant_swap_tolerance: bpy.props.FloatProperty(name="Size tolerance", default=0.25, min=0.0, max=1.0)
+    # maximum offset of props on x and y and maximum rotation around z in degrees
+    variant_jitter: bpy.props.FloatProperty(name="Offset", default=0.2, min=0.0, soft_max=2.0)
+    variant_rotation: bpy.props.FloatProperty(name="Rotation", default=5.0, min=0.0, soft_max=45.0)
 
 
 # property group for all settings for scanner path generation
 class DatasetGeneratorScannerSettings(bpy.types.PropertyGroup):
     path_seed: bpy.props.IntProperty(
-        name="Seed", default=np.random.default_rng().integers(10000, 100000000),
-        min=10000,
-        max=99999999)
+        name="Seed", default=random_seed(),
+        min=SEED_MIN,
+        max=SEED_MAX - 1)
     randomize_path_seed: bpy.props.BoolProperty(name="Randomize seed", default=True)
     scanner_path: bpy.props.StringProperty(name="Scanner path", default="")
     placeholder_path: bpy.props.StringProperty(name="Placeholder scanner path", default="")
@@ -147,13 +285,31 @@ class DatasetGeneratorScannerSettings(bpy.types.PropertyGroup):
     path_selection: bpy.props.EnumProperty(name="Path selection method", items=path_selection_items, default='LONGEST')
     path_multiple_amount: bpy.props.IntProperty(name="Amount of paths for multiple", default=10, min=2, soft_max=30)
     path_neighbor_amount: bpy.props.IntProperty(name="Amount of neighbors", default=2, min=1, max=3)
+    # with more than one start the path generation method is run from this many start leaves and the path
+    # with the best score of the objective is selected, processes run the starts in parallel
+    path_starts: bpy.props.IntProperty(name="Starts", default=1, min=1, soft_max=256)
+    path_objective: bpy.props.EnumProperty(name="Objective", items=path_objective_items, default='LENGTH')
+    path_processes: bpy.props.IntProperty(name="Processes", default=0, min=0, soft_max=16)
+    # settings of the coarse preview scanner, resolution is given in degrees and step in path length units
+    preview_resolution: bpy.props.FloatProperty(name="Resolution", default=5.0, min=0.5, soft_max=15.0)
+    preview_step: bpy.props.FloatProperty(name="Step", default=1.0, min=0.1, soft_max=5.0)
+    # adaptive sampling derives pulse rate, scan duration and velocity from the measured points per pulse of
+    # earlier scans
+    sampling_mode: bpy.props.EnumProperty(items=sampling_mode_items, name="Sampling", default='FIXED')
+    sampling_points: bpy.props.IntProperty(name="Points", default=1000000, min=1000, soft_max=50000000)
+    sampling_density: bpy.props.FloatProperty(name="Points per unit", default=10000.0, min=1.0, soft_max=1000000.0)
+    # measured points and pulses (pulse rate times scan duration), earlier scans are weighted less
+    sampling_measured_points: bpy.props.FloatProperty(name="Measured points", default=0.0, min=0.0)
+    sampling_measured_pulses: bpy.props.FloatProperty(name="Measured pulses", default=0.0, min=0.0)
 
 
 # ---------------------------------------------------------------- #
 #                            OPERATORS
 # ---------------------------------------------------------------- #
 #
-# Section for operator class definitions
+# Section for operator class definitions. The operations module
+# (and with it NumPy and the core modules) is only imported once an
+# operator is executed, which keeps registering the add-on fast.
 #
 # ---------------------------------------------------------------- #
 
@@ -162,8 +318,77 @@ class DatasetGeneratorRunScans(bpy.types.Operator):
     bl_idname = "opr.dataset_generator_run_scans"
     bl_label = "Generate Dataset"
 
+    # execute runs the whole set at once (e.g. from scripts), while invoke (e.g. from the panel) runs
+    # one step of the set per timer event, which keeps Blender responsive and allows cancelling the set
+
     def execute(self, context):
-        run_scans(context)
+        from . import operations
+        operations.run_scans(context)
+
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        from . import operations
+        self.progress = {}
+        # the generator keeps running across modal calls, so it is given the global context
+        self.steps = operations.scan_steps(bpy.context, self.progress)
+        context.window_manager.scans_running = True
+        context.window_manager.scans_cancel = False
+        context.window_manager.scans_progress = 0.0
+        context.window_manager.scans_status = "Preparing scans"
+        self.timer = context.window_manager.event_timer_add(0.1, window=context.window)
+        context.window_manager.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        from . import operations
+        if event.type == 'ESC':
+            context.window_manager.scans_cancel = True
+            return {'RUNNING_MODAL'}
+        if event.type != 'TIMER' or event.timer != self.timer:
+            return {'PASS_THROUGH'}
+        self.progress["cancel"] = context.window_manager.scans_cancel
+        try:
+            step = next(self.steps)
+        except StopIteration:
+            cancelled = self.progress.get("cancelled", False)
+            self.finish(context, "Scans cancelled" if cancelled else "Scans finished")
+            return {'CANCELLED'} if cancelled else {'FINISHED'}
+        except Exception as exception:
+            # the steps release their worker pool and trace when closed
+            self.steps.close()
+            operations.restore_city(context)
+            self.finish(context, "Scans failed: " + str(exception))
+            self.report({'ERROR'}, context.window_manager.scans_status)
+            return {'CANCELLED'}
+        context.window_manager.scans_progress, status = operations.scan_status(self.progress)
+        if context.window_manager.scans_cancel:
+            status += " (cancelling)"
+        context.window_manager.scans_status = status + " - " + step
+        self.redraw(context)
+        return {'RUNNING_MODAL'}
+
+    def finish(self, context, status):
+        from . import operations
+        context.window_manager.event_timer_remove(self.timer)
+        context.window_manager.scans_progress = operations.scan_status(self.progress)[0]
+        context.window_manager.scans_status = status
+        context.window_manager.scans_running = False
+        self.redraw(context)
+
+    def redraw(self, context):
+        for area in context.screen.areas:
+            if area.type == 'PROPERTIES':
+                area.tag_redraw()
+
+
+class DatasetGeneratorCancelScans(bpy.types.Operator):
+    bl_idname = "opr.dataset_generator_cancel_scans"
+    bl_label = "Cancel Scans"
+
+    def execute(self, context):
+        # the running set stops once the current scan is finished
+        context.window_manager.scans_cancel = True
 
         return {'FINISHED'}
 
@@ -173,7 +398,10 @@ class DatasetGeneratorBuildCity(bpy.types.Operator):
     bl_label = "Generate City"
 
     def execute(self, context):
-        build_city(context)
+        from . import operations
+        if not operations.build_city(context):
+            self.report({'WARNING'}, "Estimated memory of the city exceeds the budget")
+            return {'CANCELLED'}
 
         return {'FINISHED'}
 
@@ -183,7 +411,19 @@ class DatasetGeneratorBuildPath(bpy.types.Operator):
     bl_label = "Generate Scan Path"
 
     def execute(self, context):
-        build_path(context)
+        from . import operations
+        operations.build_path(context)
+
+        return {'FINISHED'}
+
+
+class DatasetGeneratorPreviewScan(bpy.types.Operator):
+    bl_idname = "opr.dataset_generator_preview_scan"
+    bl_label = "Preview Scan"
+
+    def execute(self, context):
+        from . import operations
+        operations.preview_path_scan(context)
 
         return {'FINISHED'}
 
@@ -193,7 +433,8 @@ class DatasetGeneratorClearPath(bpy.types.Operator):
     bl_label = "Clear Scan Path"
 
     def execute(self, context):
-        clear_path(context)
+        from . import operations
+        operations.clear_path(context)
 
         return {'FINISHED'}
 
@@ -203,7 +444,8 @@ class DatasetGeneratorClearCity(bpy.types.Operator):
     bl_label = "Clear city"
 
     def execute(self, context):
-        clear_city(context)
+        from . import operations
+        operations.clear_city(context)
 
         return {'FINISHED'}
 
@@ -213,7 +455,41 @@ class DatasetGeneratorResetCity(bpy.types.Operator):
     bl_label = "Reset city"
 
     def execute(self, context):
-        reset_city(context)
+        from . import operations
+        operations.reset_city(context)
+
+        return {'FINISHED'}
+
+
+class DatasetGeneratorEstimateCity(bpy.types.Operator):
+    bl_idname = "opr.dataset_generator_estimate_city"
+    bl_label = "Estimate City"
+
+    def execute(self, context):
+        from . import operations
+        operations.estimate_city(context)
+
+        return {'FINISHED'}
+
+
+class DatasetGeneratorCityVariant(bpy.types.Operator):
+    bl_idname = "opr.dataset_generator_city_variant"
+    bl_label = "Create variant"
+
+    def execute(self, context):
+        from . import operations
+        operations.create_city_variant(context)
+
+        return {'FINISHED'}
+
+
+class DatasetGeneratorRevertVariant(bpy.types.Operator):
+    bl_idname = "opr.dataset_generator_revert_variant"
+    bl_label = "Revert variant"
+
+    def execute(self, context):
+        from . import operations
+        operations.revert_city_variant(context)
 
         return {'FINISHED'}
 
@@ -223,7 +499,8 @@ class DatasetGeneratorScanSeed(bpy.types.Operator):
     bl_label = "Randomize Seed"
 
     def execute(self, context):
-        randomize_generator_seed(context)
+        from . import operations
+        operations.randomize_generator_seed(context)
 
         return {'FINISHED'}
 
@@ -233,7 +510,8 @@ class DatasetGeneratorPathSeed(bpy.types.Operator):
     bl_label = "Randomize Seed"
 
     def execute(self, context):
-        randomize_path_seed(context)
+        from . import operations
+        operations.randomize_path_seed(context)
 
         return {'FINISHED'}
 
@@ -243,7 +521,8 @@ class DatasetGeneratorCitySeed(bpy.types.Operator):
     bl_label = "Randomize Seed"
 
     def execute(self, context):
-        randomize_city_seed(context)
+        from . import operations
+        operations.randomize_city_seed(context)
 
         return {'FINISHED'}
 
@@ -304,6 +583,24 @@ class DatasetGeneratorCityPanel(DatasetGeneratorBasePanel, bpy.types.Panel):
             subrow.label(text="Block size")
             subrow.prop(settings, "block_min", slider=True)
             subrow.prop(settings, "block_max", slider=True)
+            subrow = subcol.row()
+            subrow.prop(settings, "bake_buildify")
+            subrow.prop(settings, "share_mesh_data")
+            subrow = subcol.row()
+            subrow.prop(settings, "tiled")
+            subrow.prop(settings, "tile_size")
+            subrow.prop(settings, "tile_neighbours")
+            subrow = subcol.row()
+            subrow.prop(settings, "tile_directory")
+            subrow = subcol.row()
+            subrow.prop(settings, "estimate_guard")
+            subrow.prop(settings, "memory_budget")
+            subrow = subcol.row()
+            subrow.prop(settings, "calibrate_estimate")
+            subrow.prop(settings, "calibration_file")
+            subrow = subcol.row()
+            subrow.operator("opr.dataset_generator_estimate_city", text="Estimate city")
+            subrow.label(text=context.window_manager.city_estimate)
         col.separator()
 
         row = col.row()
@@ -319,6 +616,26 @@ class DatasetGeneratorCityPanel(DatasetGeneratorBasePanel, bpy.types.Panel):
         splitrow = split.row()
         splitrow.operator("opr.dataset_generator_reset_city", text="Reset city")
 
+        col.separator()
+        box = col.box()
+        subcol = box.column()
+        subrow = subcol.row()
+        subrow.label(text="City variant seed")
+        subrow.prop(settings, "variant_seed", text="")
+        subrow.prop(settings, "variant_randomize_seed", text="Randomize")
+        subrow = subcol.row()
+        subrow.prop(settings, "variant_floors")
+        subrow.prop(settings, "variant_removal", slider=True)
+        subrow = subcol.row()
+        subrow.prop(settings, "variant_swap", slider=True)
+        subrow.prop(settings, "variant_swap_tolerance", slider=True)
+        subrow = subcol.row()
+        subrow.prop(settings, "variant_jitter")
+        subrow.prop(settings, "variant_rotation")
+        subrow = subcol.row()
+        subrow.operator("opr.dataset_generator_city_variant", text="Create variant")
+        subrow.operator("opr.dataset_generator_revert_variant", text="Revert variant")
+
 
 class DatasetGeneratorScannerPanel(DatasetGeneratorBasePanel, bpy.types.Panel):
     bl_idname = 'RENDER_PT_DatasetGeneratorScanerPanel'
@@ -349,6 +666,11 @@ class DatasetGeneratorScannerPanel(DatasetGeneratorBasePanel, bpy.types.Panel):
         boxrow = boxcol.row()
         boxrow.label(text="Path Selection")
         boxrow.prop(settings, "path_selection", text="")
+        boxrow = boxcol.row()
+        boxrow.prop(settings, "path_starts")
+        if settings.path_starts > 1:
+            boxrow.prop(settings, "path_objective", text="")
+            boxrow.prop(settings, "path_processes")
         row = col.row()
         row.label(text="Randomize seed")
         row.prop(settings, "randomize_path_seed")
@@ -357,6 +679,24 @@ class DatasetGeneratorScannerPanel(DatasetGeneratorBasePanel, bpy.types.Panel):
         split.column()
         splitrow = split.row()
         splitrow.operator("opr.dataset_generator_clear_path", text="Clear scanner path")
+        row = col.row()
+        row.label(text="Preview scan")
+        row.prop(settings, "preview_resolution")
+        row.prop(settings, "preview_step")
+        row.operator("opr.dataset_generator_preview_scan", text="Preview scan")
+        box = col.box()
+        boxcol = box.column()
+        boxrow = boxcol.row()
+        boxrow.label(text="Scan duration")
+        boxrow.prop(settings, "sampling_mode", text="")
+        if settings.sampling_mode == 'POINTS':
+            boxrow.prop(settings, "sampling_points")
+        elif settings.sampling_mode == 'DENSITY':
+            boxrow.prop(settings, "sampling_density")
+        if settings.sampling_mode != 'FIXED':
+            boxrow = boxcol.row()
+            boxrow.prop(settings, "sampling_measured_points")
+            boxrow.prop(settings, "sampling_measured_pulses")
 
 
 class DatasetGeneratorSettingsPanel(DatasetGeneratorBasePanel, bpy.types.Panel):
@@ -372,6 +712,11 @@ class DatasetGeneratorSettingsPanel(DatasetGeneratorBasePanel, bpy.types.Panel):
         row.label(text="Dataset seed")
         row.prop(settings, "seed")
         row.operator("opr.dataset_generator_scan_seed", text="Randomize seed")
+        row = col.row()
+        row.label(text="Objects to modify")
+        row.prop(settings, "change_selection", text="")
+        if settings.change_selection != 'ALL':
+            row.prop(context.scene.dataset_settings, "scanner_range")
         col.separator()
         row = col.row()
         icon = 'DOWNARROW_HLT' if context.scene.scan_settings_expanded else 'RIGHTARROW'
@@ -478,6 +823,73 @@ class DatasetGeneratorDatasetPanel(DatasetGeneratorBasePanel, bpy.types.Panel):
         boxrow = boxcol.row()
         boxrow.prop(dataset_settings, "randomize_scan_seed")
         boxrow.prop(dataset_settings, "scans_new_path")
+        boxrow = boxcol.row()
+        boxrow.label(text="Paths per scan")
+        boxrow.prop(dataset_settings, "trajectories", text="")
+        boxrow.prop(dataset_settings, "fake_scanner")
+        boxrow = boxcol.row()
+        boxrow.prop(dataset_settings, "cull_out_of_range")
+        if not dataset_settings.scans_new_path:
+            boxrow.prop(dataset_settings, "partial_rescan")
+        partial_rescan = dataset_settings.partial_rescan and not dataset_settings.scans_new_path
+        if dataset_settings.cull_out_of_range or partial_rescan:
+            boxrow = boxcol.row()
+            boxrow.prop(dataset_settings, "scanner_range")
+        if partial_rescan:
+            boxrow = boxcol.row()
+            boxrow.prop(dataset_settings, "partial_rescan_tolerance")
+            boxrow.prop(dataset_settings, "partial_rescan_verify")
+        boxrow = boxcol.row()
+        boxrow.prop(dataset_settings, "binary_output")
+        boxrow.prop(dataset_settings, "compress_scans")
+        boxrow = boxcol.row()
+        boxrow.prop(dataset_settings, "downsample")
+        if dataset_settings.downsample:
+            boxrow.prop(dataset_settings, "downsample_mode", text="")
+            boxrow = boxcol.row()
+            boxrow.prop(dataset_settings, "downsample_voxel_size")
+            boxrow.prop(dataset_settings, "downsample_target_points")
+        boxrow = boxcol.row()
+        boxrow.prop(dataset_settings, "delta_storage")
+        if dataset_settings.delta_storage:
+            boxrow.prop(dataset_settings, "delta_keyframe_interval")
+        boxrow = boxcol.row()
+        boxrow.prop(dataset_settings, "octree_index")
+        if dataset_settings.octree_index:
+            boxrow.prop(dataset_settings, "octree_leaf_size")
+        if (dataset_settings.binary_output or dataset_settings.compress_scans or dataset_settings.octree_index
+                or dataset_settings.downsample or dataset_settings.delta_storage):
+            boxrow = boxcol.row()
+            boxrow.prop(dataset_settings, "keep_csv")
+            boxrow.prop(dataset_settings, "post_processing_workers")
+            boxrow.prop(dataset_settings, "post_processing_queue")
+        boxrow = boxcol.row()
+        boxrow.prop(dataset_settings, "blocks_enable")
+        if dataset_settings.blocks_enable:
+            boxrow.prop(dataset_settings, "block_processes")
+            boxrow = boxcol.row()
+            boxrow.prop(dataset_settings, "block_size")
+            boxrow.prop(dataset_settings, "block_points")
+            boxrow.prop(dataset_settings, "block_min_points")
+        boxrow = boxcol.row()
+        boxrow.prop(dataset_settings, "change_labels")
+        if dataset_settings.change_labels:
+            boxrow = boxcol.row()
+            boxrow.prop(dataset_settings, "change_tolerance")
+            boxrow.prop(dataset_settings, "change_search_radius")
+        boxrow = boxcol.row()
+        boxrow.prop(dataset_settings, "statistics_enable")
+        if dataset_settings.statistics_enable:
+            boxrow = boxcol.row()
+            boxrow.prop(dataset_settings, "statistics_min_points")
+            boxrow.prop(dataset_settings, "statistics_min_changed_fraction")
+            boxrow.prop(dataset_settings, "statistics_min_points_per_meter")
+        boxrow = boxcol.row()
+        boxrow.prop(dataset_settings, "trace_enable")
+        boxrow = boxcol.row()
+        boxrow.prop(dataset_settings, "catalog_enable")
+        if dataset_settings.catalog_enable:
+            boxrow.prop(dataset_settings, "catalog_path", text="")
         col.separator()
         box = col.box()
         boxcol = box.column()
@@ -490,7 +902,15 @@ class DatasetGeneratorDatasetPanel(DatasetGeneratorBasePanel, bpy.types.Panel):
         row = col.row()
         row.label(text="")
         row.label(text="")
-        row.operator("opr.dataset_generator_run_scans", text="Run Scans")
+        if context.window_manager.scans_running:
+            row.operator("opr.dataset_generator_cancel_scans", text="Cancel Scans")
+            row = col.row()
+            row.enabled = False
+            row.prop(context.window_manager, "scans_progress", slider=True)
+        else:
+            row.operator("opr.dataset_generator_run_scans", text="Run Scans")
+        if context.window_manager.scans_status:
+            col.label(text=context.window_manager.scans_status)
         layout.separator()
 
 
@@ -512,6 +932,7 @@ CLASSES = [
     DatasetGeneratorSettingsPanel,
     DatasetGeneratorDatasetPanel,
     DatasetGeneratorRunScans,
+    DatasetGeneratorCancelScans,
     DatasetGeneratorCitySettings,
     DatasetGeneratorDatasetSettings,
     DatasetGeneratorScanSettings,
@@ -519,751 +940,20 @@ CLASSES = [
     DatasetGeneratorBuildCity,
     DatasetGeneratorBuildPath,
     DatasetGeneratorClearPath,
+    DatasetGeneratorPreviewScan,
     DatasetGeneratorClearCity,
     DatasetGeneratorResetCity,
+    DatasetGeneratorEstimateCity,
+    DatasetGeneratorCityVariant,
+    DatasetGeneratorRevertVariant,
     DatasetGeneratorScanSeed,
     DatasetGeneratorCitySeed,
     DatasetGeneratorPathSeed,
 ]
 
 # ---------------------------------------------------------------- #
-#                           FUNCTIONS
+#                      PLUGIN REGISTRATION
 # ---------------------------------------------------------------- #
-#
-# Section for function/method definitions. Functions are grouped
-# according to task, i.e. city-/path-/scan-generation
-#
-# ---------------------------------------------------------------- #
-
-
-def randomize_generator_seed(context):
-    rng = np.random.default_rng()
-    context.scene.scan_settings.seed = rng.integers(10000, 100000000)
-
-
-def randomize_city_seed(context):
-    rng = np.random.default_rng()
-    context.scene.city_settings.seed = rng.integers(10000, 100000000)
-
-
-def randomize_path_seed(context):
-    rng = np.random.default_rng()
-    context.scene.scanner_settings.path_seed = rng.integers(10000, 100000000)
-
-# ------------------------------------- #
-#            City Generation
-# ------------------------------------- #
-
-
-def reset_city(context):
-    # resets transformations made to city objects
-    # restores original transforms by pulling them from delta transforms
-    city_collection = context.scene.city_collection
-    try:
-        city = bpy.data.collections[city_collection]
-    except Exception:
-        return
-    tags = [tag.strip() for tag in context.scene.object_modifier_tags.split(",")]
-    for district in city.children_recursive:
-        for obj in district.objects:
-            if any(tag in obj.name for tag in tags):
-                obj.hide_viewport = False
-                if (obj.delta_location[:3] != (0.0, 0.0, 0.0)
-                        or obj.delta_rotation_euler[:3] != (0.0, 0.0, 0.0)
-                        or obj.delta_scale[:3] != (1.0, 1.0, 1.0)):
-                    # if any delta transforms are set they are switched
-                    reset_transforms(obj)
-                    transforms_to_deltas(obj)
-                for child in obj.children_recursive:
-                    child.hide_viewport = False
-
-
-def clear_city(context):
-    # removes all objects and collections created during city generation
-    city_collection = context.scene.city_collection
-    bpy.ops.object.select_all(action='DESELECT')
-    try:
-        city = bpy.data.collections[city_collection]
-        for district in city.children_recursive:
-            for obj in district.objects:
-                obj.select_set(True)
-        bpy.ops.object.delete()
-        for district in city.children_recursive:
-            bpy.data.collections.remove(district)
-        bpy.context.scene.collection.children.unlink(city)
-        bpy.data.collections.remove(city)
-    except Exception:
-        return
-
-
-def bound_city_settings(context):
-    settings = context.scene.city_settings
-    settings.block_max = max(settings.block_min, settings.block_max)
-
-
-def configure_scenecity_nodes(context):
-    # applies any relevant settings set in ui to relevant scenecity nodes
-    settings = context.scene.city_settings
-    bpy.data.node_groups["PCGeneratorCity"].nodes["grid_layout_generator"].boxes_values = settings.districts
-    bpy.data.node_groups["PCGeneratorCity"].nodes["grid_layout_generator"].random_seed = settings.seed
-    bpy.data.node_groups["PCGeneratorCity"].nodes["grid_layout_generator"].boxes_min_max_size[0] = settings.block_min
-    bpy.data.node_groups["PCGeneratorCity"].nodes["grid_layout_generator"].boxes_min_max_size[1] = settings.block_max
-    bpy.data.node_groups["PCGeneratorCity"].nodes["Grid"].grid_size[0] = settings.dimension_x
-    bpy.data.node_groups["PCGeneratorCity"].nodes["Grid"].grid_size[1] = settings.dimension_y
-
-
-def randomize_buildify_levels(context, city, rng):
-    # randomizes the floors of buildify buildings, otherwise all buildify buildings would be the same height
-    buildings = []
-    tags = context.scene.buildify_building_modifier_tags
-    # this section collects all tagged buildings in a list which is then sorted by object location
-    # this step is necessary to make the city generation (specifically assigning the building floors) deterministic
-    # since SceneCity itself does not seem to name or place the buildings
-    # in a deterministic order based on the seed used
-    for district in city.children:
-        for obj in district.objects:
-            if any(tag in obj.name for tag in tags):
-                buildings.append(obj)
-    buildings.sort(key=lambda obj: (obj.matrix_world.translation.x, obj.matrix_world.translation.y))
-    for obj in buildings:
-        try:
-            nodes = obj.modifiers["GeometryNodes"]
-            floors = int(rng.integers(3, 11))
-            nodes[nodes.node_group.inputs["Max number of floors"].identifier] = floors
-            # obj.update_tag() tags object to be updated in viewport
-            # otherwise changes in level will not be displayed until
-            # further changes to the object are made
-            obj.update_tag()
-        except Exception:
-            None
-
-
-def build_city(context):
-    start = time.time()
-    city_collection = context.scene.city_collection
-    settings = context.scene.city_settings
-    if settings.randomize_seed:
-        randomize_city_seed(context)
-    rng = np.random.default_rng(settings.seed)
-    if settings.clear_city:
-        clear_city(context)
-    bound_city_settings(context)
-    configure_scenecity_nodes(context)
-    districts = ["road"]
-    districts.extend(settings.districts.replace(" ", "").split(","))
-    city = bpy.data.collections.new(city_collection)
-    prefix = "city_"
-    scene_collection = bpy.context.scene.collection
-    scene_collection.children.link(city)
-    for district in districts:
-        # create new collection for each district and link it to city collection
-        city.children.link(bpy.data.collections.new(prefix + district))
-    for district in districts:
-        # for each district the corresponding scenecity instancer node is called separately
-        bpy.data.node_groups["PCGeneratorCity"].nodes[district + "_portion_instancer"].random_seed = settings.seed
-        # active layer collection determines the collection in which the instancer places the new objects
-        layer_collection = bpy.context.view_layer.layer_collection.children[city_collection].children[prefix + district]
-        node_path = "bpy.data.node_groups[\"PCGeneratorCity\"].nodes[\"" + district + "_instancer\"]"
-        bpy.context.view_layer.active_layer_collection = layer_collection
-        bpy.ops.node.objects_instancer_node_create(source_node_path=node_path)
-    randomize_buildify_levels(context, bpy.data.collections[city_collection], rng)
-    end = time.time()
-    print("City generated in " + str(end - start))
-
-# ------------------------------------- #
-#         Scan Path Generation
-# ------------------------------------- #
-
-
-def generate_placeholder_path(context):
-    # Due to how the vLiDAR scanner is implemented simply unassigning the scanner path
-    # is not supported. To cleanly delete the created scanner path this function
-    # creates a placeholder path, unless one already exists
-    settings = context.scene.scanner_settings
-    try:
-        bpy.data.objects[settings.placeholder_path]
-    except Exception:
-        settings.placeholder_path = ""
-    if not settings.placeholder_path:
-        path_name = "pcdg_placeholder_path"
-        path_data = bpy.data.curves.new(path_name, type='CURVE')
-        path_data.dimensions = '3D'
-        path_spline = path_data.splines.new(type='BEZIER')
-        path_spline.bezier_points[0].handle_left_type = 'VECTOR'
-        path_spline.bezier_points[0].handle_right_type = 'VECTOR'
-        placeholder_path = bpy.data.objects.new(path_name, path_data)
-        context.scene.collection.objects.link(placeholder_path)
-        settings.placeholder_path = path_name
-
-
-def clear_path(context):
-    scanner_path = context.scene.scanner_settings.scanner_path
-    if scanner_path != "":
-        try:
-            # assigns the placeholder path to the laser scanner and removes the old path
-            current_path_object = bpy.data.objects[scanner_path]
-            generate_placeholder_path(context)
-            placeholder_path = context.scene.scanner_settings.placeholder_path
-            placeholder_path_object = bpy.data.objects[placeholder_path]
-            laser_scanners = bpy.context.scene.pointCloudRenderProperties.laser_scanners
-            for scanner in laser_scanners:
-                if scanner.path.path_object and scanner.path.path_object == current_path_object:
-                    scanner.path.path_object = placeholder_path_object
-            bpy.data.objects.remove(current_path_object)
-            context.scene.scanner_settings.scanner_path = ""
-        except Exception:
-            return
-
-
-def build_adjacency(graph, road_grid):
-    # Builds adjacency lists for each graph node.
-    # road_grid saves directions where neighboring nodes are found
-    # these directions are traversed until a node is encountered
-    for _, data in graph.items():
-        node_x, node_y = data["location"]
-        neighbours = road_grid[node_x][node_y]["neighbours"]
-        for offset_x, offset_y in neighbours:
-            x = offset_x
-            y = offset_y
-            while road_grid[node_x + x][node_y + y]["type"] == "straight":
-                x += offset_x
-                y += offset_y
-            if road_grid[node_x + x][node_y + y]["type"] == "node":
-                data["adjacent_nodes"].append(road_grid[node_x + x][node_y + y]["node"])
-            elif road_grid[node_x + x][node_y + y]["type"] == "leaf":
-                data["adjacent_leaves"].append(road_grid[node_x + x][node_y + y]["node"])
-
-
-def build_graph(dimension_x, dimension_y, road_grid):
-    # builds the initial graph from the road_grid
-    graph = {}
-    node = 0
-    for obj in bpy.data.objects["road"].children:
-        # checks each street object itself instead of traversing the entire grid
-        # index in grid correspond to the objects world location offset by the cities dimensions
-        obj_x = int(obj.matrix_world.translation.x + float(dimension_x / 2))
-        obj_y = int(obj.matrix_world.translation.y + float(dimension_y / 2))
-        road_grid[obj_x][obj_y]["neighbours"] = []
-        neighbours = 0
-        for x, y in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
-            # checks adjacent cells if they contain a road portion,
-            # if so the direction is marked as containing a neighbor
-            # since bool operators short circuit, e.g. (x and y) => if x == False
-            # then x else y, there should be no error here
-            if (0 <= obj_x + x < dimension_x and 0 <= obj_y + y < dimension_y and road_grid[obj_x + x][obj_y + y]):
-                neighbours += 1
-                road_grid[obj_x][obj_y]["neighbours"].append((x, y))
-        if neighbours != 2:
-            # if a road portion only has exactly two neighbors it is a straight road portion that is of no interest
-            # otherwise it is either a crossroad or a road portion at the edge of the city
-            # the road portion is then either classified as a node or a leaf respectively
-            type = "node" if neighbours > 2 else "leaf"
-            graph[str(node)] = {"location": (obj_x, obj_y), "type": type, "adjacent_nodes": [], "adjacent_leaves": []}
-            road_grid[obj_x][obj_y]["node"] = str(node)
-            road_grid[obj_x][obj_y]["type"] = type
-            node += 1
-        else:
-            road_grid[obj_x][obj_y]["type"] = "straight"
-    build_adjacency(graph, road_grid)
-    return graph
-
-
-def build_road_grid(dimension_x, dimension_y, city_grid):
-    # traverses scenecity grid and creates grid containing all road portions without districts
-    road_grid = [[None for y in range(dimension_y)] for x in range(dimension_x)]
-    for x in range(dimension_x):
-        for y in range(dimension_y):
-            try:
-                # since scenecity denotes roads and districts differently in its grid
-                # the try-except block makes use of an exception to detect road portions
-                city_grid.data[x][y]["road"]
-                road_grid[x][y] = {"location": (x,y)}
-            except Exception:
-                road_grid[x][y] = None
-    return road_grid
-
-
-def generate_paths(graph, context):
-    # generates path(s) from road graph using selected method
-    settings = context.scene.scanner_settings
-    rng = np.random.default_rng(settings.path_seed)
-    paths = []
-
-    def step(node, path):
-        # step function used to find all paths starting in specified node
-        # currently not advised to be used as it is exponential in terms of time complexity
-        # and seems to suffer some issues with multi-threading
-        # currently still included for reference
-        no_neighbours = True
-        for neighbour in graph[node]["adjacent_nodes"]:
-            if neighbour not in path:
-                step(neighbour, path + [node])
-                no_neighbours = False
-        if no_neighbours and graph[node]["adjacent_leaves"]:
-            for leaf in graph[node]["adjacent_leaves"]:
-                paths.append(path + [node, leaf])
-        else:
-            paths.append(path + [node])
-
-    def step_limited(node, path, limit):
-        # limited step function which only traverses a set number of neighboring nodes
-        neighbors = [neighbor for neighbor in graph[node]["adjacent_nodes"] if neighbor not in path]
-        leaves = [leaf for leaf in graph[node]["adjacent_leaves"] if leaf not in path]
-        rng.shuffle(neighbors)
-        if neighbors:
-            for _ in range(limit):
-                if neighbors:
-                    neighbor = neighbors.pop()
-                    step_limited(neighbor, path + [node], limit)
-        elif leaves:
-            paths.append(path + [node, rng.choice(leaves)])
-        else:
-            paths.append(path + [node])
-
-    def dfs(node):
-        # depth first search through graph
-        # can generate relatively long winding paths through the city
-        visited = []
-        visited.append(node)
-        stack = deque()
-
-        def step_dfs(node, path):
-            visited.append(node)
-            neighbors = [neighbor for neighbor in graph[node]["adjacent_nodes"] if neighbor not in visited]
-            rng.shuffle(neighbors)
-            leaves = [leaf for leaf in graph[node]["adjacent_leaves"] if leaf not in visited]
-            for neighbor in neighbors:
-                stack.append((neighbor, path + [node]))
-            for leaf in leaves:
-                paths.append(path + [node, leaf])
-        
-        neighbors = graph[node]["adjacent_nodes"]
-        leaves = graph[node]["adjacent_leaves"]
-        if neighbors:
-            stack.append((neighbors[0], [node]))
-        elif leaves:
-            stack.append((leaves[0], [node]))
-        while stack:
-            node, path = stack.pop()
-            if node not in visited:
-                step_dfs(node, path)
-
-    def bfs(node):
-        # breadth first search through the graph
-        # can generate relatively straight paths from one edge of the city to another
-        visited = []
-        visited.append(node)
-        queue = deque()
-
-        def step_bfs(node, path):
-            visited.append(node)
-            neighbors = [neighbor for neighbor in graph[node]["adjacent_nodes"] if neighbor not in visited]
-            rng.shuffle(neighbors)
-            leaves = [leaf for leaf in graph[node]["adjacent_leaves"] if leaf not in visited]
-            for neighbor in neighbors:
-                queue.append((neighbor, path + [node]))
-            for leaf in leaves:
-                paths.append(path + [node, leaf])
-
-        neighbors = graph[node]["adjacent_nodes"]
-        leaves = graph[node]["adjacent_leaves"]
-        if neighbors:
-            queue.append((neighbors[0], [node]))
-        elif leaves:
-            queue.append((leaves[0], [node]))
-        while queue:
-            node, path = queue.popleft()
-            if node not in visited:
-                step_bfs(node, path)
-
-    nodes = [node for node, _ in graph.items()]
-    node = rng.choice(nodes)
-    while graph[node]["type"] == "node":
-        # makes sure the starting node is a leaf, i.e. a road portion at the edge of the city
-        node = rng.choice(nodes)
-    mode = settings.path_method
-    if mode == 'MULTIPLE':
-        for _ in range(settings.path_multiple_amount):
-            step_limited(node, [], 1)
-    elif mode == 'NEIGHBORS_FROM_NODE':
-        step_limited(node, [], settings.path_neighbor_amount)
-    elif mode == 'ALL_FROM_NODE':
-        step(node, [])
-    elif mode == 'DFS':
-        dfs(node)
-    elif mode == 'BFS':
-        bfs(node)
-    else:
-        step_limited(node, [], 1)
-    return paths
-
-
-def generate_curve(context, path, graph):
-    # generates a new bezier curve for the newly generated path through the city
-    context.view_layer.active_layer_collection = context.view_layer.layer_collection
-    bpy.ops.curve.primitive_bezier_curve_add()
-    city_settings = context.scene.city_settings
-    curve = bpy.data.objects["BezierCurve"]
-    curve.name = "scanner_path"
-    bezier_points = curve.data.splines.active.bezier_points
-    if len(path) - 2 > 0:
-        # adds missing points to the curve so they match the number of points the generated path has
-        bezier_points.add(len(path) - 2)
-    offset_x, offset_y = graph[path[0]]["location"]
-    for point, node in zip(bezier_points, path):
-        x, y = graph[node]["location"]
-        x -= offset_x
-        y -= offset_y
-        point.co = Vector((x, y, 0))
-        # left and right handle type is set to 'VECTOR'
-        # handle type is very important for the vLiDAR scanner to work correclty
-        point.handle_right_type = 'VECTOR'
-        point.handle_left_type = 'VECTOR'
-    curve.location.x = float(offset_x) - (city_settings.dimension_x / 2)
-    curve.location.y = float(offset_y) - (city_settings.dimension_y / 2)
-    curve.location.z = 0.1
-    context.scene.scanner_settings.scanner_path = curve.name
-
-
-def assign_path_to_scanner(context, scanner):
-    # assigns newly generated bezier curve to vLiDAR scanner
-    scanner_path = context.scene.scanner_settings.scanner_path
-    new_path_object = bpy.data.objects[scanner_path]
-    if scanner.path.path_object:
-        # if scanner has an assigned path it is saved as the placeholder path
-        context.scene.scanner_settings.placeholder_path = scanner.path.path_object.name
-    else:
-        generate_placeholder_path(context)
-    scanner.path.path_object = new_path_object
-    # vLiDAR scanner path length is updated and the scan duration is set accordingly
-    bpy.ops.pcscanner.update_path_length()
-    scanner.scan_duration = int(scanner.path.length * 2)
-    if scanner.scanner_type == "mobile_mapping_scanner":
-        scanner.mobile_mapping_velocity = 0.5
-    elif scanner.scanner_type == "artificial_scanner":
-        scanner.artificial_velocity = 0.5
-    scanner_object = scanner.camera
-    # for the scans to work correctly the object representing the scanner in the scene has to be rotated correctly
-    # the first two points of the scanner path determine the direction the object has to point
-    # which determines the axis along which the object is then rotated accordingly
-    curve_point_0 = new_path_object.data.splines.active.bezier_points[0]
-    curve_point_1 = new_path_object.data.splines.active.bezier_points[1]
-    if curve_point_1.co.x - curve_point_0.co.x != 0:
-        difference = curve_point_1.co.x - curve_point_0.co.x
-        axis = 'Y'
-    elif curve_point_0.co.y - curve_point_1.co.y != 0:
-        difference = curve_point_0.co.y - curve_point_1.co.y
-        axis = 'X'
-    degrees = 75 * (difference / abs(difference))
-    # rotation is achieved using matrix rotation and multiplication provided by Blenders mathutils library
-    # the result is then converted to Euler and assigned to the scanner object as the new Euler rotation
-    scanner_object.rotation_euler = (
-        Euler((0.0, 0.0, 0.0), 'XYZ').to_matrix() @ Matrix.Rotation(radians(degrees), 3, axis)).to_euler()
-
-
-def build_path(context):
-    clear_path(context)
-    city_grid = bpy.data.node_groups["PCGeneratorCity"].nodes["grid_layout_generator"].get_grid()
-    city_settings = context.scene.city_settings
-    scanner_settings = context.scene.scanner_settings
-    dimension_x = city_settings.dimension_x
-    dimension_y = city_settings.dimension_y
-    road_grid = build_road_grid(dimension_x, dimension_y, city_grid)
-    graph = build_graph(dimension_x, dimension_y, road_grid)
-    if scanner_settings.randomize_path_seed:
-        randomize_path_seed(context)
-    paths = generate_paths(graph, context)
-    rng = np.random.default_rng(scanner_settings.path_seed)
-    if scanner_settings.path_selection == 'RANDOM':
-        rng.shuffle(paths)
-        path = paths[0]
-    else:
-        path = max(paths, key=len)
-    generate_curve(context, path, graph)
-    selected_scanner = bpy.context.scene.pointCloudRenderProperties.selected_scanner
-    scanner = bpy.context.scene.pointCloudRenderProperties.laser_scanners[selected_scanner]
-    assign_path_to_scanner(context, scanner)
-
-# ------------------------------------- #
-#       Scan Generation/Automation
-# ------------------------------------- #
-
-
-def add_objects(settings, hidden_objects, rng):
-    # adds new objects to scene by revealing a number of hidden objects in the viewport
-    # added objects are classified as "new", removed from hidden_objects list and
-    # appended to added_objects list which is the returned
-    amount = rng.integers(settings.add_objects_min, settings.add_objects_max + 1)
-    added_objects = []
-    # random access is achieved by shuffling the list and popping the last element(s)
-    rng.shuffle(hidden_objects)
-    for _ in range(amount):
-        obj = hidden_objects.pop()
-        obj.hide_viewport = False
-        for child in obj.children_recursive:
-            child.hide_viewport = False
-        obj.class_name = "new"
-        added_objects.append(obj)
-    return added_objects
-
-
-def remove_objects(settings, objects, rng):
-    # objects are classified as removed and moved to separate list, which is then returned
-    amount = rng.integers(settings.remove_objects_min, settings.remove_objects_max + 1)
-    removed_objects = []
-    for _ in range(amount):
-        obj = objects.pop()
-        obj.class_name = "removed"
-        removed_objects.append(obj)
-    return removed_objects
-
-
-def translate_objects(settings, objects, modified_objects, rng):
-    # moves random number (amount) of objects in a single random direction
-    amount = rng.integers(settings.translation_objects_min, settings.translation_objects_max + 1)
-    # list includes all axis as well as direction (positive and negative) along which an object can be moved
-    possible_translation = [
-        (settings.translation_negative_x, ("x", -1)),
-        (settings.translation_positive_x, ("x", 1)),
-        (settings.translation_negative_y, ("y", -1)),
-        (settings.translation_positive_y, ("y", 1)),
-        (settings.translation_negative_z, ("z", -1)),
-        (settings.translation_positive_z, ("z", 1)),
-    ]
-    # builds a list of all directions that are enabled in the settings along which an object can be moved
-    enabled_translation = [(axis, direction) for (setting, (axis, direction)) in possible_translation if setting]
-    for _ in range(amount):
-        obj = objects.pop()
-        obj.class_name = "moved"
-        modified_objects.append(obj)
-        axis, direction = rng.choice(enabled_translation)
-        value = rng.uniform(settings.translation_min, settings.translation_max) * int(direction)
-        # moving the object by making use of getattr and setattr for easier access to a specific axis
-        setattr(obj.location, axis, getattr(obj.location, axis) + value)
-
-
-def rotate_objects(context, settings, objects, modified_objects, rng):
-    # rotates a number (amount) of objects along a single random axis/direction
-    amount = rng.integers(settings.rotation_objects_min, settings.rotation_objects_max + 1)
-    possible_rotations = [
-        (settings.rotation_negative_x, ("X", -1)),
-        (settings.rotation_positive_x, ("X", 1)),
-        (settings.rotation_negative_y, ("Y", -1)),
-        (settings.rotation_positive_y, ("Y", 1)),
-        (settings.rotation_negative_z, ("Z", -1)),
-        (settings.rotation_positive_z, ("Z", 1)),
-    ]
-    # list of all directions that are enabled in the settings
-    enabled_rotations = [(axis, direction) for (setting, (axis, direction)) in possible_rotations if setting]
-    building_tags = context.scene.building_modifier_tags
-    for _ in range(amount):
-        obj = objects.pop()
-        obj.class_name = "rotated"
-        modified_objects.append(obj)
-        axis, direction = rng.choice(enabled_rotations)
-        degrees = rng.uniform(settings.rotation_min, settings.rotation_max) * int(direction)
-        # if object is a building the rotation is less pronounced but not entirely ignored
-        degrees = degrees * 0.1 if any(tag in obj.name for tag in building_tags) else degrees
-        # object rotation is achieved by making use of matrix rotation and multiplication provided
-        # by Blenders mathutils library, the resulting Euler is then assigned to the object
-        obj.rotation_euler = (obj.rotation_euler.to_matrix() @ Matrix.Rotation(radians(degrees), 3, axis)).to_euler()
-
-
-def scale_objects(settings, objects, modified_objects, rng):
-    # scales a number (amount) of objects either uniformly or along the axes enabled in the settings
-    amount = rng.integers(settings.scale_objects_min, settings.scale_objects_max + 1)
-    for _ in range(amount):
-        obj = objects.pop()
-        obj.class_name = "scaled"
-        modified_objects.append(obj)
-        value = rng.uniform(settings.scale_min, settings.scale_max)
-        if settings.scale_uniform:
-            scale = Vector((value, value, value))
-        else:
-            x = value if settings.scale_x else 1.0
-            y = value if settings.scale_y else 1.0
-            z = value if settings.scale_z else 1.0
-            scale = Vector((x, y, z))
-        obj.scale *= scale
-
-
-def post_scan_cleanup(objects, hidden_objects, removed_objects, modified_objects, added_objects):
-    # resets object classifications, hides removed objects in viewport
-    # objects from modified and added objects lists are moved to objects list
-    # objects from removed objects list are moved to hidden objects list
-    for _ in range(len(removed_objects)):
-        obj = removed_objects.pop()
-        obj.class_name = "initial"
-        obj.hide_viewport = True
-        for child in obj.children_recursive:
-            child.hide_viewport = True
-        hidden_objects.append(obj)
-    for _ in range(len(modified_objects)):
-        obj = modified_objects.pop()
-        obj.class_name = "initial"
-        objects.append(obj)
-    for _ in range(len(added_objects)):
-        obj = added_objects.pop()
-        obj.class_name = "initial"
-        objects.append(obj)
-
-
-def transforms_to_deltas(obj):
-    # Transfers object transforms to delta transforms and vice versa
-    # Using blenders built in operators tends to be much slower in comparison
-    translation = obj.location.copy()
-    rotation = obj.rotation_euler.copy()
-    scale = obj.scale.copy()
-    obj.location = obj.delta_location
-    obj.rotation_euler = obj.delta_rotation_euler
-    obj.scale = obj.delta_scale
-    obj.delta_location = translation
-    obj.delta_rotation_euler = rotation
-    obj.delta_scale = scale
-
-
-def reset_transforms(obj):
-    obj.scale[:3] = (1, 1, 1)
-    obj.rotation_euler[:3] = (0, 0, 0)
-    obj.location[:3] = (0, 0, 0)
-
-
-def build_object_collection(context):
-    # builds object list of all buildings and props that can receive modifications between scans
-    # modifiable objects have a corresponding tag in their object name
-    city_collection = context.scene.city_collection
-    objects = []
-    tags = [tag.strip() for tag in context.scene.object_modifier_tags.split(",")]
-    city = bpy.data.collections[city_collection]
-    for district in city.children_recursive:
-        # props list is generated separately for each district
-        # this is mainly done because sorting multiple shorter lists is faster
-        # than sorting the longer combined list of all districts
-        props = []
-        for obj in district.objects:
-            obj.class_name = "initial"
-            obj.hide_viewport = False
-            if any(tag in obj.name for tag in tags):
-                props.append(obj)
-                transforms_to_deltas(obj)
-        # list of props is sorted by their location in the scene
-        # this is done in order to achieve the same order each time and is required to make scans
-        # of the same city repeatable/deterministic as the order can vary otherwise
-        props.sort(key=lambda obj: (obj.matrix_world.translation.x, obj.matrix_world.translation.y))
-        objects.extend(props)
-    return objects
-
-
-def build_hidden_object_collection(scan_settings, dataset_settings, objects, rng):
-    # initial list of objects hidden from the city, these can later be added/revealed
-    hidden_objects = []
-    amount = dataset_settings.scans * scan_settings.add_objects_max
-    rng.shuffle(objects)
-    for i in range(amount):
-        obj = objects.pop()
-        hidden_objects.append(obj)
-        obj.hide_viewport = True
-        for child in obj.children_recursive:
-            child.hide_viewport = True
-    return hidden_objects
-
-
-def bound_scan_settings(scan_settings, dataset_settings, objects):
-    limit = int(len(objects) / (dataset_settings.scans * 3))
-    scan_settings.rotation_max = max(scan_settings.rotation_min, scan_settings.rotation_max)
-    scan_settings.rotation_objects_max = min(scan_settings.rotation_objects_max, limit)
-    scan_settings.rotation_objects_min = min(scan_settings.rotation_objects_min, scan_settings.rotation_objects_max)
-    scan_settings.translation_max = max(scan_settings.translation_min, scan_settings.translation_max)
-    scan_settings.translation_objects_max = min(scan_settings.translation_objects_max, limit)
-    scan_settings.translation_objects_min = min(
-        scan_settings.translation_objects_min,
-        scan_settings.translation_objects_max)
-    scan_settings.scale_max = max(scan_settings.scale_min, scan_settings.scale_max)
-    scan_settings.scale_objects_max = min(scan_settings.scale_objects_max, limit)
-    scan_settings.scale_objects_min = min(scan_settings.scale_objects_min, scan_settings.scale_objects_max)
-    scan_settings.add_objects_max = min(scan_settings.add_objects_max, limit)
-    scan_settings.add_objects_min = min(scan_settings.add_objects_min, scan_settings.add_objects_max)
-    scan_settings.remove_objects_max = min(scan_settings.remove_objects_max, limit)
-    scan_settings.remove_objects_min = min(scan_settings.remove_objects_min, scan_settings.remove_objects_max)
-
-
-def create_missing_classes(context):
-    # creates vLiDAR classes required for classification of objects
-    required_classes = [klass.strip() for klass in context.scene.object_classes.split(",")]
-    pc_class_names = [klass.name for klass in context.scene.pointCloudRenderProperties.classes]
-    pc_classes = context.scene.pointCloudRenderProperties.classes
-    for klass in required_classes:
-        if klass not in pc_class_names:
-            bpy.ops.pcscanner.add_class()
-            pc_classes[-1].name = klass
-            pc_classes[-1].class_id = len(pc_classes) - 1
-
-
-def run_scans(context):
-    reset_city(context)
-    scan_settings = context.scene.scan_settings
-    dataset_settings = context.scene.dataset_settings
-    city_settings = context.scene.city_settings
-    scanner_settings = context.scene.scanner_settings
-    try:
-        selected_scanner = context.scene.pointCloudRenderProperties.selected_scanner
-        scanner = context.scene.pointCloudRenderProperties.laser_scanners[selected_scanner]
-    except Exception:
-        print("Could not access selected laser scanner")
-        print(Exception)
-        return
-
-    if dataset_settings.randomize_scan_seed:
-        randomize_generator_seed(context)
-
-    if dataset_settings.generate_city:
-        city_settings.randomize_seed = True if dataset_settings.randomize_city_seed else False
-        scanner_settings.randomize_path_seed = True if dataset_settings.randomize_path_seed else False
-        build_city(context)
-        build_path(context)
-
-    rng = np.random.default_rng(scan_settings.seed)
-    objects = build_object_collection(context)
-    create_missing_classes(context)
-    bound_scan_settings(scan_settings, dataset_settings, objects)
-    hidden_objects = build_hidden_object_collection(scan_settings, dataset_settings, objects, rng)
-
-    file_name = dataset_settings.scans_directory + dataset_settings.scans_prefix + "_scan_"
-    print("-- starting initial scan --")
-    scanner.file_path = file_name + "01.csv"
-    bpy.ops.render.render_point_cloud()
-    for scans in range(dataset_settings.scans - 1):
-        if dataset_settings.scans_new_path:
-            scanner_settings.path_seed = rng.integers(10000, 100000000)
-            build_path(context)
-        # random access is achieved by shuffling the list and popping the last element(s)
-        rng.shuffle(objects)
-
-        removed_objects = []
-        added_objects = []
-        modified_objects = []
-
-        if scan_settings.remove_objects_enable:
-            removed_objects = remove_objects(scan_settings, objects, rng)
-        if scan_settings.scale_enable:
-            scale_objects(scan_settings, objects, modified_objects, rng)
-        if scan_settings.translation_enable:
-            translate_objects(scan_settings, objects, modified_objects, rng)
-        if scan_settings.rotation_enable:
-            rotate_objects(context, scan_settings, objects, modified_objects, rng)
-        if scan_settings.add_objects_enable:
-            added_objects = add_objects(scan_settings, hidden_objects, rng)
-
-        file_suffix = "0" + str(scans + 2) + ".csv" if scans < 8 else str(scans + 2) + ".csv"
-        scanner.file_path = file_name + file_suffix
-        print("-- starting scan " + str(scans + 2) + " --")
-        bpy.ops.render.render_point_cloud()
-        post_scan_cleanup(objects, hidden_objects, removed_objects, modified_objects, added_objects)
-
-
-# ------------------------------------- #
-#          Plugin Registration
-# ------------------------------------- #
 
 
 def register():
@@ -1271,6 +961,8 @@ def register():
     print("registering dataset generator")
     for (prop, value) in PROPS:
         setattr(bpy.types.Scene, prop, value)
+    for (prop, value) in RUNTIME_PROPS:
+        setattr(bpy.types.WindowManager, prop, value)
     for klass in CLASSES:
         bpy.utils.register_class(klass)
     # registration of property groups
@@ -1285,6 +977,8 @@ def unregister():
     print("unregistering dataset generator")
     for (prop, _) in PROPS:
         delattr(bpy.types.Scene, prop)
+    for (prop, _) in RUNTIME_PROPS:
+        delattr(bpy.types.WindowManager, prop)
     for klass in CLASSES:
         bpy.utils.unregister_class(klass)
     del bpy.types.Scene.scan_settings
@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import synthetic
+from stand_ins import Namespace
+
+# the core modules are imported from the repository root without Blender
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core import changes, path_generation  # noqa: E402
+
+# ---------------------------------------------------------------- #
+#                          BENCHMARKS
+# ---------------------------------------------------------------- #
+#
+# Benchmarks for road grid, graph and path generation as well as
+# the object change functions of the core modules, run under plain
+# CPython using stand-ins for Blender objects. Usage (from the
+# repository root):
+#
+#   python benchmarks/run.py                  compare against baseline
+#   python benchmarks/run.py --save-baseline  store new baseline
+#
+# ---------------------------------------------------------------- #
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def road_grid_benchmark(size):
+    grid, _ = synthetic.city_grid(size, size)
+    return lambda: None, lambda _: path_generation.build_road_grid(size, size, grid)
+
+
+def graph_benchmark(size):
+    grid, road_locations = synthetic.city_grid(size, size)
+    return (lambda: path_generation.build_road_grid(size, size, grid),
+            lambda road_grid: path_generation.build_graph(size, size, road_grid, road_locations))
+
+
+def adjacency_benchmark(size):
+    grid, road_locations = synthetic.city_grid(size, size)
+    road_grid = path_generation.build_road_grid(size, size, grid)
+    graph = path_generation.build_graph(size, size, road_grid, road_locations)
+
+    def setup():
+        for data in graph.values():
+            data["adjacent_nodes"] = []
+            data["adjacent_leaves"] = []
+        return graph
+    return setup, lambda graph: path_generation.build_adjacency(graph, road_grid)
+
+
+def paths_benchmark(path_method):
+    def benchmark(size):
+        grid, road_locations = synthetic.city_grid(size, size)
+        graph = path_generation.build_graph(
+            size, size, path_generation.build_road_grid(size, size, grid), road_locations)
+        settings = synthetic.scanner_settings(path_method)
+        return lambda: None, lambda _: path_generation.generate_paths(graph, settings)
+    return benchmark
+
+
+def search_benchmark(objective):
+    def benchmark(size):
+        grid, road_locations = synthetic.city_grid(size, size)
+        graph = path_generation.build_graph(
+            size, size, path_generation.build_road_grid(size, size, grid), road_locations)
+        data = {"locations": np.random.default_rng(12345).uniform(0, size, (size * size // 10, 2)), "range": 5.0}
+        return lambda: None, lambda _: path_generation.search_paths(graph, ('BFS', 10, 2), 12345, 16, objective, data)
+    return benchmark
+
+
+def objects_setup(amount):
+    # objects are modified by the benchmarks, so a new population is created for each run
+    objects = synthetic.object_population(amount, 100, 100)
+    settings = synthetic.scan_settings(max(amount // 100, 1))
+    rng = np.random.default_rng(settings.seed)
+    return objects, settings, rng
+
+
+def hidden_collection_benchmark(amount):
+    dataset_settings = Namespace(scans=4)
+
+    def run(state):
+        objects, settings, rng = state
+        changes.build_hidden_object_collection(settings, dataset_settings, objects, rng)
+    return lambda: objects_setup(amount), run
+
+
+def change_benchmark(change):
+    def benchmark(amount):
+        def setup():
+            objects, settings, rng = objects_setup(amount)
+            rng.shuffle(objects)
+            return objects, settings, rng
+
+        def run(state):
+            objects, settings, rng = state
+            if change == "remove_objects":
+                changes.remove_objects(settings, objects, rng)
+            elif change == "add_objects":
+                changes.add_objects(settings, objects, rng)
+            elif change == "translate_objects":
+                changes.translate_objects(settings, objects, [], rng)
+            elif change == "rotate_objects":
+                changes.rotate_objects(settings, objects, [], rng, "building")
+            elif change == "scale_objects":
+                changes.scale_objects(settings, objects, [], rng)
+        return setup, run
+    return benchmark
+
+
+def cleanup_benchmark(amount):
+    def setup():
+        objects, settings, rng = objects_setup(amount)
+        changed = amount // 100
+        removed = [objects.pop() for _ in range(changed)]
+        modified = [objects.pop() for _ in range(changed)]
+        added = [objects.pop() for _ in range(changed)]
+        return objects, [], removed, modified, added
+    return setup, lambda state: changes.post_scan_cleanup(*state)
+
+
+def prioritize_benchmark(mode):
+    def benchmark(amount):
+        objects, _, _ = objects_setup(amount)
+        index = changes.build_selection_index(objects, 10.0, mode)
+        changes.set_selection_path(index, np.array([[-50.0, 0.0, 0.1], [50.0, 0.0, 0.1], [50.0, 40.0, 0.1]]))
+        return lambda: (list(objects), np.random.default_rng(12345)), \
+            lambda state: changes.prioritize_objects(state[0], state[1], index)
+    return benchmark
+
+
+# benchmarks are grouped by the parameter they are scaled with
+GRID_BENCHMARKS = {
+    "build_road_grid": road_grid_benchmark,
+    "build_graph": graph_benchmark,
+    "build_adjacency": adjacency_benchmark,
+    "generate_paths.SINGLE": paths_benchmark('SINGLE'),
+    "generate_paths.MULTIPLE": paths_benchmark('MULTIPLE'),
+    "generate_paths.DFS": paths_benchmark('DFS'),
+    "generate_paths.BFS": paths_benchmark('BFS'),
+    "search_paths.LENGTH": search_benchmark('LENGTH'),
+    "search_paths.OBJECTS": search_benchmark('OBJECTS'),
+}
+
+OBJECT_BENCHMARKS = {
+    "build_hidden_object_collection": hidden_collection_benchmark,
+    "remove_objects": change_benchmark("remove_objects"),
+    "add_objects": change_benchmark("add_objects"),
+    "translate_objects": change_benchmark("translate_objects"),
+    "rotate_objects": change_benchmark("rotate_objects"),
+    "scale_objects": change_benchmark("scale_objects"),
+    "post_scan_cleanup": cleanup_benchmark,
+    "prioritize_objects.IN_RANGE": prioritize_benchmark('IN_RANGE'),
+    "prioritize_objects.WEIGHTED": prioritize_benchmark('WEIGHTED'),
+}
+
+
+def measure(benchmark, size, repeat):
+    # returns the best time of all repetitions and the peak memory allocated by a single run
+    # memory is measured in a separate run since tracing allocations slows down execution
+    setup, run = benchmark(size)
+    best = float("inf")
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        best = min(best, time.perf_counter() - start)
+    state = setup()
+    tracemalloc.start()
+    run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"time": best, "peak_memory": peak}
+
+
+def run_benchmarks(benchmarks, sizes, repeat, budget, name_filter):
+    # larger sizes of a benchmark are skipped once a single run exceeds the time budget
+    results = {}
+    for name, benchmark in benchmarks.items():
+        if name_filter and name_filter not in name:
+            continue
+        results[name] = {}
+        for size in sizes:
+            result = measure(benchmark, size, repeat)
+            results[name][str(size)] = result
+            print(name.ljust(32) + str(size).rjust(8) + ("%.5f s" % result["time"]).rjust(14)
+                  + ("%.1f KiB" % (result["peak_memory"] / 1024)).rjust(16))
+            if result["time"] > budget:
+                print(name.ljust(32) + "skipping sizes above " + str(size))
+                break
+    return results
+
+
+def compare(results, baseline, threshold, min_difference):
+    # returns all results slower than their baseline by more than the threshold
+    # differences below min_difference seconds are timing noise and are ignored
+    regressions = []
+    for name, sizes in results.items():
+        for size, result in sizes.items():
+            reference = baseline.get(name, {}).get(size)
+            if reference is None:
+                continue
+            ratio = result["time"] / max(reference["time"], 1e-9)
+            if ratio > 1.0 + threshold and result["time"] - reference["time"] > min_difference:
+                regressions.append((name, size, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for path and scan planning without Blender")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100, 250, 500, 1000])
+    parser.add_argument("--populations", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=30.0, help="seconds per run before larger sizes are skipped")
+    parser.add_argument("--filter", default="", help="only run benchmarks containing this name")
+    parser.add_argument("--output", help="write results as json")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative slowdown reported as regression")
+    parser.add_argument("--min-difference", type=float, default=0.001, help="seconds of slowdown ignored as noise")
+    args = parser.parse_args()
+
+    results = run_benchmarks(GRID_BENCHMARKS, args.sizes, args.repeat, args.budget, args.filter)
+    results.update(run_benchmarks(OBJECT_BENCHMARKS, args.populations, args.repeat, args.budget, args.filter))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2)
+        return 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold, args.min_difference)
+        for name, size, ratio in regressions:
+            print("regression: " + name + " (" + size + ") " + ("%.2fx" % ratio) + " slower than baseline")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
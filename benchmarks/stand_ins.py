@@ -0,0 +1,54 @@
+# ---------------------------------------------------------------- #
+#                          STAND-INS
+# ---------------------------------------------------------------- #
+#
+# Minimal stand-ins for Blender objects and settings, providing
+# just the attributes used by the core modules. Nothing is
+# rendered and no SceneCity or vLiDAR functionality is available.
+#
+# ---------------------------------------------------------------- #
+
+
+class Vector:
+    __slots__ = ("values",)
+
+    def __init__(self, values=(0.0, 0.0, 0.0)):
+        self.values = [float(value) for value in values]
+
+    x = property(lambda self: self.values[0], lambda self, value: self.values.__setitem__(0, value))
+    y = property(lambda self: self.values[1], lambda self, value: self.values.__setitem__(1, value))
+    z = property(lambda self: self.values[2], lambda self, value: self.values.__setitem__(2, value))
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+
+class MatrixWorld:
+    __slots__ = ("translation",)
+
+    def __init__(self, translation):
+        self.translation = Vector(translation)
+
+
+class Object:
+    # stand-in for bpy.types.Object with the attributes used by the core modules
+    def __init__(self, name, location=(0.0, 0.0, 0.0), children=()):
+        self.name = name
+        self.class_name = "initial"
+        self.hide_viewport = False
+        self.location = Vector(location)
+        self.scale = Vector((1.0, 1.0, 1.0))
+        self.matrix_world = MatrixWorld(location)
+        self.children = list(children)
+        self.children_recursive = list(children)
+
+
+class Namespace:
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
@@ -0,0 +1,81 @@
+import numpy as np
+
+from stand_ins import Namespace, Object
+
+# ---------------------------------------------------------------- #
+#                        SYNTHETIC DATA
+# ---------------------------------------------------------------- #
+#
+# Deterministic SceneCity-like city grids and object populations
+# for benchmarks. Road layouts consist of straight roads crossing
+# the city between blocks of random size, ending in road portions
+# at the edge of the city.
+#
+# ---------------------------------------------------------------- #
+
+
+def road_lines(dimension, block_min, block_max, rng):
+    # positions of roads along one axis separated by blocks of random size
+    # roads are never placed on the border, so every road ends in a leaf at the edge of the city
+    lines = []
+    position = int(rng.integers(block_min, block_max + 1))
+    while position < dimension - 1:
+        lines.append(position)
+        position += int(rng.integers(block_min, block_max + 1)) + 1
+    return lines
+
+
+def city_grid(dimension_x, dimension_y, block_min=2, block_max=6, seed=0):
+    # returns a stand-in for the SceneCity grid and the world locations of the road objects placed for it
+    # roads are marked with the "road" key, all other cells are assigned a district
+    rng = np.random.default_rng(seed)
+    lines_x = set(road_lines(dimension_x, block_min, block_max, rng))
+    lines_y = set(road_lines(dimension_y, block_min, block_max, rng))
+    data = [[None for y in range(dimension_y)] for x in range(dimension_x)]
+    road_locations = []
+    for x in range(dimension_x):
+        for y in range(dimension_y):
+            if x in lines_x or y in lines_y:
+                data[x][y] = {"road": "straight"}
+                # road objects are placed in the center of their cell, offset by the city dimensions
+                road_locations.append((x - dimension_x / 2 + 0.5, y - dimension_y / 2 + 0.5))
+            else:
+                data[x][y] = {"district": "residential"}
+    return Namespace(data=data), road_locations
+
+
+def object_population(amount, dimension_x, dimension_y, seed=0):
+    # returns tagged buildings and props at random locations within the city
+    rng = np.random.default_rng(seed)
+    locations = rng.uniform(
+        (-dimension_x / 2, -dimension_y / 2, 0.0), (dimension_x / 2, dimension_y / 2, 0.0), (amount, 3))
+    tags = rng.choice(["building", "prop"], amount)
+    return [Object(tag + "." + str(i), location) for i, (tag, location) in enumerate(zip(tags, locations))]
+
+
+def scanner_settings(path_method, path_seed=12345):
+    return Namespace(
+        path_seed=path_seed,
+        path_method=path_method,
+        path_multiple_amount=10,
+        path_neighbor_amount=2,
+        path_selection='LONGEST')
+
+
+def scan_settings(objects_per_change, seed=12345):
+    # scan settings with every change enabled and a fixed number of objects per change and scan
+    settings = Namespace(seed=seed, change_selection='ALL', scale_uniform=True)
+    for change in ("remove_objects", "add_objects", "rotation_objects", "translation_objects", "scale_objects"):
+        setattr(settings, change + "_min", objects_per_change)
+        setattr(settings, change + "_max", objects_per_change)
+    for change in ("remove_objects", "add_objects", "rotation", "translation", "scale"):
+        setattr(settings, change + "_enable", True)
+    settings.rotation_min, settings.rotation_max = 1.0, 10.0
+    settings.translation_min, settings.translation_max = 0.05, 0.1
+    settings.scale_min, settings.scale_max = 0.9, 1.1
+    for axis in ("x", "y", "z"):
+        setattr(settings, "scale_" + axis, True)
+        for direction in ("positive", "negative"):
+            setattr(settings, "rotation_" + direction + "_" + axis, axis == "z")
+            setattr(settings, "translation_" + direction + "_" + axis, axis != "z")
+    return settings
@@ -0,0 +1,42 @@
+import random
+
+# ---------------------------------------------------------------- #
+#                              CORE
+# ---------------------------------------------------------------- #
+#
+# Blender independent logic of the add-on:
+#
+#   city        memory estimation (estimation), city tiles (tiling),
+#               city variants (variants), mesh sharing (instancing)
+#   paths       road graph and path generation (path_generation),
+#               path and bounding volume geometry (geometry)
+#   changes     object change planning (changes)
+#   scanning    the preview scanner (preview), adaptive sampling
+#               (sampling), scan file handling (scan_files)
+#   scans       post-processing of finished scans (post_processing)
+#               with statistics (statistics), columnar storage
+#               (columnar), deltas (deltas), octrees (octree),
+#               downsampling (downsampling), change labels
+#               (change_detection) and training blocks (blocks)
+#   sets        the catalog of generated sets (catalog)
+#   tools       stage timings (tracing), process pools run outside
+#               Blender (standalone)
+#
+# None of the core modules import bpy or mathutils, so they can be
+# used by worker processes and tools outside Blender.
+#
+# This module itself only uses the standard library, as it is
+# imported while registering the add-on.
+#
+# ---------------------------------------------------------------- #
+
+# range of seeds used for city, path and scan generation
+SEED_MIN = 10000
+SEED_MAX = 100000000
+
+
+def random_seed(rng=None):
+    # draws a new seed, from the given numpy generator to keep derived seeds deterministic
+    if rng is None:
+        return random.randrange(SEED_MIN, SEED_MAX)
+    return int(rng.integers(SEED_MIN, SEED_MAX))
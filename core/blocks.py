@@ -0,0 +1,89 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .downsampling import pack_keys, unpack_keys
+from .scan_files import read_scan_chunks
+
+# ---------------------------------------------------------------- #
+#                        TRAINING BLOCKS
+# ---------------------------------------------------------------- #
+#
+# Cuts scans into square columns of block_size on the ground plane
+# with a fixed number of points each, as used to train point cloud
+# networks. Blocks are aligned to the world origin, so the blocks of
+# all scans of a set cover the same regions.
+#
+# Points are sampled by giving each point a random priority and
+# keeping the points with the lowest priorities of each block. This
+# is done while streaming over the scan in chunks, so memory is
+# bounded by the number of blocks times the points per block. Blocks
+# with less points are filled up by repeating sampled points, the
+# number of distinct points is stored as well. Priorities are drawn
+# from a generator seeded with the dataset seed and the scan, so
+# blocks are reproducible.
+#
+#   <scan>_blocks.npz
+#       points      (blocks, points per block, columns) float32
+#       blocks      (blocks, 2) int32 block indices on x and y
+#       counts      (blocks,) distinct points per block
+#
+# ---------------------------------------------------------------- #
+
+
+def block_keys(points, block_size):
+    cells = np.floor(points[:, :2] / block_size).astype(np.int64)
+    return pack_keys(np.column_stack([cells, np.zeros(len(cells), dtype=np.int64)]))
+
+
+def keep_lowest(keys, priorities, points, block_points):
+    # keeps the block_points points of lowest priority of each block, sorted by block and priority
+    order = np.lexsort((priorities, keys))
+    keys, priorities, points = keys[order], priorities[order], points[order]
+    first = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))[:len(keys)]
+    ranks = np.arange(len(keys)) - np.repeat(first, np.diff(np.concatenate([first, [len(keys)]])))
+    keep = ranks < block_points
+    return keys[keep], priorities[keep], points[keep]
+
+
+def extract_blocks(file_path, output_path, block_size, block_points, min_points, seed, chunk_size=1000000):
+    # writes the blocks of a scan and returns the number of blocks, seed is a sequence of integers
+    rng = np.random.default_rng(seed)
+    keys = np.zeros(0, dtype=np.int64)
+    priorities = np.zeros(0)
+    points = None
+    for chunk in read_scan_chunks(file_path, chunk_size):
+        if points is None:
+            points = np.zeros((0, chunk.shape[1]), dtype=np.float32)
+        keys, priorities, points = keep_lowest(
+            np.concatenate([keys, block_keys(chunk, block_size)]),
+            np.concatenate([priorities, rng.random(len(chunk))]),
+            np.concatenate([points, chunk.astype(np.float32)]), block_points)
+    if points is None:
+        points = np.zeros((0, 3), dtype=np.float32)
+    first = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))[:len(keys)]
+    counts = np.diff(np.concatenate([first, [len(keys)]]))
+    valid = counts >= max(min_points, 1)
+    first, counts = first[valid], counts[valid]
+    # blocks with less points repeat their points, sampled uniformly
+    slots = np.arange(block_points)
+    fill = rng.integers(0, np.iinfo(np.int64).max, (len(first), block_points)) % counts[:, None]
+    rows = first[:, None] + np.where(slots[None, :] < counts[:, None], slots[None, :], fill)
+    blocks = unpack_keys(keys[first])[:, :2].astype(np.int32)
+    np.savez(output_path, points=points[rows], blocks=blocks, counts=counts.astype(np.int32), block_size=block_size)
+    return len(first)
+
+
+def blocks_path(file_path):
+    return os.path.splitext(file_path)[0] + "_blocks.npz"
+
+
+def extract_set_blocks(file_paths, block_size, block_points, min_points, seed, processes=None):
+    # extracts the blocks of all scans of a set in a process pool, scans are seeded by their position
+    # returns the number of blocks per scan, called from Blender through standalone.run
+    with ProcessPoolExecutor(processes) as executor:
+        futures = [executor.submit(extract_blocks, file_path, blocks_path(file_path), block_size,
+                                   block_points, min_points, (seed, i))
+                   for i, file_path in enumerate(file_paths)]
+        return [future.result() for future in futures]
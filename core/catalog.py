@@ -0,0 +1,260 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+# ---------------------------------------------------------------- #
+#                            CATALOG
+# ---------------------------------------------------------------- #
+#
+# SQLite catalog of generated sets and their provenance. Each set
+# registers a row with the settings of all four settings groups,
+# the seeds actually used, the path and the totals of its scans,
+# each scan a row with its file, size, points and timings and its
+# point counts by class. Columns used to select sets are indexed.
+#
+#   sets            one row per set, settings as json
+#   scans           one row per scan of a set
+#   scan_classes    points per class of each scan
+#
+# Sets are selected with filters of the form column=value or
+# column__op=value, with op one of eq, ne, lt, le, gt, ge or like.
+# This module only uses the standard library and NumPy, so it can
+# be run as command line tool outside Blender:
+#
+#   python core/catalog.py query <catalog> path_method=BFS dimension_x=50 new_fraction__gt=0.05
+#   python core/catalog.py scans <catalog> <set id>
+#   python core/catalog.py export <catalog> <output.npz>
+#
+# ---------------------------------------------------------------- #
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sets (
+    id INTEGER PRIMARY KEY,
+    prefix TEXT,
+    directory TEXT,
+    created REAL,
+    scans INTEGER,
+    trajectories INTEGER,
+    cancelled INTEGER,
+    city_seed INTEGER,
+    scan_seed INTEGER,
+    path_seed INTEGER,
+    path_method TEXT,
+    path_selection TEXT,
+    dimension_x INTEGER,
+    dimension_y INTEGER,
+    districts TEXT,
+    path_length REAL,
+    points INTEGER,
+    bytes INTEGER,
+    render_seconds REAL,
+    new_fraction REAL,
+    changed_fraction REAL,
+    settings TEXT
+);
+CREATE TABLE IF NOT EXISTS scans (
+    set_id INTEGER REFERENCES sets(id),
+    position INTEGER,
+    timestamp INTEGER,
+    trajectory INTEGER,
+    name TEXT,
+    file_path TEXT,
+    bytes INTEGER,
+    points INTEGER,
+    render_seconds REAL,
+    scan_seconds REAL,
+    path_seed INTEGER,
+    path_length REAL,
+    PRIMARY KEY (set_id, position)
+);
+CREATE TABLE IF NOT EXISTS scan_classes (
+    set_id INTEGER REFERENCES sets(id),
+    position INTEGER,
+    class_name TEXT,
+    points INTEGER
+);
+CREATE INDEX IF NOT EXISTS sets_city ON sets (dimension_x, dimension_y);
+CREATE INDEX IF NOT EXISTS sets_path_method ON sets (path_method);
+CREATE INDEX IF NOT EXISTS sets_new_fraction ON sets (new_fraction);
+CREATE INDEX IF NOT EXISTS sets_changed_fraction ON sets (changed_fraction);
+CREATE INDEX IF NOT EXISTS sets_seeds ON sets (city_seed, scan_seed);
+CREATE INDEX IF NOT EXISTS sets_prefix ON sets (prefix);
+CREATE INDEX IF NOT EXISTS scan_classes_class ON scan_classes (class_name, set_id);
+"""
+
+SET_COLUMNS = ("id", "prefix", "directory", "created", "scans", "trajectories", "cancelled", "city_seed", "scan_seed",
+               "path_seed", "path_method", "path_selection", "dimension_x", "dimension_y", "districts", "path_length",
+               "points", "bytes", "render_seconds", "new_fraction", "changed_fraction")
+
+OPERATORS = {"eq": "=", "ne": "!=", "lt": "<", "le": "<=", "gt": ">", "ge": ">=", "like": "LIKE"}
+
+# classes not counted as changed points, as in statistics.py
+UNCHANGED_CLASSES = ("initial",)
+
+
+def connect(path):
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def change_fractions(scans):
+    # fractions of new and of changed points among all points of the scans after the initial scan(s),
+    # scans without a timestamp are taken as one scan per timestamp
+    scans = [scan for position, scan in enumerate(scans) if scan.get("timestamp", position) > 0]
+    points = sum(scan.get("points") or 0 for scan in scans)
+    new = sum(scan.get("classes", {}).get("new", 0) for scan in scans)
+    changed = sum(count for scan in scans for name, count in scan.get("classes", {}).items()
+                  if name not in UNCHANGED_CLASSES)
+    if not points:
+        return None, None
+    return new / points, changed / points
+
+
+def register_set(path, record):
+    # record holds the values of the set columns, "settings" as dict and "scans" as list of dicts with the
+    # scan columns and "classes" mapping class names to points, returns the id of the new set
+    # "scans" of the set counts the scan files, i.e. timestamps times trajectories
+    scans = record["scans"]
+    new_fraction, changed_fraction = change_fractions(scans)
+    values = dict(record, created=record.get("created", time.time()), scans=len(scans),
+                  points=sum(scan.get("points") or 0 for scan in scans),
+                  bytes=sum(scan.get("bytes") or 0 for scan in scans),
+                  render_seconds=sum(scan.get("render_seconds") or 0.0 for scan in scans),
+                  new_fraction=new_fraction, changed_fraction=changed_fraction,
+                  settings=json.dumps(record["settings"], sort_keys=True))
+    columns = [column for column in SET_COLUMNS if column != "id"] + ["settings"]
+    with connect(path) as connection:
+        set_id = connection.execute(
+            "INSERT INTO sets (" + ", ".join(columns) + ") VALUES (" + ", ".join("?" * len(columns)) + ")",
+            [values.get(column) for column in columns]).lastrowid
+        connection.executemany(
+            "INSERT INTO scans VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(set_id, position, scan.get("timestamp", position), scan.get("trajectory", 0), scan.get("name"),
+              scan.get("file_path"), scan.get("bytes"), scan.get("points"), scan.get("render_seconds"),
+              scan.get("scan_seconds"), scan.get("path_seed"), scan.get("path_length"))
+             for position, scan in enumerate(scans)])
+        connection.executemany(
+            "INSERT INTO scan_classes VALUES (?, ?, ?, ?)",
+            [(set_id, position, name, count) for position, scan in enumerate(scans)
+             for name, count in scan.get("classes", {}).items()])
+    return set_id
+
+
+def filter_clause(filters, table="sets"):
+    # sql condition and parameters of filters given as {column or column__op: value}
+    conditions = []
+    parameters = []
+    for key, value in filters.items():
+        column, _, operator = key.partition("__")
+        if column not in SET_COLUMNS or (operator or "eq") not in OPERATORS:
+            raise ValueError("Unknown filter " + key)
+        conditions.append(table + "." + column + " " + OPERATORS[operator or "eq"] + " ?")
+        parameters.append(value)
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), parameters
+
+
+def find_sets(path, limit=None, **filters):
+    # sets matching all filters as dicts, without their settings
+    clause, parameters = filter_clause(filters)
+    query = "SELECT " + ", ".join(SET_COLUMNS) + " FROM sets" + clause + " ORDER BY id"
+    if limit:
+        query += " LIMIT " + str(int(limit))
+    with connect(path) as connection:
+        return [dict(row) for row in connection.execute(query, parameters)]
+
+
+def set_settings(path, set_id):
+    with connect(path) as connection:
+        row = connection.execute("SELECT settings FROM sets WHERE id = ?", (set_id,)).fetchone()
+    return json.loads(row["settings"]) if row else None
+
+
+def set_scans(path, set_id):
+    # scans of a set in order with their points per class
+    with connect(path) as connection:
+        scans = [dict(row) for row in connection.execute(
+            "SELECT * FROM scans WHERE set_id = ? ORDER BY position", (set_id,))]
+        for row in connection.execute("SELECT position, class_name, points FROM scan_classes WHERE set_id = ?",
+                                      (set_id,)):
+            scans[row["position"]].setdefault("classes", {})[row["class_name"]] = row["points"]
+    return scans
+
+
+def export_scans(path, output_path, **filters):
+    # writes the scans of all matching sets as columns (one array per column) to an npz file,
+    # points per class are written as one column per class
+    clause, parameters = filter_clause(filters)
+    with connect(path) as connection:
+        rows = [dict(row) for row in connection.execute(
+            "SELECT scans.* FROM scans JOIN sets ON sets.id = scans.set_id" + clause + " ORDER BY set_id, position",
+            parameters)]
+        classes = {}
+        for row in connection.execute("SELECT set_id, position, class_name, points FROM scan_classes"):
+            classes[(row["set_id"], row["position"], row["class_name"])] = row["points"]
+    class_names = sorted({name for _, _, name in classes})
+    columns = {}
+    for column in ("set_id", "position", "timestamp", "trajectory", "bytes", "points", "render_seconds",
+                   "scan_seconds", "path_seed", "path_length"):
+        columns[column] = np.array([row[column] if row[column] is not None else np.nan for row in rows])
+    columns["name"] = np.array([row["name"] or "" for row in rows])
+    for name in class_names:
+        columns["class_" + name] = np.array(
+            [classes.get((row["set_id"], row["position"], name), 0) for row in rows], dtype=np.int64)
+    np.savez(output_path, **columns)
+    return len(rows)
+
+
+def parse_filters(arguments):
+    # filters given as column[__op]=value, values are parsed as numbers where possible
+    filters = {}
+    for argument in arguments:
+        key, _, value = argument.partition("=")
+        for parse in (int, float):
+            try:
+                value = parse(value)
+                break
+            except ValueError:
+                continue
+        filters[key] = value
+    return filters
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Query the catalog of generated scan sets")
+    commands = parser.add_subparsers(dest="command", required=True)
+    query = commands.add_parser("query", help="list sets matching all filters")
+    query.add_argument("catalog")
+    query.add_argument("filters", nargs="*", help="column=value or column__op=value")
+    query.add_argument("--limit", type=int)
+    scans = commands.add_parser("scans", help="list the scans of a set")
+    scans.add_argument("catalog")
+    scans.add_argument("set_id", type=int)
+    export = commands.add_parser("export", help="write the scans of matching sets as columns to an npz file")
+    export.add_argument("catalog")
+    export.add_argument("output")
+    export.add_argument("filters", nargs="*")
+    args = parser.parse_args(arguments)
+    if not os.path.exists(args.catalog):
+        parser.error("catalog " + args.catalog + " does not exist")
+    if args.command == "query":
+        sets = find_sets(args.catalog, args.limit, **parse_filters(args.filters))
+        print("\t".join(SET_COLUMNS))
+        for row in sets:
+            print("\t".join(str(row[column]) for column in SET_COLUMNS))
+    elif args.command == "scans":
+        for scan in set_scans(args.catalog, args.set_id):
+            print(json.dumps(scan))
+    else:
+        print(str(export_scans(args.catalog, args.output, **parse_filters(args.filters))) + " scans exported")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+import json
+import os
+import shutil
+import zipfile
+
+import numpy as np
+
+from .downsampling import pack_keys
+from .scan_files import read_scan_chunks, read_scan_header
+from .statistics import UNCHANGED_CLASSES, class_column
+
+# ---------------------------------------------------------------- #
+#                        CHANGE DETECTION
+# ---------------------------------------------------------------- #
+#
+# Per point change labels between two consecutive scans of a set.
+# Each point of a scan is paired with its nearest neighbour in the
+# previous scan, found in a voxel hash of the previous scan with
+# voxels the size of the search radius, so only the 27 voxels
+# around a point have to be searched. Queries are processed in
+# batches limited by the number of candidate pairs. Scans are
+# labelled in chunks against the hash of the previous scan, so only
+# the coordinates of the previous scan are held in memory.
+#
+#   UNCHANGED   nearest neighbour closer than the tolerance
+#   MOVED       nearest neighbour within the search radius, the
+#               displacement points from the neighbour to the point
+#   NEW         no neighbour within the search radius
+#
+# Points of the previous scan without a neighbour closer than the
+# tolerance in the new scan are reported as removed.
+#
+# ---------------------------------------------------------------- #
+
+UNCHANGED = 0
+MOVED = 1
+NEW = 2
+
+FLAG_NAMES = ("unchanged", "moved", "new")
+
+NEIGHBOUR_OFFSETS = np.array([(x, y, z) for x in (-1, 0, 1) for y in (-1, 0, 1) for z in (-1, 0, 1)])
+
+
+def build_voxel_hash(points, cell_size):
+    # points sorted by voxel key with the range of points of each occupied voxel
+    keys = pack_keys(np.floor(points / cell_size).astype(np.int64))
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]])) if len(keys) else np.zeros(0, np.int64)
+    return {
+        "cell_size": cell_size,
+        "order": order,
+        "points": points[order],
+        "keys": keys[starts],
+        "starts": starts,
+        "counts": np.diff(np.concatenate([starts, [len(keys)]])),
+    }
+
+
+def nearest_neighbours(voxel_hash, queries, max_pairs=4000000):
+    # index (into the hashed points) and distance of the nearest neighbour within the
+    # cell size of each query point, -1 and inf for query points without neighbour
+    indices = np.full(len(queries), -1, dtype=np.int64)
+    distances = np.full(len(queries), np.inf)
+    if not len(voxel_hash["keys"]) or not len(queries):
+        return indices, distances
+    # queries are processed in voxel order, which keeps voxel lookups and point accesses local
+    query_order = np.argsort(pack_keys(np.floor(queries / voxel_hash["cell_size"]).astype(np.int64)), kind="stable")
+    queries = queries[query_order]
+    mean_count = int(np.ceil(voxel_hash["counts"].mean()))
+    batch_size = max(1, max_pairs // (len(NEIGHBOUR_OFFSETS) * mean_count))
+    for batch_start in range(0, len(queries), batch_size):
+        batch = queries[batch_start:batch_start + batch_size]
+        best_indices = indices[batch_start:batch_start + batch_size]
+        best_distances = distances[batch_start:batch_start + batch_size]
+        cells = np.floor(batch / voxel_hash["cell_size"]).astype(np.int64)
+        for offset in NEIGHBOUR_OFFSETS:
+            keys = pack_keys(cells + offset)
+            voxels = np.searchsorted(voxel_hash["keys"], keys).clip(max=len(voxel_hash["keys"]) - 1)
+            found = voxel_hash["keys"][voxels] == keys
+            counts = np.where(found, voxel_hash["counts"][voxels], 0)
+            # candidate pairs of all query points and the points of their neighbouring voxel
+            query_indices = np.repeat(np.arange(len(batch)), counts)
+            first = np.repeat(np.cumsum(counts) - counts, counts)
+            point_indices = np.repeat(voxel_hash["starts"][voxels], counts) + np.arange(len(query_indices)) - first
+            pair_distances = np.sqrt(((voxel_hash["points"][point_indices] - batch[query_indices]) ** 2).sum(axis=1))
+            closer = pair_distances < best_distances[query_indices]
+            query_indices, point_indices, pair_distances = \
+                query_indices[closer], point_indices[closer], pair_distances[closer]
+            np.minimum.at(best_distances, query_indices, pair_distances)
+            nearest = pair_distances == best_distances[query_indices]
+            best_indices[query_indices[nearest]] = point_indices[nearest]
+    indices[distances > voxel_hash["cell_size"]] = -1
+    distances[indices < 0] = np.inf
+    unsorted_indices = np.empty_like(indices)
+    unsorted_distances = np.empty_like(distances)
+    unsorted_indices[query_order] = indices
+    unsorted_distances[query_order] = distances
+    return unsorted_indices, unsorted_distances
+
+
+def label_points(previous_hash, points, tolerance, search_radius):
+    # flags and displacements of points against the voxel hash of the previous scan
+    indices, distances = nearest_neighbours(previous_hash, points)
+    flags = np.full(len(points), NEW, dtype=np.uint8)
+    flags[distances <= search_radius] = MOVED
+    flags[distances <= tolerance] = UNCHANGED
+    displacements = np.zeros((len(points), 3), dtype=np.float32)
+    found = indices >= 0
+    displacements[found] = points[found] - previous_hash["points"][indices[found]]
+    return flags, displacements
+
+
+def read_points(file_path, chunk_size=1000000):
+    # point coordinates of a scan, other columns are dropped while reading
+    coordinates = [chunk[:, :3] for chunk in read_scan_chunks(file_path, chunk_size)]
+    return np.concatenate(coordinates) if coordinates else np.zeros((0, 3))
+
+
+def match_previous_points(previous_points, matched, points, tolerance):
+    # marks the previous points with a neighbour closer than the tolerance among the points of a chunk,
+    # only unmatched previous points within the bounds of the chunk are searched
+    if not len(points):
+        return
+    candidates = np.flatnonzero(~matched & np.all(previous_points >= points.min(axis=0) - tolerance, axis=1)
+                                & np.all(previous_points <= points.max(axis=0) + tolerance, axis=1))
+    _, distances = nearest_neighbours(build_voxel_hash(points, tolerance), previous_points[candidates])
+    matched[candidates[distances <= tolerance]] = True
+
+
+def compare_with_classes(class_counts, class_names):
+    # number of points of each flag per vLiDAR class and the fraction of points whose flag
+    # agrees with their class, i.e. unchanged for unchanged classes and changed otherwise,
+    # class_counts maps class ids to the number of points of each flag
+    confusion = {}
+    agreeing = 0
+    points = 0
+    for class_id, counts in sorted(class_counts.items()):
+        name = class_names.get(class_id, str(class_id))
+        confusion[name] = {flag: int(count) for flag, count in zip(FLAG_NAMES, counts)}
+        agreeing += counts[UNCHANGED] if name in UNCHANGED_CLASSES else counts[MOVED] + counts[NEW]
+        points += counts.sum()
+    return confusion, float(agreeing / max(points, 1))
+
+
+def label_scan_changes(previous_path, file_path, output_path, tolerance, search_radius, class_names,
+                       chunk_size=1000000):
+    # writes flags, displacements and removed point indices of the previous scan as npz
+    # along with a json summary, only the coordinates of the previous scan and its voxel hash
+    # are held in memory, the scan is labelled in chunks written to the npz as they are done
+    previous_points = read_points(previous_path, chunk_size)
+    previous_hash = build_voxel_hash(previous_points, search_radius)
+    matched = np.zeros(len(previous_points), dtype=bool)
+    header = read_scan_header(file_path)
+    flag_counts = np.zeros(len(FLAG_NAMES), dtype=np.int64)
+    class_counts = {}
+    column = None
+    count = 0
+    # labels are appended to raw files as chunks are labelled and stored in the npz once the count is known
+    flags_path = output_path + ".flags.tmp"
+    displacements_path = output_path + ".displacements.tmp"
+    with open(flags_path, "wb") as flags_file, open(displacements_path, "wb") as displacements_file:
+        for chunk in read_scan_chunks(file_path, chunk_size):
+            if not count:
+                column = class_column(header, chunk.shape[1])
+            points = chunk[:, :3]
+            flags, displacements = label_points(previous_hash, points, tolerance, search_radius)
+            flags_file.write(flags.tobytes())
+            displacements_file.write(displacements.tobytes())
+            count += len(points)
+            match_previous_points(previous_points, matched, points, tolerance)
+            flag_counts += np.bincount(flags, minlength=len(FLAG_NAMES))
+            if column is not None:
+                class_ids = np.rint(chunk[:, column]).astype(np.int64)
+                for class_id in np.unique(class_ids):
+                    counts = np.bincount(flags[class_ids == class_id], minlength=len(FLAG_NAMES))
+                    class_counts[int(class_id)] = class_counts.get(int(class_id), 0) + counts
+    with zipfile.ZipFile(output_path + ".npz", "w", allowZip64=True) as archive:
+        for name, path, dtype, shape in (("flags", flags_path, np.uint8, (count,)),
+                                         ("displacements", displacements_path, np.float32, (count, 3))):
+            with archive.open(name + ".npy", "w", force_zip64=True) as file, open(path, "rb") as raw:
+                np.lib.format.write_array_header_1_0(file, {
+                    "descr": np.lib.format.dtype_to_descr(np.dtype(dtype)), "fortran_order": False, "shape": shape})
+                shutil.copyfileobj(raw, file, 1 << 20)
+            os.remove(path)
+        with archive.open("removed.npy", "w", force_zip64=True) as file:
+            np.lib.format.write_array(file, np.flatnonzero(~matched))
+    summary = {
+        "previous": previous_path,
+        "scan": file_path,
+        "tolerance": tolerance,
+        "search_radius": search_radius,
+        "flags": {name: int(count) for name, count in zip(FLAG_NAMES, flag_counts)},
+        "removed": int(len(matched) - matched.sum()),
+    }
+    if column is not None:
+        summary["classes"], summary["agreement"] = compare_with_classes(class_counts, class_names)
+    with open(output_path + ".json", "w") as file:
+        json.dump(summary, file, indent=2)
+    return summary
@@ -0,0 +1,252 @@
+import numpy as np
+
+from .geometry import distance_to_polyline, path_cells
+
+# ---------------------------------------------------------------- #
+#                        OBJECT CHANGES
+# ---------------------------------------------------------------- #
+#
+# Planning of object changes between scans of a set. Objects only
+# need the attributes used by the functions (name, class_name,
+# hide_viewport, location, scale, children_recursive and for the
+# selection index matrix_world), so the functions work on Blender
+# objects as well as on stand-ins. Rotations are planned here and
+# applied by the add-on.
+#
+# ---------------------------------------------------------------- #
+
+
+def add_objects(settings, hidden_objects, rng, selection_index=None):
+    # adds new objects to scene by revealing a number of hidden objects in the viewport
+    # added objects are classified as "new", removed from hidden_objects list and
+    # appended to added_objects list which is the returned
+    amount = rng.integers(settings.add_objects_min, settings.add_objects_max + 1)
+    added_objects = []
+    # random access is achieved by shuffling the list and popping the last element(s)
+    prioritize_objects(hidden_objects, rng, selection_index)
+    for _ in range(amount):
+        obj = hidden_objects.pop()
+        obj.hide_viewport = False
+        for child in obj.children_recursive:
+            child.hide_viewport = False
+        obj.class_name = "new"
+        added_objects.append(obj)
+    return added_objects
+
+
+def remove_objects(settings, objects, rng):
+    # objects are classified as removed and moved to separate list, which is then returned
+    amount = rng.integers(settings.remove_objects_min, settings.remove_objects_max + 1)
+    removed_objects = []
+    for _ in range(amount):
+        obj = objects.pop()
+        obj.class_name = "removed"
+        removed_objects.append(obj)
+    return removed_objects
+
+
+def translate_objects(settings, objects, modified_objects, rng):
+    # moves random number (amount) of objects in a single random direction
+    amount = rng.integers(settings.translation_objects_min, settings.translation_objects_max + 1)
+    # list includes all axis as well as direction (positive and negative) along which an object can be moved
+    possible_translation = [
+        (settings.translation_negative_x, ("x", -1)),
+        (settings.translation_positive_x, ("x", 1)),
+        (settings.translation_negative_y, ("y", -1)),
+        (settings.translation_positive_y, ("y", 1)),
+        (settings.translation_negative_z, ("z", -1)),
+        (settings.translation_positive_z, ("z", 1)),
+    ]
+    # builds a list of all directions that are enabled in the settings along which an object can be moved
+    enabled_translation = [(axis, direction) for (setting, (axis, direction)) in possible_translation if setting]
+    for _ in range(amount):
+        obj = objects.pop()
+        obj.class_name = "moved"
+        modified_objects.append(obj)
+        axis, direction = rng.choice(enabled_translation)
+        value = rng.uniform(settings.translation_min, settings.translation_max) * int(direction)
+        # moving the object by making use of getattr and setattr for easier access to a specific axis
+        setattr(obj.location, axis, getattr(obj.location, axis) + value)
+
+
+def rotate_objects(settings, objects, modified_objects, rng, building_tags):
+    # plans the rotation of a number (amount) of objects along a single random axis/direction
+    # returns a list of (object, axis, degrees), the rotations are applied by the caller
+    amount = rng.integers(settings.rotation_objects_min, settings.rotation_objects_max + 1)
+    possible_rotations = [
+        (settings.rotation_negative_x, ("X", -1)),
+        (settings.rotation_positive_x, ("X", 1)),
+        (settings.rotation_negative_y, ("Y", -1)),
+        (settings.rotation_positive_y, ("Y", 1)),
+        (settings.rotation_negative_z, ("Z", -1)),
+        (settings.rotation_positive_z, ("Z", 1)),
+    ]
+    # list of all directions that are enabled in the settings
+    enabled_rotations = [(axis, direction) for (setting, (axis, direction)) in possible_rotations if setting]
+    rotations = []
+    for _ in range(amount):
+        obj = objects.pop()
+        obj.class_name = "rotated"
+        modified_objects.append(obj)
+        axis, direction = rng.choice(enabled_rotations)
+        degrees = rng.uniform(settings.rotation_min, settings.rotation_max) * int(direction)
+        # if object is a building the rotation is less pronounced but not entirely ignored
+        degrees = degrees * 0.1 if any(tag in obj.name for tag in building_tags) else degrees
+        rotations.append((obj, axis, degrees))
+    return rotations
+
+
+def scale_objects(settings, objects, modified_objects, rng):
+    # scales a number (amount) of objects either uniformly or along the axes enabled in the settings
+    amount = rng.integers(settings.scale_objects_min, settings.scale_objects_max + 1)
+    for _ in range(amount):
+        obj = objects.pop()
+        obj.class_name = "scaled"
+        modified_objects.append(obj)
+        value = rng.uniform(settings.scale_min, settings.scale_max)
+        if settings.scale_uniform:
+            scale = (value, value, value)
+        else:
+            x = value if settings.scale_x else 1.0
+            y = value if settings.scale_y else 1.0
+            z = value if settings.scale_z else 1.0
+            scale = (x, y, z)
+        obj.scale = [current * factor for current, factor in zip(obj.scale, scale)]
+
+
+def post_scan_cleanup(objects, hidden_objects, removed_objects, modified_objects, added_objects):
+    # resets object classifications, hides removed objects in viewport
+    # objects from modified and added objects lists are moved to objects list
+    # objects from removed objects list are moved to hidden objects list
+    for _ in range(len(removed_objects)):
+        obj = removed_objects.pop()
+        obj.class_name = "initial"
+        obj.hide_viewport = True
+        for child in obj.children_recursive:
+            child.hide_viewport = True
+        hidden_objects.append(obj)
+    for _ in range(len(modified_objects)):
+        obj = modified_objects.pop()
+        obj.class_name = "initial"
+        objects.append(obj)
+    for _ in range(len(added_objects)):
+        obj = added_objects.pop()
+        obj.class_name = "initial"
+        objects.append(obj)
+
+
+def build_hidden_object_collection(scan_settings, dataset_settings, objects, rng, selection_index=None):
+    # initial list of objects hidden from the city, these can later be added/revealed
+    hidden_objects = []
+    amount = dataset_settings.scans * scan_settings.add_objects_max
+    prioritize_objects(objects, rng, selection_index)
+    for i in range(amount):
+        obj = objects.pop()
+        hidden_objects.append(obj)
+        obj.hide_viewport = True
+        for child in obj.children_recursive:
+            child.hide_viewport = True
+    return hidden_objects
+
+
+def bound_scan_settings(scan_settings, dataset_settings, objects):
+    limit = int(len(objects) / (dataset_settings.scans * 3))
+    scan_settings.rotation_max = max(scan_settings.rotation_min, scan_settings.rotation_max)
+    scan_settings.rotation_objects_max = min(scan_settings.rotation_objects_max, limit)
+    scan_settings.rotation_objects_min = min(scan_settings.rotation_objects_min, scan_settings.rotation_objects_max)
+    scan_settings.translation_max = max(scan_settings.translation_min, scan_settings.translation_max)
+    scan_settings.translation_objects_max = min(scan_settings.translation_objects_max, limit)
+    scan_settings.translation_objects_min = min(
+        scan_settings.translation_objects_min,
+        scan_settings.translation_objects_max)
+    scan_settings.scale_max = max(scan_settings.scale_min, scan_settings.scale_max)
+    scan_settings.scale_objects_max = min(scan_settings.scale_objects_max, limit)
+    scan_settings.scale_objects_min = min(scan_settings.scale_objects_min, scan_settings.scale_objects_max)
+    scan_settings.add_objects_max = min(scan_settings.add_objects_max, limit)
+    scan_settings.add_objects_min = min(scan_settings.add_objects_min, scan_settings.add_objects_max)
+    scan_settings.remove_objects_max = min(scan_settings.remove_objects_max, limit)
+    scan_settings.remove_objects_min = min(scan_settings.remove_objects_min, scan_settings.remove_objects_max)
+
+
+def bound_city_settings(settings):
+    settings.block_max = max(settings.block_min, settings.block_max)
+
+# ------------------------------------- #
+#            Change Selection
+# ------------------------------------- #
+
+
+# lowest weight of 'WEIGHTED' selection, a tenth of the weight at the scanner range
+OUT_OF_RANGE_WEIGHT = 0.5 / 10
+
+
+def build_selection_index(objects, scan_range, mode):
+    # builds a uniform grid in the xy plane over the locations of all objects that can be modified
+    # the grid only depends on the objects, so it is kept for all scans of a set,
+    # while the distances to the scanner path are recomputed whenever the path changes
+    index = {
+        "cell_size": scan_range,
+        "scan_range": scan_range,
+        "mode": mode,
+        "cells": {},
+        "locations": {},
+        "polyline": None,
+        "distances": {},
+    }
+    for obj in objects:
+        insert_into_selection_index(index, obj)
+    return index
+
+
+def selection_cell(index, location):
+    x, y = np.floor(location[:2] / index["cell_size"])
+    return int(x), int(y)
+
+
+def insert_into_selection_index(index, obj):
+    location = np.array(obj.matrix_world.translation)
+    index["locations"][obj.name] = location
+    index["cells"].setdefault(selection_cell(index, location), {})[obj.name] = location
+
+
+def set_selection_path(index, polyline):
+    # only objects in grid cells close to the path receive a distance, all others are out of range
+    index["polyline"] = polyline
+    names = []
+    locations = []
+    for cell in path_cells(polyline, index["cell_size"], index["scan_range"]):
+        for name, location in index["cells"].get(cell, {}).items():
+            names.append(name)
+            locations.append(location)
+    distances = distance_to_polyline(np.array(locations).reshape(-1, 3), polyline)
+    index["distances"] = dict(zip(names, distances.tolist()))
+
+
+def update_selection_index(index, objects):
+    # moves translated objects to their new grid cells and updates their distance to the path
+    for obj in objects:
+        location = index["locations"][obj.name]
+        del index["cells"][selection_cell(index, location)][obj.name]
+        insert_into_selection_index(index, obj)
+        index["distances"][obj.name] = float(
+            distance_to_polyline(index["locations"][obj.name][None, :], index["polyline"])[0])
+
+
+def prioritize_objects(objects, rng, index):
+    # shuffles the list of objects and moves preferred objects to its end, where objects are popped from
+    # 'IN_RANGE' moves all objects within scanner range to the end, keeping the shuffled order otherwise
+    # objects out of range are only selected once all objects in range are used up
+    # 'WEIGHTED' orders objects by weighted random keys, i.e. objects closer to the path
+    # are more likely to be selected while any object can still be selected
+    rng.shuffle(objects)
+    if index is None:
+        return
+    distances = np.array([index["distances"].get(obj.name, np.inf) for obj in objects])
+    if index["mode"] == 'IN_RANGE':
+        keys = (distances <= index["scan_range"]).astype(float)
+    else:
+        # objects without a distance are out of range, they keep a finite weight so they can still be selected
+        weights = np.maximum(1.0 / (1.0 + (distances / index["scan_range"]) ** 2), OUT_OF_RANGE_WEIGHT)
+        keys = np.log(rng.random(len(objects))) / weights
+    order = np.argsort(keys, kind="stable")
+    objects[:] = [objects[i] for i in order]
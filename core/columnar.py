@@ -0,0 +1,138 @@
+import json
+import os
+import re
+from itertools import chain
+
+import numpy as np
+
+from .scan_files import read_scan_chunks, read_scan_header
+
+# ---------------------------------------------------------------- #
+#                        COLUMNAR SCANS
+# ---------------------------------------------------------------- #
+#
+# Binary columnar storage of all scans of a set. Each field (point
+# coordinates, class id, ...) is stored in a single little-endian
+# file per set, the scans of the set are appended one after another.
+# A json index per set records the layout of each field as well as
+# the offset and count of each scan, so single scans or subsets of
+# fields can be read as memory-mapped arrays without copying.
+#
+#   <base>.index.json
+#   <base>.<field>.bin
+#
+# ---------------------------------------------------------------- #
+
+INDEX_VERSION = 1
+
+# csv columns with these names hold integer values, all other columns are stored as float32
+INTEGER_FIELDS = {"class", "class_id", "classification", "label", "object_id", "instance", "instance_id", "id"}
+
+
+def field_name(column):
+    return re.sub(r"[^0-9a-z]+", "_", column.strip().lower()).strip("_")
+
+
+def field_layout(header, column_count):
+    # maps the csv columns to fields, the first three columns are stored together as "xyz"
+    names = [field_name(column) for column in header.split(",")] if header else []
+    names += ["field_" + str(i) for i in range(len(names), column_count)]
+    layout = {"xyz": {"dtype": "<f4", "columns": [0, 1, 2]}}
+    for i in range(3, column_count):
+        name = names[i] or "field_" + str(i)
+        layout[name] = {"dtype": "<i4" if name in INTEGER_FIELDS else "<f4", "columns": [i]}
+    return layout
+
+
+def index_path(base_path):
+    return base_path + ".index.json"
+
+
+def field_path(base_path, field):
+    return base_path + "." + field + ".bin"
+
+
+def load_index(base_path):
+    with open(index_path(base_path)) as file:
+        return json.load(file)
+
+
+def write_index(base_path, index):
+    # the index is replaced atomically, readers never see a partially written index
+    temporary_path = index_path(base_path) + ".tmp"
+    with open(temporary_path, "w") as file:
+        json.dump(index, file, indent=2)
+    os.replace(temporary_path, index_path(base_path))
+
+
+def create_set(base_path):
+    # removes the files of an existing set with the same base path and writes an empty index
+    if os.path.exists(index_path(base_path)):
+        for field in load_index(base_path)["fields"]:
+            if os.path.exists(field_path(base_path, field)):
+                os.remove(field_path(base_path, field))
+    write_index(base_path, {"version": INDEX_VERSION, "byte_order": "little", "fields": {}, "scans": []})
+
+
+def append_csv_scan(base_path, csv_path, scan_name, chunk_size=1000000):
+    # converts a csv scan chunk by chunk and appends it to the field files of the set
+    # the scan is only added to the index once all of its points have been written, scans whose
+    # columns differ from the fields of the set are rejected before anything is written
+    index = load_index(base_path)
+    offset = sum(scan["count"] for scan in index["scans"])
+    header = read_scan_header(csv_path)
+    chunks = read_scan_chunks(csv_path, chunk_size)
+    first = next(chunks, None)
+    # empty scans without a header have no known columns and are added to any set
+    if first is not None or header:
+        layout = field_layout(header, first.shape[1] if first is not None else len(header.split(",")))
+        if not index["fields"]:
+            index["fields"] = layout
+        elif layout != index["fields"]:
+            raise ValueError("Scan " + scan_name + " has the fields " + ", ".join(layout) +
+                             " instead of the fields of the set " + ", ".join(index["fields"]))
+    count = 0
+    files = {}
+    try:
+        for chunk in chain([first] if first is not None else [], chunks):
+            for field, layout in index["fields"].items():
+                if field not in files:
+                    files[field] = open(field_path(base_path, field), "ab")
+                values = chunk[:, layout["columns"]]
+                if layout["dtype"].startswith("<i"):
+                    values = np.rint(values)
+                files[field].write(np.ascontiguousarray(values, dtype=layout["dtype"]).tobytes())
+            count += len(chunk)
+    finally:
+        for file in files.values():
+            file.close()
+    index["scans"].append({"name": scan_name, "offset": offset, "count": count})
+    write_index(base_path, index)
+    return count
+
+
+def read_fields(base_path, scan=None, fields=None, index=None):
+    # returns memory-mapped arrays of the requested fields (all by default) of a single scan
+    # scans are selected by position or name, without a scan all points of the set are returned
+    index = index or load_index(base_path)
+    if scan is None:
+        offset = 0
+        count = sum(entry["count"] for entry in index["scans"])
+    else:
+        if isinstance(scan, str):
+            scan = [entry["name"] for entry in index["scans"]].index(scan)
+        offset = index["scans"][scan]["offset"]
+        count = index["scans"][scan]["count"]
+    arrays = {}
+    for field in fields or index["fields"]:
+        layout = index["fields"][field]
+        dtype = np.dtype(layout["dtype"])
+        components = len(layout["columns"])
+        if count == 0:
+            arrays[field] = np.zeros((0, components) if components > 1 else 0, dtype=dtype)
+            continue
+        arrays[field] = np.memmap(
+            field_path(base_path, field), dtype=dtype, mode="r",
+            offset=offset * components * dtype.itemsize,
+            shape=(count, components) if components > 1 else (count,))
+    return arrays
@@ -0,0 +1,170 @@
+import json
+import os
+
+import numpy as np
+
+from .scan_files import read_scan
+
+# ---------------------------------------------------------------- #
+#                         SCAN DELTAS
+# ---------------------------------------------------------------- #
+#
+# Delta storage of the scans of a set. Scans of the same path share
+# most of their points, as the scanner is deterministic and only a
+# few objects change between scans. Every K-th scan is stored in
+# full as a keyframe, all other scans as delta to their previous
+# scan:
+#
+#   runs        the points of the scan as runs of (source, length),
+#               copied from the previous scan starting at source,
+#               or taken from the added points for source -1
+#   added       points not contained in the previous scan
+#   removed     ranges (start, length) of points of the previous
+#               scan not contained in the scan
+#   objects     objects changed for the scan with their change
+#
+# Points are matched by all of their columns, i.e. points of
+# reclassified objects are removed and added again. Any scan is
+# restored from its closest previous keyframe, keyframes are .npy
+# files which are memory-mapped when loaded.
+#
+#   <base>.deltas.json              index of all scans of the set
+#   <scan>.keyframe.npy
+#   <scan>.delta.npz
+#
+# ---------------------------------------------------------------- #
+
+# multipliers used to hash the bit patterns of all columns of a point
+HASH_MULTIPLIERS = np.array([
+    0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93,
+    0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53, 0x94D049BB133111EB, 0xBF58476D1CE4E5B9,
+], dtype=np.uint64)
+
+
+def row_hashes(points):
+    bits = np.ascontiguousarray(points, dtype=np.float64).view(np.uint64)
+    multipliers = np.resize(HASH_MULTIPLIERS, points.shape[1])
+    with np.errstate(over="ignore"):
+        return (bits * multipliers).sum(axis=1, dtype=np.uint64)
+
+
+def match_points(previous, points):
+    # index of an identical point of the previous scan for each point, -1 if there is none
+    # identical points are matched in order of their occurrence, each previous point at most once
+    previous_hashes = row_hashes(previous)
+    hashes = row_hashes(points)
+    previous_order = np.argsort(previous_hashes, kind="stable")
+    sorted_hashes = previous_hashes[previous_order]
+    order = np.argsort(hashes, kind="stable")
+    hashes = hashes[order]
+    # rank of each point among points with the same hash
+    first = np.flatnonzero(np.concatenate([[True], hashes[1:] != hashes[:-1]]))[:len(hashes)]
+    ranks = np.arange(len(hashes)) - np.repeat(first, np.diff(np.concatenate([first, [len(hashes)]])))
+    candidates = np.searchsorted(sorted_hashes, hashes) + ranks
+    valid = candidates < len(sorted_hashes)
+    valid[valid] = sorted_hashes[candidates[valid]] == hashes[valid]
+    matches = np.full(len(points), -1, dtype=np.int64)
+    matches[order[valid]] = previous_order[candidates[valid]]
+    # hash collisions are treated as added points
+    identical = np.all(previous[matches[matches >= 0]] == points[matches >= 0], axis=1)
+    matches[np.flatnonzero(matches >= 0)[~identical]] = -1
+    return matches
+
+
+def encode_delta(previous, points):
+    # returns the runs, added points and removed ranges of points relative to previous
+    matches = match_points(previous, points)
+    added = matches < 0
+    # a run ends where copied points stop being consecutive or change between copied and added
+    continues = (added[1:] & added[:-1]) | (~added[1:] & ~added[:-1] & (matches[1:] == matches[:-1] + 1))
+    starts = np.flatnonzero(np.concatenate([[True], ~continues]))[:len(points)]
+    lengths = np.diff(np.concatenate([starts, [len(points)]]))
+    runs = np.stack([np.where(added[starts], -1, matches[starts]), lengths], axis=1)
+    unused = np.ones(len(previous), dtype=np.int8)
+    unused[matches[~added]] = 0
+    # edges alternate between the start and the end of ranges of unused points
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], unused, [0]]))).reshape(-1, 2)
+    removed = np.stack([edges[:, 0], edges[:, 1] - edges[:, 0]], axis=1)
+    return runs, points[added], removed
+
+
+def decode_delta(previous, runs, added):
+    # restores the points of a scan from the points of its previous scan
+    sources, lengths = runs[:, 0], runs[:, 1]
+    # position of each run within the added points, only advanced by runs of added points
+    added_starts = np.cumsum(np.where(sources < 0, lengths, 0)) - np.where(sources < 0, lengths, 0)
+    run_starts = np.where(sources < 0, len(previous) + added_starts, sources)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.concatenate([previous, added])[np.repeat(run_starts, lengths) + offsets]
+
+
+# ---------------------------------------------------------------- #
+#                              SETS
+# ---------------------------------------------------------------- #
+
+
+def index_path(base_path):
+    return base_path + ".deltas.json"
+
+
+def load_index(base_path):
+    with open(index_path(base_path)) as file:
+        return json.load(file)
+
+
+def write_index(base_path, index):
+    temporary_path = index_path(base_path) + ".tmp"
+    with open(temporary_path, "w") as file:
+        json.dump(index, file, indent=2)
+    os.replace(temporary_path, index_path(base_path))
+
+
+def create_set(base_path, keyframe_interval):
+    write_index(base_path, {"keyframe_interval": keyframe_interval, "header": None, "scans": []})
+
+
+def append_scan(base_path, csv_path, previous_csv_path, objects):
+    # stores a csv scan as keyframe or as delta to the previous csv scan, objects maps changed
+    # object names to their change, returns the number of points stored for the scan
+    index = load_index(base_path)
+    header, points = read_scan(csv_path)
+    scan_name = os.path.splitext(os.path.basename(csv_path))[0]
+    directory = os.path.dirname(base_path)
+    entry = {"name": scan_name, "count": len(points), "objects": objects}
+    if len(index["scans"]) % index["keyframe_interval"] == 0:
+        entry["file"] = scan_name + ".keyframe.npy"
+        np.save(os.path.join(directory, entry["file"]), points)
+        stored = len(points)
+    else:
+        _, previous = read_scan(previous_csv_path)
+        runs, added, removed = encode_delta(previous.reshape(-1, points.shape[1]), points)
+        entry["file"] = scan_name + ".delta.npz"
+        entry["added"] = len(added)
+        entry["removed"] = int(removed[:, 1].sum())
+        np.savez_compressed(os.path.join(directory, entry["file"]), runs=runs, added=added, removed=removed)
+        stored = len(added)
+    index["header"] = header
+    index["scans"].append(entry)
+    write_index(base_path, index)
+    return stored
+
+
+def read_scan_at(base_path, scan, index=None, cache=None):
+    # restores a scan by position or name from the closest previous keyframe, cache is an
+    # optional dict of restored scans by position which is used and filled while restoring
+    index = index or load_index(base_path)
+    if isinstance(scan, str):
+        scan = [entry["name"] for entry in index["scans"]].index(scan)
+    directory = os.path.dirname(base_path)
+    keyframe = scan - scan % index["keyframe_interval"]
+    position = max([i for i in (cache or {}) if keyframe <= i <= scan], default=keyframe)
+    if cache and position in cache:
+        points = cache[position]
+    else:
+        points = np.load(os.path.join(directory, index["scans"][keyframe]["file"]), mmap_mode="r")
+    for i in range(position + 1, scan + 1):
+        with np.load(os.path.join(directory, index["scans"][i]["file"])) as delta:
+            points = decode_delta(points, delta["runs"], delta["added"].reshape(-1, points.shape[1]))
+    if cache is not None:
+        cache[scan] = points
+    return points
@@ -0,0 +1,181 @@
+import numpy as np
+
+from .columnar import INTEGER_FIELDS, field_name
+from .scan_files import read_scan_chunks, read_scan_header, write_scan
+
+# ---------------------------------------------------------------- #
+#                         DOWNSAMPLING
+# ---------------------------------------------------------------- #
+#
+# Voxel grid downsampling of scans, keeping one point per occupied
+# voxel. Scans are read in chunks and each chunk is reduced into an
+# accumulator with one entry per occupied voxel, so memory depends
+# on the size of the output rather than the size of the scan.
+#
+#   CENTROID    the mean of all points of the voxel, label columns
+#               (class and object ids) are set by majority vote
+#   NEAREST     the point closest to the voxel center, all columns
+#               of the point are kept as they are
+#
+# With a point target, the voxel size is doubled until the output
+# holds at most that many points. Voxels are aligned to the world
+# origin, so voxels of twice the size are unions of 2x2x2 voxels
+# and the accumulator can be coarsened without reading the scan
+# again. For NEAREST the coarsened point is chosen among the points
+# kept for the smaller voxels.
+#
+# ---------------------------------------------------------------- #
+
+# voxel indices are packed into 21 bits per axis, shifted to be non-negative
+KEY_BITS = 21
+KEY_OFFSET = 1 << (KEY_BITS - 1)
+KEY_MASK = (1 << KEY_BITS) - 1
+
+
+def pack_keys(indices):
+    indices = (indices + KEY_OFFSET) & KEY_MASK
+    return (indices[:, 0] << (2 * KEY_BITS)) | (indices[:, 1] << KEY_BITS) | indices[:, 2]
+
+
+def unpack_keys(keys):
+    return np.stack([(keys >> (2 * KEY_BITS)) & KEY_MASK, (keys >> KEY_BITS) & KEY_MASK, keys & KEY_MASK], axis=1) \
+        - KEY_OFFSET
+
+
+def label_columns(header, column_count):
+    # columns holding ids are voted on rather than averaged, without a header only the fourth column
+    # is taken as class column as in statistics.class_column, all other columns are averaged
+    if not header:
+        return [3] if column_count > 3 else []
+    names = [field_name(column) for column in header.split(",")]
+    return [i for i in range(3, column_count) if i < len(names) and names[i] in INTEGER_FIELDS]
+
+
+def first_per_key(keys):
+    # index of the first entry of each run of equal keys in sorted keys
+    return np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+
+
+# ---------------------------------------------------------------- #
+#                           CENTROID
+# ---------------------------------------------------------------- #
+
+
+def reduce_centroids(keys, sums, counts, votes):
+    # sums points and counts per voxel, votes are (key, value, count) arrays per label column
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    starts = first_per_key(keys)
+    accumulator = {
+        "keys": keys[starts],
+        "sums": np.add.reduceat(sums[order], starts, axis=0) if len(keys) else sums,
+        "counts": np.add.reduceat(counts[order], starts) if len(keys) else counts,
+        "votes": {},
+    }
+    for column, (vote_keys, values, vote_counts) in votes.items():
+        order = np.lexsort((values, vote_keys))
+        vote_keys, values, vote_counts = vote_keys[order], values[order], vote_counts[order]
+        starts = np.flatnonzero(np.concatenate(
+            [[True], (vote_keys[1:] != vote_keys[:-1]) | (values[1:] != values[:-1])]))
+        accumulator["votes"][column] = (
+            vote_keys[starts], values[starts],
+            np.add.reduceat(vote_counts, starts) if len(vote_keys) else vote_counts)
+    return accumulator
+
+
+def merge_centroids(accumulator, keys, points, labels):
+    # adds the points of a chunk to the accumulator, labels are the column indices voted on
+    sums = np.delete(points, labels, axis=1)
+    counts = np.ones(len(points), dtype=np.int64)
+    votes = {column: (keys, np.rint(points[:, column]).astype(np.int64), counts) for column in labels}
+    if accumulator is not None:
+        keys = np.concatenate([accumulator["keys"], keys])
+        sums = np.concatenate([accumulator["sums"], sums])
+        counts = np.concatenate([accumulator["counts"], counts])
+        votes = {column: tuple(np.concatenate([previous, new]) for previous, new in
+                               zip(accumulator["votes"][column], votes[column])) for column in labels}
+    return reduce_centroids(keys, sums, counts, votes)
+
+
+def coarsen_centroids(accumulator):
+    keys = pack_keys(unpack_keys(accumulator["keys"]) // 2)
+    votes = {column: (pack_keys(unpack_keys(vote_keys) // 2), values, counts)
+             for column, (vote_keys, values, counts) in accumulator["votes"].items()}
+    return reduce_centroids(keys, accumulator["sums"], accumulator["counts"], votes)
+
+
+def centroid_points(accumulator, labels, column_count):
+    means = accumulator["sums"] / accumulator["counts"][:, None]
+    points = np.zeros((len(means), column_count))
+    points[:, [i for i in range(column_count) if i not in labels]] = means
+    for column, (vote_keys, values, counts) in accumulator["votes"].items():
+        # majority vote, ties are resolved towards the smallest value
+        order = np.lexsort((values, -counts, vote_keys))
+        vote_keys, values = vote_keys[order], values[order]
+        points[:, column] = values[first_per_key(vote_keys)]
+    return points
+
+
+# ---------------------------------------------------------------- #
+#                            NEAREST
+# ---------------------------------------------------------------- #
+
+
+def reduce_nearest(keys, points, voxel_size):
+    # keeps the point closest to the voxel center for each voxel
+    centers = (unpack_keys(keys) + 0.5) * voxel_size
+    distances = ((points[:, :3] - centers) ** 2).sum(axis=1)
+    order = np.lexsort((distances, keys))
+    keys = keys[order]
+    starts = first_per_key(keys)
+    return {"keys": keys[starts], "points": points[order][starts]}
+
+
+def merge_nearest(accumulator, keys, points, voxel_size):
+    if accumulator is not None:
+        keys = np.concatenate([accumulator["keys"], keys])
+        points = np.concatenate([accumulator["points"], points])
+    return reduce_nearest(keys, points, voxel_size)
+
+
+def coarsen_nearest(accumulator, voxel_size):
+    # voxel_size is the size of the coarsened voxels
+    return reduce_nearest(pack_keys(unpack_keys(accumulator["keys"]) // 2), accumulator["points"], voxel_size)
+
+
+# ---------------------------------------------------------------- #
+#                             SCANS
+# ---------------------------------------------------------------- #
+
+
+def downsample_scan(file_path, output_path, voxel_size, mode="CENTROID", target_points=0, chunk_size=1000000):
+    # writes the downsampled scan and returns the number of input and output points and the final voxel size
+    header = read_scan_header(file_path)
+    accumulator = None
+    labels = []
+    column_count = 3
+    input_points = 0
+    for chunk in read_scan_chunks(file_path, chunk_size):
+        if accumulator is None:
+            column_count = chunk.shape[1]
+            labels = label_columns(header, column_count)
+        keys = pack_keys(np.floor(chunk[:, :3] / voxel_size).astype(np.int64))
+        if mode == 'NEAREST':
+            accumulator = merge_nearest(accumulator, keys, chunk, voxel_size)
+        else:
+            accumulator = merge_centroids(accumulator, keys, chunk, labels)
+        input_points += len(chunk)
+        while target_points and len(accumulator["keys"]) > target_points:
+            voxel_size *= 2.0
+            if mode == 'NEAREST':
+                accumulator = coarsen_nearest(accumulator, voxel_size)
+            else:
+                accumulator = coarsen_centroids(accumulator)
+    if accumulator is None:
+        points = np.zeros((0, column_count))
+    elif mode == 'NEAREST':
+        points = accumulator["points"]
+    else:
+        points = centroid_points(accumulator, labels, column_count)
+    write_scan(output_path, header, points)
+    return input_points, len(points), voxel_size
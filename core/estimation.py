@@ -0,0 +1,129 @@
+import json
+import os
+
+# ---------------------------------------------------------------- #
+#                       CITY ESTIMATION
+# ---------------------------------------------------------------- #
+#
+# Estimates the number of objects, vertices, polygons and the memory
+# of a city before it is generated. The SceneCity layout places
+# blocks of districts separated by roads of a single cell, so the
+# number of road and district cells follows from the grid size and
+# the mean block size. District cells are assumed to be split evenly
+# among the districts.
+#
+# Objects, vertices and polygons per cell are calibrated for each
+# district (and the roads) from measurements of earlier builds, the
+# memory from the growth of the process during these builds. Before
+# any build is measured, one object per cell is assumed, with the
+# mean geometry of the asset objects sampled from the blend file.
+#
+#   <calibration file>      list of measured builds as json
+#
+# ---------------------------------------------------------------- #
+
+# memory of a city per vertex and per object used before any build is measured
+DEFAULT_BYTES_PER_VERTEX = 256
+DEFAULT_BYTES_PER_OBJECT = 4096
+
+
+def process_memory():
+    # resident memory of the process in bytes, None where it cannot be determined
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def layout_cells(dimension_x, dimension_y, block_min, block_max, road_factor=1.0):
+    # expected number of road and district cells, road_factor corrects the road cells from measured builds
+    block = (block_min + block_max) / 2
+    cells = dimension_x * dimension_y
+    road_cells = min(cells * (1.0 - (block / (block + 1)) ** 2) * road_factor, cells)
+    return road_cells, cells - road_cells
+
+
+def district_cells(road_cells, cells, districts):
+    # cells of the roads and of each district
+    counts = {"road": road_cells}
+    for district in districts:
+        counts[district] = (cells - road_cells) / max(len(districts), 1)
+    return counts
+
+
+def fit_rates(records, districts, asset_statistics):
+    # objects, vertices and polygons per cell of each district and the memory per vertex and object,
+    # districts without any measured build fall back to one object per cell with the mean asset geometry
+    rates = {"districts": {}, "calibrated": [], "road_factor": 1.0}
+    for district in ["road"] + list(districts):
+        measured = [record for record in records if district in record["objects"]]
+        cells = sum(district_cells(record["road_cells"], record["dimension_x"] * record["dimension_y"],
+                                   record["districts"])[district] for record in measured)
+        if cells > 0:
+            rates["districts"][district] = {
+                key: sum(record[key][district] for record in measured) / cells
+                for key in ("objects", "vertices", "polygons")}
+            rates["calibrated"].append(district)
+        else:
+            rates["districts"][district] = {
+                "objects": 1.0, "vertices": asset_statistics["vertices"], "polygons": asset_statistics["polygons"]}
+    predicted = sum(layout_cells(record["dimension_x"], record["dimension_y"], record["block_min"],
+                                 record["block_max"])[0] for record in records)
+    if predicted > 0:
+        rates["road_factor"] = sum(record["road_cells"] for record in records) / predicted
+    measured = [record for record in records if record.get("memory")]
+    objects = sum(sum(record["objects"].values()) for record in measured)
+    vertices = sum(sum(record["vertices"].values()) for record in measured)
+    if objects > 0:
+        # the measured memory is split between objects and vertices in the proportion of the defaults
+        default = objects * DEFAULT_BYTES_PER_OBJECT + vertices * DEFAULT_BYTES_PER_VERTEX
+        scale = sum(record["memory"] for record in measured) / max(default, 1)
+        rates["bytes_per_object"] = DEFAULT_BYTES_PER_OBJECT * scale
+        rates["bytes_per_vertex"] = DEFAULT_BYTES_PER_VERTEX * scale
+    else:
+        rates["bytes_per_object"] = DEFAULT_BYTES_PER_OBJECT
+        rates["bytes_per_vertex"] = DEFAULT_BYTES_PER_VERTEX
+    return rates
+
+
+def estimate_city(dimension_x, dimension_y, block_min, block_max, districts, rates):
+    road_cells, _ = layout_cells(dimension_x, dimension_y, block_min, block_max, rates["road_factor"])
+    estimate = {"cells": dimension_x * dimension_y, "road_cells": int(road_cells),
+                "objects": 0.0, "vertices": 0.0, "polygons": 0.0}
+    for district, cells in district_cells(road_cells, dimension_x * dimension_y, districts).items():
+        for key in ("objects", "vertices", "polygons"):
+            estimate[key] += cells * rates["districts"][district][key]
+    for key in ("objects", "vertices", "polygons"):
+        estimate[key] = int(estimate[key])
+    estimate["memory"] = int(estimate["objects"] * rates["bytes_per_object"]
+                             + estimate["vertices"] * rates["bytes_per_vertex"])
+    return estimate
+
+
+def split_tile_size(dimension_x, dimension_y, block_min, block_max, districts, rates, budget, neighbours):
+    # largest tile size for which the tiles loaded around a scanner path, i.e. a window of
+    # 2 * neighbours + 1 tiles on each axis, fit into the memory budget, None if no tile size fits
+    window = 2 * neighbours + 1
+    for tile_size in range(max(dimension_x, dimension_y), max(block_max + 1, 10) - 1, -1):
+        estimate = estimate_city(min(tile_size * window, dimension_x), min(tile_size * window, dimension_y),
+                                 block_min, block_max, districts, rates)
+        if estimate["memory"] <= budget:
+            return tile_size
+    return None
+
+
+def load_records(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as file:
+        return json.load(file)
+
+
+def append_record(path, record):
+    records = load_records(path)
+    records.append(record)
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "w") as file:
+        json.dump(records, file, indent=2)
+    os.replace(temporary_path, path)
@@ -0,0 +1,186 @@
+import numpy as np
+
+# ---------------------------------------------------------------- #
+#                           GEOMETRY
+# ---------------------------------------------------------------- #
+#
+# Geometric helpers for scanner paths and axis aligned bounding
+# volumes, used to find path segments and objects within scanner
+# range. Paths are given as polylines of world space points.
+#
+# ---------------------------------------------------------------- #
+
+
+def sample_segment(start, end, step):
+    # evenly spaced points along a straight segment including both end points
+    samples = int(np.ceil(np.linalg.norm(end - start) / step)) + 1
+    return start + np.linspace(0.0, 1.0, samples)[:, None] * (end - start)
+
+
+def sample_polyline(polyline, step):
+    return np.concatenate([sample_segment(start, end, step) for start, end in zip(polyline[:-1], polyline[1:])])
+
+
+def split_bounds(bounds):
+    # minimums and maximums as (n, 3) arrays of a list of (minimum, maximum) bounding boxes
+    minimums = np.array([minimum for minimum, _ in bounds], dtype=float).reshape(-1, 3)
+    maximums = np.array([maximum for _, maximum in bounds], dtype=float).reshape(-1, 3)
+    return minimums, maximums
+
+
+def distance_to_volumes(points, minimums, maximums):
+    # distance of each point to the closest of the given axis aligned boxes
+    # points is of shape (n, 3), minimums and maximums are of shape (m, 3)
+    lower = minimums[None, :, :] - points[:, None, :]
+    upper = points[:, None, :] - maximums[None, :, :]
+    outside = np.maximum(np.maximum(lower, upper), 0.0)
+    return np.sqrt((outside ** 2).sum(axis=2)).min(axis=1)
+
+
+def distance_to_polyline(points, polyline):
+    # distance of each point to the closest point on any segment of the polyline
+    starts = polyline[:-1]
+    directions = polyline[1:] - starts
+    lengths = np.maximum((directions ** 2).sum(axis=1), 1e-12)
+    offsets = points[:, None, :] - starts[None, :, :]
+    t = np.clip((offsets * directions[None, :, :]).sum(axis=2) / lengths, 0.0, 1.0)
+    closest = starts[None, :, :] + t[:, :, None] * directions[None, :, :]
+    return np.sqrt(((points[:, None, :] - closest) ** 2).sum(axis=2)).min(axis=1)
+
+
+def segments_in_range(polyline, minimums, maximums, scan_range):
+    # marks each segment of the polyline that comes within scanner range of any volume
+    # segments are sampled with a step size well below the scanner range, which keeps
+    # the error of the approximated distance small compared to the range itself
+    step = max(scan_range / 4, 0.25)
+    in_range = np.zeros(len(polyline) - 1, dtype=bool)
+    for i, (start, end) in enumerate(zip(polyline[:-1], polyline[1:])):
+        points = sample_segment(start, end, step)
+        in_range[i] = distance_to_volumes(points, minimums, maximums).min() <= scan_range
+    return in_range
+
+
+def segment_runs(in_range):
+    # combines consecutive segments into runs, returned as (first point, last point) index pairs
+    runs = []
+    start = None
+    for i, value in enumerate(in_range):
+        if value and start is None:
+            start = i
+        elif not value and start is not None:
+            runs.append((start, i))
+            start = None
+    if start is not None:
+        runs.append((start, len(in_range)))
+    return runs
+
+
+def points_in_volumes(points, minimums, maximums):
+    # boolean mask of all points inside any of the given axis aligned boxes
+    # points outside of the combined bounding box of all volumes are skipped early,
+    # which for few small volumes leaves only a fraction of the points to test
+    mask = np.zeros(len(points), dtype=bool)
+    if not len(minimums):
+        return mask
+    candidates = np.flatnonzero(np.all((points >= minimums.min(axis=0)) & (points <= maximums.max(axis=0)), axis=1))
+    candidate_points = points[candidates]
+    candidate_mask = np.zeros(len(candidates), dtype=bool)
+    for minimum, maximum in zip(minimums, maximums):
+        candidate_mask |= np.all((candidate_points >= minimum) & (candidate_points <= maximum), axis=1)
+    mask[candidates] = candidate_mask
+    return mask
+
+
+def points_in_shadows(points, positions, minimums, maximums, scan_range):
+    # boolean mask of all points whose line of sight from any scanner position within range passes through
+    # any of the given axis aligned boxes, i.e. points that a box hides or uncovers when it changes
+    # only points within range of a box can be in its shadow, as the box lies between the point and the position
+    mask = np.zeros(len(points), dtype=bool)
+    for minimum, maximum in zip(minimums, maximums):
+        candidates = np.flatnonzero(
+            distance_to_volumes(points, minimum[None, :], maximum[None, :]) <= scan_range)
+        box_positions = positions[distance_to_volumes(positions, minimum[None, :], maximum[None, :]) <= scan_range]
+        for position in box_positions:
+            candidates = candidates[~mask[candidates]]
+            targets = points[candidates]
+            in_range = ((targets - position) ** 2).sum(axis=1) <= scan_range ** 2
+            # slab test of the segments from the position to the points against the box
+            with np.errstate(divide='ignore', invalid='ignore'):
+                inverse = 1.0 / (targets - position)
+                near = (minimum - position) * inverse
+                far = (maximum - position) * inverse
+            enter = np.nan_to_num(np.minimum(near, far), nan=-np.inf).max(axis=1)
+            leave = np.nan_to_num(np.maximum(near, far), nan=np.inf).min(axis=1)
+            mask[candidates[in_range & (enter <= leave) & (leave >= 0.0) & (enter <= 1.0)]] = True
+    return mask
+
+
+def path_cells(polyline, cell_size, scan_range):
+    # returns all cells of a uniform grid in the xy plane within scan range of the path
+    # the result is conservative, cells slightly further away than the range may be included
+    step = cell_size / 2
+    samples = sample_polyline(polyline, step)
+    ring = int(np.ceil((scan_range + step / 2) / cell_size))
+    sample_cells = np.unique(np.floor(samples[:, :2] / cell_size).astype(np.int64), axis=0)
+    cells = set()
+    for x, y in sample_cells.tolist():
+        for offset_x in range(-ring, ring + 1):
+            for offset_y in range(-ring, ring + 1):
+                cells.add((x + offset_x, y + offset_y))
+    return cells
+
+
+# ------------------------------------- #
+#          Bounding Box Index
+# ------------------------------------- #
+
+
+def build_bounds_index(minimums, maximums, cell_size):
+    # builds a uniform grid in the xy plane over axis aligned bounding boxes
+    # each grid cell holds the indices of all boxes overlapping the cell
+    # with the cell size set to the scanner range only cells close to the path have to be queried
+    index = {
+        "cell_size": cell_size,
+        "minimums": np.array(minimums, dtype=float).reshape(-1, 3),
+        "maximums": np.array(maximums, dtype=float).reshape(-1, 3),
+        "cells": {},
+    }
+    for i in range(len(index["minimums"])):
+        for cell in bounds_cells(index, index["minimums"][i], index["maximums"][i]):
+            index["cells"].setdefault(cell, set()).add(i)
+    return index
+
+
+def bounds_cells(index, minimum, maximum):
+    cell_size = index["cell_size"]
+    x0, y0 = (int(value) for value in np.floor(minimum[:2] / cell_size))
+    x1, y1 = (int(value) for value in np.floor(maximum[:2] / cell_size))
+    return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+
+def insert_bounds_index(index, minimums, maximums):
+    # adds boxes to the index, they receive the indices following the boxes already in the index
+    first = len(index["minimums"])
+    index["minimums"] = np.concatenate([index["minimums"], np.array(minimums, dtype=float).reshape(-1, 3)])
+    index["maximums"] = np.concatenate([index["maximums"], np.array(maximums, dtype=float).reshape(-1, 3)])
+    for i in range(first, len(index["minimums"])):
+        for cell in bounds_cells(index, index["minimums"][i], index["maximums"][i]):
+            index["cells"].setdefault(cell, set()).add(i)
+
+
+def update_bounds_index(index, i, minimum, maximum):
+    # moves a box to the grid cells of its new bounds
+    for cell in bounds_cells(index, index["minimums"][i], index["maximums"][i]):
+        index["cells"][cell].discard(i)
+    index["minimums"][i] = minimum
+    index["maximums"][i] = maximum
+    for cell in bounds_cells(index, minimum, maximum):
+        index["cells"].setdefault(cell, set()).add(i)
+
+
+def query_bounds_index(index, polyline, scan_range):
+    # returns the indices of all boxes in grid cells within scan range of the path
+    in_range = set()
+    for cell in path_cells(polyline, index["cell_size"], scan_range):
+        in_range.update(index["cells"].get(cell, ()))
+    return in_range
@@ -0,0 +1,61 @@
+import hashlib
+
+import numpy as np
+
+# ---------------------------------------------------------------- #
+#                          MESH SHARING
+# ---------------------------------------------------------------- #
+#
+# SceneCity places full copies of its assets, so a city holds many
+# meshes with identical geometry. Meshes are identified by a
+# signature of their geometry, materials, UV layers and attributes,
+# objects with meshes of the same signature can share a single
+# mesh. Objects keep their own names, transforms, modifiers and
+# properties such as the class name.
+#
+# Buildify buildings are generated by a geometry nodes modifier on
+# their footprint mesh, which is evaluated whenever the scene is
+# updated. Buildings can be baked to static meshes instead, baked
+# meshes are cached by a key of the node group, the footprint and
+# all inputs of the modifier, so each combination (e.g. of floor
+# count and footprint) is only evaluated once across all cities.
+#
+# ---------------------------------------------------------------- #
+
+# vertex coordinates are compared at this precision, copies of the same asset match exactly
+COORDINATE_PRECISION = 1e-5
+
+
+def mesh_signature(coordinates, loop_vertices, loop_totals, material_indices, material_names, layers=()):
+    # digest of the vertex positions, the polygons with their materials, the material slots and
+    # further layers such as UV layers and attributes, given as (name, values) in any order
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.array([len(coordinates), len(loop_vertices), len(loop_totals)], dtype=np.int64).tobytes())
+    digest.update(np.rint(np.asarray(coordinates) / COORDINATE_PRECISION).astype(np.int64).tobytes())
+    digest.update(np.asarray(loop_vertices, dtype=np.int32).tobytes())
+    digest.update(np.asarray(loop_totals, dtype=np.int32).tobytes())
+    digest.update(np.asarray(material_indices, dtype=np.int32).tobytes())
+    digest.update(np.array([len(material_names)], dtype=np.int64).tobytes())
+    digest.update("\0".join(material_names).encode())
+    for name, values in sorted(layers, key=lambda layer: layer[0]):
+        values = np.asarray(values)
+        digest.update(("\0" + name + "\0" + values.dtype.str + "\0").encode())
+        digest.update(np.array([values.size], dtype=np.int64).tobytes())
+        digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+def group_duplicates(signatures):
+    # maps each name to the first name with the same signature, signatures maps names to signatures
+    canonical = {}
+    return {name: canonical.setdefault(signature, name) for name, signature in signatures.items()}
+
+
+def bake_key(node_group_name, footprint_signature, inputs):
+    # inputs maps modifier input identifiers to their values
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(node_group_name.encode())
+    digest.update(footprint_signature.encode())
+    for identifier in sorted(inputs):
+        digest.update(("\0" + identifier + "=" + repr(inputs[identifier])).encode())
+    return digest.hexdigest()
@@ -0,0 +1,256 @@
+import json
+import os
+
+import numpy as np
+
+from .scan_files import read_scan
+
+# ---------------------------------------------------------------- #
+#                          SCAN OCTREE
+# ---------------------------------------------------------------- #
+#
+# Octree index of a single scan for box and radius queries and
+# level of detail reads. Points are sorted by the Morton code of
+# their cell at the deepest level, so the points of every node are
+# a contiguous range of the sorted points. Nodes are split until
+# they hold at most leaf_size points, a query only visits nodes
+# overlapping the queried region and copies whole ranges of nodes
+# fully inside of it, its cost depends on the points returned
+# rather than the points of the scan.
+#
+# The index is stored next to the scan, both arrays are .npy files
+# which are memory-mapped when loaded:
+#
+#   <scan>.octree.json          bounding cube, depth and columns
+#   <scan>.octree.nodes.npy     nodes in breadth first order
+#   <scan>.octree.points.npy    all columns of the scan as float32,
+#                               sorted by Morton code
+#
+# ---------------------------------------------------------------- #
+
+MAX_DEPTH = 21
+
+NODE_DTYPE = np.dtype([
+    ("level", "<u1"),
+    # Morton code of the node cell at its level
+    ("code", "<u8"),
+    ("start", "<i8"),
+    ("count", "<i8"),
+    # index of the first child node, children are stored consecutively, -1 for leaves
+    ("first_child", "<i4"),
+    ("child_count", "<u1"),
+    # index of the point closest to the centroid of the node points, used for level of detail reads
+    ("representative", "<i8"),
+])
+
+
+def spread_bits(values):
+    # inserts two zero bits between each of the lower 21 bits
+    values = values.astype(np.uint64) & np.uint64(0x1FFFFF)
+    values = (values | values << np.uint64(32)) & np.uint64(0x1F00000000FFFF)
+    values = (values | values << np.uint64(16)) & np.uint64(0x1F0000FF0000FF)
+    values = (values | values << np.uint64(8)) & np.uint64(0x100F00F00F00F00F)
+    values = (values | values << np.uint64(4)) & np.uint64(0x10C30C30C30C30C3)
+    values = (values | values << np.uint64(2)) & np.uint64(0x1249249249249249)
+    return values
+
+
+def morton_codes(cells):
+    return spread_bits(cells[:, 0]) << np.uint64(2) | spread_bits(cells[:, 1]) << np.uint64(1) | spread_bits(cells[:, 2])
+
+
+def bounding_cube(points):
+    # slightly enlarged so points on the maximum faces fall into the last cell
+    minimum = points.min(axis=0) if len(points) else np.zeros(3)
+    maximum = points.max(axis=0) if len(points) else np.ones(3)
+    size = max(float((maximum - minimum).max()), 1e-6) * (1.0 + 1e-6)
+    return minimum, size
+
+
+def segment_representatives(points, starts, counts):
+    # index of the point closest to the centroid of each segment of points, below the root the segments
+    # leave gaps where leaves were not split, so only the points of the segments are gathered
+    offsets = np.cumsum(counts) - counts
+    index = np.arange(counts.sum()) + np.repeat(starts - offsets, counts)
+    segment_points = points[index]
+    centroids = np.add.reduceat(segment_points, offsets, axis=0) / counts[:, None]
+    distances = ((segment_points - np.repeat(centroids, counts, axis=0)) ** 2).sum(axis=1)
+    closest = np.minimum.reduceat(distances, offsets)
+    candidates = np.flatnonzero(distances == np.repeat(closest, counts))
+    return index[candidates[np.searchsorted(candidates, offsets)]]
+
+
+def build_octree(points, leaf_size=4096, max_depth=16):
+    # returns the metadata, the nodes and the order which sorts the points by Morton code
+    max_depth = min(max_depth, MAX_DEPTH)
+    origin, size = bounding_cube(points)
+    cells = np.floor((points - origin) / size * (1 << max_depth)).astype(np.int64)
+    codes = morton_codes(np.clip(cells, 0, (1 << max_depth) - 1))
+    order = np.argsort(codes, kind="stable")
+    codes = codes[order]
+    points = points[order]
+
+    levels = []
+    starts = np.zeros(1, dtype=np.int64)
+    counts = np.array([len(points)], dtype=np.int64)
+    parents = np.full(1, -1, dtype=np.int64)
+    level = 0
+    while len(starts):
+        prefixes = codes[starts] >> np.uint64(3 * (max_depth - level)) if len(points) else np.zeros(1, np.uint64)
+        representatives = (segment_representatives(points, starts, counts) if len(points)
+                           else np.zeros(len(starts), dtype=np.int64))
+        levels.append((level, prefixes, starts, counts, parents, representatives))
+        split = (counts > leaf_size) & (level < max_depth)
+        if not split.any():
+            break
+        # cells of the next level are nested in the cells of this level, so the
+        # cells within split nodes are the cells starting at points of split nodes
+        boundaries = np.zeros(len(points) + 1, dtype=np.int64)
+        np.add.at(boundaries, starts[split], 1)
+        np.add.at(boundaries, starts[split] + counts[split], -1)
+        in_split = np.cumsum(boundaries[:-1]) > 0
+        cell_prefixes = codes >> np.uint64(3 * (max_depth - level - 1))
+        cell_starts = np.flatnonzero(np.concatenate([[True], cell_prefixes[1:] != cell_prefixes[:-1]]))
+        cell_counts = np.diff(np.concatenate([cell_starts, [len(points)]]))
+        keep = in_split[cell_starts]
+        parents = np.searchsorted(starts, cell_starts[keep], side="right") - 1
+        starts = cell_starts[keep]
+        counts = cell_counts[keep]
+        level += 1
+
+    node_count = sum(len(entry[2]) for entry in levels)
+    nodes = np.zeros(node_count, dtype=NODE_DTYPE)
+    offset = 0
+    previous_offset = 0
+    for level, prefixes, starts, counts, parents, representatives in levels:
+        span = slice(offset, offset + len(starts))
+        nodes["level"][span] = level
+        nodes["code"][span] = prefixes
+        nodes["start"][span] = starts
+        nodes["count"][span] = counts
+        nodes["first_child"][span] = -1
+        nodes["representative"][span] = representatives
+        if level > 0:
+            # parents are given as index within the previous level
+            parent_nodes = previous_offset + parents
+            unique_parents, first, child_counts = np.unique(parent_nodes, return_index=True, return_counts=True)
+            nodes["first_child"][unique_parents] = offset + first
+            nodes["child_count"][unique_parents] = child_counts
+        previous_offset = offset
+        offset += len(starts)
+
+    meta = {"origin": [float(value) for value in origin], "size": size, "depth": max_depth,
+            "leaf_size": leaf_size, "count": len(points)}
+    return meta, nodes, order
+
+
+def index_paths(scan_path):
+    base_path = os.path.splitext(scan_path)[0] + ".octree"
+    return base_path + ".json", base_path + ".nodes.npy", base_path + ".points.npy"
+
+
+def write_scan_index(scan_path, leaf_size=4096, max_depth=16):
+    # builds and writes the octree of a csv scan, the scan is read into memory entirely
+    header, points = read_scan(scan_path)
+    # the octree is built from the stored float32 coordinates, so queries match the stored points exactly
+    points = points.astype(np.float32)
+    meta, nodes, order = build_octree(points[:, :3].astype(np.float64), leaf_size, max_depth)
+    meta["columns"] = header.split(",") if header else []
+    meta_path, nodes_path, points_path = index_paths(scan_path)
+    np.save(nodes_path, nodes)
+    np.save(points_path, points[order])
+    # the metadata is written last, an index without metadata is incomplete
+    with open(meta_path, "w") as file:
+        json.dump(meta, file, indent=2)
+    return meta
+
+
+def load_scan_index(scan_path):
+    meta_path, nodes_path, points_path = index_paths(scan_path)
+    with open(meta_path) as file:
+        octree = json.load(file)
+    octree["origin"] = np.array(octree["origin"])
+    octree["nodes"] = np.load(nodes_path, mmap_mode="r")
+    octree["points"] = np.load(points_path, mmap_mode="r")
+    return octree
+
+
+# ---------------------------------------------------------------- #
+#                            QUERIES
+# ---------------------------------------------------------------- #
+
+
+def node_bounds(octree, node):
+    # minimum and maximum corner of the cell of a node
+    level = int(node["level"])
+    code = int(node["code"])
+    cell = [0, 0, 0]
+    for bit in range(level):
+        for axis in range(3):
+            cell[axis] |= ((code >> (3 * bit + 2 - axis)) & 1) << bit
+    cell_size = octree["size"] / (1 << level)
+    minimum = octree["origin"] + np.array(cell) * cell_size
+    return minimum, minimum + cell_size
+
+
+def query(octree, overlaps, contains, selects):
+    # generic traversal, overlaps and contains test node cells, selects filters the points of partially covered leaves
+    nodes = octree["nodes"]
+    points = octree["points"]
+    if not len(nodes) or not octree["count"]:
+        return np.zeros((0, points.shape[1]), dtype=points.dtype)
+    results = []
+    stack = [0]
+    while stack:
+        node = nodes[stack.pop()]
+        minimum, maximum = node_bounds(octree, node)
+        if not overlaps(minimum, maximum):
+            continue
+        start, count = int(node["start"]), int(node["count"])
+        if contains(minimum, maximum):
+            results.append(points[start:start + count])
+        elif node["first_child"] < 0:
+            leaf_points = points[start:start + count]
+            results.append(leaf_points[selects(leaf_points[:, :3])])
+        else:
+            first = int(node["first_child"])
+            stack.extend(range(first, first + int(node["child_count"])))
+    if not results:
+        return np.zeros((0, points.shape[1]), dtype=points.dtype)
+    return np.concatenate(results)
+
+
+def query_box(octree, minimum, maximum):
+    # all points (with all columns) inside the axis aligned box
+    minimum = np.asarray(minimum, dtype=float)
+    maximum = np.asarray(maximum, dtype=float)
+    return query(
+        octree,
+        lambda lower, upper: np.all(lower <= maximum) and np.all(upper >= minimum),
+        lambda lower, upper: np.all(lower >= minimum) and np.all(upper <= maximum),
+        lambda points: np.all((points >= minimum) & (points <= maximum), axis=1))
+
+
+def query_radius(octree, center, radius):
+    # all points (with all columns) within radius of the center
+    center = np.asarray(center, dtype=float)
+
+    def overlaps(lower, upper):
+        return np.sum((np.clip(center, lower, upper) - center) ** 2) <= radius ** 2
+
+    def contains(lower, upper):
+        farthest = np.maximum(np.abs(lower - center), np.abs(upper - center))
+        return np.sum(farthest ** 2) <= radius ** 2
+
+    return query(octree, overlaps, contains, lambda points: np.sum((points - center) ** 2, axis=1) <= radius ** 2)
+
+
+def read_level(octree, level):
+    # level of detail read with about one point per occupied cell of the given level
+    # nodes at the level contribute their representative point, leaves above it all of their points
+    nodes = octree["nodes"]
+    points = octree["points"]
+    selected = nodes[nodes["level"] == level]["representative"]
+    leaves = nodes[(nodes["level"] < level) & (nodes["first_child"] < 0)]
+    ranges = [np.arange(start, start + count) for start, count in zip(leaves["start"], leaves["count"])]
+    return points[np.sort(np.concatenate([selected] + ranges).astype(np.int64))]
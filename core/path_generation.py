@@ -0,0 +1,339 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .geometry import distance_to_polyline
+
+# ---------------------------------------------------------------- #
+#                        PATH GENERATION
+# ---------------------------------------------------------------- #
+#
+# Road grid and road graph construction from the SceneCity grid,
+# and generation of scanner paths through the road graph. Paths
+# are lists of graph nodes, which are converted to scanner path
+# curves by the add-on.
+#
+# ---------------------------------------------------------------- #
+
+
+def build_road_grid(dimension_x, dimension_y, city_grid):
+    # traverses scenecity grid and creates grid containing all road portions without districts
+    road_grid = [[None for y in range(dimension_y)] for x in range(dimension_x)]
+    for x in range(dimension_x):
+        for y in range(dimension_y):
+            try:
+                # since scenecity denotes roads and districts differently in its grid
+                # the try-except block makes use of an exception to detect road portions
+                city_grid.data[x][y]["road"]
+                road_grid[x][y] = {"location": (x,y)}
+            except Exception:
+                road_grid[x][y] = None
+    return road_grid
+
+
+def build_graph(dimension_x, dimension_y, road_grid, road_locations):
+    # builds the initial graph from the road_grid
+    # road_locations contains the world location (x, y) of each street object
+    graph = {}
+    node = 0
+    for location_x, location_y in road_locations:
+        # checks each street object itself instead of traversing the entire grid
+        # index in grid correspond to the objects world location offset by the cities dimensions
+        obj_x = int(location_x + float(dimension_x / 2))
+        obj_y = int(location_y + float(dimension_y / 2))
+        road_grid[obj_x][obj_y]["neighbours"] = []
+        neighbours = 0
+        for x, y in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
+            # checks adjacent cells if they contain a road portion,
+            # if so the direction is marked as containing a neighbor
+            # since bool operators short circuit, e.g. (x and y) => if x == False
+            # then x else y, there should be no error here
+            if (0 <= obj_x + x < dimension_x and 0 <= obj_y + y < dimension_y and road_grid[obj_x + x][obj_y + y]):
+                neighbours += 1
+                road_grid[obj_x][obj_y]["neighbours"].append((x, y))
+        if neighbours != 2:
+            # if a road portion only has exactly two neighbors it is a straight road portion that is of no interest
+            # otherwise it is either a crossroad or a road portion at the edge of the city
+            # the road portion is then either classified as a node or a leaf respectively
+            type = "node" if neighbours > 2 else "leaf"
+            graph[str(node)] = {"location": (obj_x, obj_y), "type": type, "adjacent_nodes": [], "adjacent_leaves": []}
+            road_grid[obj_x][obj_y]["node"] = str(node)
+            road_grid[obj_x][obj_y]["type"] = type
+            node += 1
+        else:
+            road_grid[obj_x][obj_y]["type"] = "straight"
+    build_adjacency(graph, road_grid)
+    return graph
+
+
+def build_adjacency(graph, road_grid):
+    # Builds adjacency lists for each graph node.
+    # road_grid saves directions where neighboring nodes are found
+    # these directions are traversed until a node is encountered
+    for _, data in graph.items():
+        node_x, node_y = data["location"]
+        neighbours = road_grid[node_x][node_y]["neighbours"]
+        for offset_x, offset_y in neighbours:
+            x = offset_x
+            y = offset_y
+            while road_grid[node_x + x][node_y + y]["type"] == "straight":
+                x += offset_x
+                y += offset_y
+            if road_grid[node_x + x][node_y + y]["type"] == "node":
+                data["adjacent_nodes"].append(road_grid[node_x + x][node_y + y]["node"])
+            elif road_grid[node_x + x][node_y + y]["type"] == "leaf":
+                data["adjacent_leaves"].append(road_grid[node_x + x][node_y + y]["node"])
+
+
+def generate_paths(graph, settings, path_seed=None):
+    # generates path(s) from road graph using the method selected in the scanner settings
+    # path_seed replaces the path seed of the settings, e.g. for additional trajectories
+    rng = np.random.default_rng(settings.path_seed if path_seed is None else path_seed)
+    nodes = [node for node, _ in graph.items()]
+    node = rng.choice(nodes)
+    while graph[node]["type"] == "node":
+        # makes sure the starting node is a leaf, i.e. a road portion at the edge of the city
+        node = rng.choice(nodes)
+    return paths_from_node(graph, node, settings.path_method, settings.path_multiple_amount,
+                           settings.path_neighbor_amount, rng)
+
+
+def paths_from_node(graph, node, mode, multiple_amount, neighbor_amount, rng):
+    # generates path(s) starting in the given node using the given path generation method
+    paths = []
+
+    def step(node, path):
+        # step function used to find all paths starting in specified node
+        # currently not advised to be used as it is exponential in terms of time complexity
+        # and seems to suffer some issues with multi-threading
+        # currently still included for reference
+        no_neighbours = True
+        for neighbour in graph[node]["adjacent_nodes"]:
+            if neighbour not in path:
+                step(neighbour, path + [node])
+                no_neighbours = False
+        if no_neighbours and graph[node]["adjacent_leaves"]:
+            for leaf in graph[node]["adjacent_leaves"]:
+                paths.append(path + [node, leaf])
+        else:
+            paths.append(path + [node])
+
+    def step_limited(node, path, limit):
+        # limited step function which only traverses a set number of neighboring nodes
+        neighbors = [neighbor for neighbor in graph[node]["adjacent_nodes"] if neighbor not in path]
+        leaves = [leaf for leaf in graph[node]["adjacent_leaves"] if leaf not in path]
+        rng.shuffle(neighbors)
+        if neighbors:
+            for _ in range(limit):
+                if neighbors:
+                    neighbor = neighbors.pop()
+                    step_limited(neighbor, path + [node], limit)
+        elif leaves:
+            paths.append(path + [node, rng.choice(leaves)])
+        else:
+            paths.append(path + [node])
+
+    def dfs(node):
+        # depth first search through graph
+        # can generate relatively long winding paths through the city
+        visited = []
+        visited.append(node)
+        stack = deque()
+
+        def step_dfs(node, path):
+            visited.append(node)
+            neighbors = [neighbor for neighbor in graph[node]["adjacent_nodes"] if neighbor not in visited]
+            rng.shuffle(neighbors)
+            leaves = [leaf for leaf in graph[node]["adjacent_leaves"] if leaf not in visited]
+            for neighbor in neighbors:
+                stack.append((neighbor, path + [node]))
+            for leaf in leaves:
+                paths.append(path + [node, leaf])
+        
+        neighbors = graph[node]["adjacent_nodes"]
+        leaves = graph[node]["adjacent_leaves"]
+        if neighbors:
+            stack.append((neighbors[0], [node]))
+        elif leaves:
+            stack.append((leaves[0], [node]))
+        while stack:
+            node, path = stack.pop()
+            if node not in visited:
+                step_dfs(node, path)
+
+    def bfs(node):
+        # breadth first search through the graph
+        # can generate relatively straight paths from one edge of the city to another
+        visited = []
+        visited.append(node)
+        queue = deque()
+
+        def step_bfs(node, path):
+            visited.append(node)
+            neighbors = [neighbor for neighbor in graph[node]["adjacent_nodes"] if neighbor not in visited]
+            rng.shuffle(neighbors)
+            leaves = [leaf for leaf in graph[node]["adjacent_leaves"] if leaf not in visited]
+            for neighbor in neighbors:
+                queue.append((neighbor, path + [node]))
+            for leaf in leaves:
+                paths.append(path + [node, leaf])
+
+        neighbors = graph[node]["adjacent_nodes"]
+        leaves = graph[node]["adjacent_leaves"]
+        if neighbors:
+            queue.append((neighbors[0], [node]))
+        elif leaves:
+            queue.append((leaves[0], [node]))
+        while queue:
+            node, path = queue.popleft()
+            if node not in visited:
+                step_bfs(node, path)
+
+    if mode == 'MULTIPLE':
+        for _ in range(multiple_amount):
+            step_limited(node, [], 1)
+    elif mode == 'NEIGHBORS_FROM_NODE':
+        step_limited(node, [], neighbor_amount)
+    elif mode == 'ALL_FROM_NODE':
+        step(node, [])
+    elif mode == 'DFS':
+        dfs(node)
+    elif mode == 'BFS':
+        bfs(node)
+    else:
+        step_limited(node, [], 1)
+    return paths
+
+
+def select_path(paths, path_selection, path_seed):
+    # selects one of the generated paths, either randomly or the longest path
+    rng = np.random.default_rng(path_seed)
+    if path_selection == 'RANDOM':
+        rng.shuffle(paths)
+        return paths[0]
+    return max(paths, key=len)
+
+# ------------------------------------- #
+#           Multi-start Search
+# ------------------------------------- #
+#
+# Runs the path generation method from many start leaves and keeps
+# the path with the best score of an objective. Each start uses a
+# generator seeded with the path seed and the start node, so the
+# result does not depend on the number of processes. Objectives take
+# the graph, a path and the objective data and return a score, new
+# objectives are added to OBJECTIVES (worker processes only see
+# objectives defined when this module is imported).
+
+
+def path_segments(graph, path):
+    locations = np.array([graph[node]["location"] for node in path], dtype=float).reshape(-1, 2)
+    return locations, np.diff(locations, axis=0)
+
+
+def path_length(graph, path, data=None):
+    # length of the path in cells, nodes are connected by straight roads
+    _, segments = path_segments(graph, path)
+    return float(np.abs(segments).sum())
+
+
+def path_streets(graph, path, data=None):
+    # number of distinct streets, i.e. rows and columns of the grid the path drives along
+    locations, segments = path_segments(graph, path)
+    streets = {("x", locations[i, 1]) if segments[i, 0] else ("y", locations[i, 0])
+               for i in range(len(segments)) if segments[i].any()}
+    return float(len(streets))
+
+
+def path_turns(graph, path):
+    _, segments = path_segments(graph, path)
+    directions = np.sign(segments[np.abs(segments).sum(axis=1) > 0])
+    return int(np.count_nonzero(np.any(directions[1:] != directions[:-1], axis=1)))
+
+
+def path_straightness(graph, path, data=None):
+    # length of the path divided among its straight stretches, long paths with few turns score highest
+    return path_length(graph, path) / (1 + path_turns(graph, path))
+
+
+def segment_objects(objects, start, end, scan_range):
+    # indices of the objects within range of a straight segment
+    segment = np.array([start, end], dtype=float)
+    found = []
+    for first in range(0, len(objects), 4096):
+        distances = distance_to_polyline(objects[first:first + 4096], segment)
+        found.append(first + np.flatnonzero(distances <= scan_range))
+    return np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+
+
+def path_objects(graph, path, data):
+    # number of distinct objects within range of the path, data holds "locations" (n, 2) of the objects
+    # in grid coordinates and the "range" in cells, objects in range of each segment are cached in data
+    # under "segments" if present, since paths from the same start share most of their segments
+    objects = np.asarray(data["locations"], dtype=float).reshape(-1, 2)
+    cache = data.get("segments", {})
+    found = []
+    # a path of a single node is treated as a segment of length zero
+    for start, end in list(zip(path[:-1], path[1:])) or [(path[0], path[0])]:
+        if (start, end) not in cache:
+            cache[(start, end)] = segment_objects(
+                objects, graph[start]["location"], graph[end]["location"], data["range"])
+        found.append(cache[(start, end)])
+    return float(len(np.unique(np.concatenate(found))))
+
+
+OBJECTIVES = {
+    'NODES': lambda graph, path, data: float(len(path)),
+    'LENGTH': path_length,
+    'STREETS': path_streets,
+    'STRAIGHT': path_straightness,
+    'OBJECTS': path_objects,
+}
+
+# graph and settings of the search within each worker process, set once when the worker starts
+_search = {}
+
+
+def _start_search(graph, method, objective, data):
+    _search.update({"graph": graph, "method": method, "objective": objective, "data": dict(data or {}, segments={})})
+
+
+def _search_from(start, seed):
+    # best path and its score of all paths generated from a single start node,
+    # -inf and None for start nodes without paths
+    graph = _search["graph"]
+    mode, multiple_amount, neighbor_amount = _search["method"]
+    paths = paths_from_node(graph, start, mode, multiple_amount, neighbor_amount, np.random.default_rng(seed))
+    objective = OBJECTIVES[_search["objective"]]
+    scores = [objective(graph, path, _search["data"]) for path in paths]
+    if not scores:
+        return -np.inf, None
+    best = int(np.argmax(scores))
+    return scores[best], paths[best]
+
+
+def search_paths(graph, method, path_seed, starts, objective, data=None, processes=0):
+    # runs the path generation method (mode, multiple amount, neighbor amount) from up to starts
+    # leaves, returns the path with the best score and its score, ties are won by earlier starts,
+    # starts without paths are skipped and None and -inf are returned if no start has a path
+    # with no processes all starts are searched within the calling process, with processes
+    # this is called from Blender through standalone.run
+    leaves = sorted((node for node, data in graph.items() if data["type"] != "node"), key=int)
+    rng = np.random.default_rng(path_seed)
+    chosen = [leaves[i] for i in rng.permutation(len(leaves))[:starts]]
+    seeds = [(path_seed, int(start)) for start in chosen]
+    if processes:
+        chunk_size = max(len(chosen) // (processes * 4), 1)
+        with ProcessPoolExecutor(processes, initializer=_start_search,
+                                 initargs=(graph, method, objective, data)) as executor:
+            results = list(executor.map(_search_from, chosen, seeds, chunksize=chunk_size))
+    else:
+        _start_search(graph, method, objective, data)
+        results = [_search_from(start, seed) for start, seed in zip(chosen, seeds)]
+        _search.clear()
+    found = [i for i, (_, path) in enumerate(results) if path is not None]
+    if not found:
+        return None, -np.inf
+    best = max(found, key=lambda i: (results[i][0], -i))
+    return results[best][1], results[best][0]
@@ -0,0 +1,181 @@
+import gzip
+import os
+import queue
+import shutil
+import threading
+
+from . import blocks, change_detection, columnar, deltas, downsampling, octree, statistics, tracing
+
+# ---------------------------------------------------------------- #
+#                        POST-PROCESSING
+# ---------------------------------------------------------------- #
+#
+# Background workers for finished scans, so compression and binary
+# conversion of one scan overlap with the object changes and the
+# render of the next scan. Each worker thread has its own bounded
+# queue, submitting to a full queue blocks until the worker catches
+# up (back-pressure), which bounds the number of scans waiting on
+# disk. Tasks submitted with the same key always run on the same
+# worker in order of submission, e.g. appends to the binary files
+# of a set, other tasks are distributed round robin.
+#
+# Threads are used rather than processes, since worker processes
+# would start another Blender instance. Compression and file I/O
+# release the GIL for most of their runtime.
+#
+# ---------------------------------------------------------------- #
+
+# marks the end of the tasks of a worker queue
+_STOP = None
+
+
+def _work(tasks, errors):
+    while True:
+        task = tasks.get()
+        if task is _STOP:
+            return
+        function, args = task
+        try:
+            function(*args)
+        except Exception as exception:
+            errors.append(exception)
+
+
+def start_pool(workers, queue_depth):
+    # with no workers, tasks are executed immediately when submitted
+    pool = {"queues": [], "threads": [], "errors": [], "next": 0}
+    for _ in range(workers):
+        tasks = queue.Queue(maxsize=max(queue_depth, 1))
+        thread = threading.Thread(target=_work, args=(tasks, pool["errors"]), daemon=True)
+        thread.start()
+        pool["queues"].append(tasks)
+        pool["threads"].append(thread)
+    return pool
+
+
+def submit(pool, key, function, *args):
+    # blocks while the queue of the selected worker is full, errors of earlier tasks are raised here
+    raise_errors(pool)
+    if not pool["queues"]:
+        function(*args)
+        return
+    if key is None:
+        worker = pool["next"] % len(pool["queues"])
+        pool["next"] += 1
+    else:
+        worker = sum(key.encode()) % len(pool["queues"])
+    tasks = pool["queues"][worker]
+    if tasks.full():
+        with tracing.span("post_processing.wait"):
+            tasks.put((function, args))
+    else:
+        tasks.put((function, args))
+
+
+def finish_pool(pool):
+    # waits until all submitted tasks are done and stops the workers
+    for tasks in pool["queues"]:
+        tasks.put(_STOP)
+    for thread in pool["threads"]:
+        thread.join()
+    pool["queues"] = []
+    pool["threads"] = []
+    raise_errors(pool)
+
+
+def close_pool(pool):
+    # stops the workers of a set that failed or was closed early, tasks not yet started are dropped
+    # and errors of finished tasks are discarded
+    for tasks in pool["queues"]:
+        while True:
+            try:
+                tasks.get_nowait()
+            except queue.Empty:
+                break
+        tasks.put(_STOP)
+    for thread in pool["threads"]:
+        thread.join()
+    pool["queues"] = []
+    pool["threads"] = []
+    pool["errors"].clear()
+
+
+def raise_errors(pool):
+    if pool["errors"]:
+        raise pool["errors"].pop(0)
+
+
+# ---------------------------------------------------------------- #
+#                             TASKS
+# ---------------------------------------------------------------- #
+
+
+def run_tasks(tasks):
+    # runs dependent tasks of a scan in order as a single task, tasks are (function, args)
+    for function, args in tasks:
+        function(*args)
+
+
+def compress_scan(csv_path, compression_level=6):
+    # writes <scan>.csv.gz next to the csv scan, the csv itself is kept
+    with tracing.span("post_processing.compress") as span:
+        temporary_path = csv_path + ".gz.tmp"
+        with open(csv_path, "rb") as source, gzip.open(temporary_path, "wb", compresslevel=compression_level) as target:
+            shutil.copyfileobj(source, target, 1 << 20)
+        os.replace(temporary_path, csv_path + ".gz")
+        span.count("bytes", os.path.getsize(csv_path))
+        span.count("compressed_bytes", os.path.getsize(csv_path + ".gz"))
+
+
+def convert_scan(base_path, csv_path, scan_name):
+    # appends the csv scan to the binary columnar files of the set
+    with tracing.span("post_processing.binary_conversion") as span:
+        span.count("points", columnar.append_csv_scan(base_path, csv_path, scan_name))
+
+
+def index_scan(csv_path, leaf_size):
+    # writes the octree index of the scan next to it, see octree.py
+    with tracing.span("post_processing.octree") as span:
+        span.count("points", octree.write_scan_index(csv_path, leaf_size)["count"])
+
+
+def downsampled_path(csv_path):
+    return os.path.splitext(csv_path)[0] + "_downsampled.csv"
+
+
+def downsample_scan(csv_path, output_path, voxel_size, mode, target_points):
+    # writes the voxel grid downsampled scan, see downsampling.py
+    with tracing.span("post_processing.downsample") as span:
+        input_points, output_points, _ = downsampling.downsample_scan(
+            csv_path, output_path, voxel_size, mode, target_points)
+        span.count("points", input_points)
+        span.count("output_points", output_points)
+
+
+def collect_statistics(entry, csv_path, class_names):
+    # adds the statistics of the scan to its entry, see statistics.py
+    with tracing.span("post_processing.statistics") as span:
+        entry.update(statistics.scan_statistics(csv_path, class_names))
+        entry["points_per_second"] = entry["points"] / max(entry["render_seconds"], 1e-9)
+        span.count("points", entry["points"])
+
+
+def label_changes(previous_path, csv_path, output_path, tolerance, search_radius, class_names):
+    # writes per point change labels against the previous scan, see change_detection.py
+    with tracing.span("post_processing.change_labels") as span:
+        summary = change_detection.label_scan_changes(
+            previous_path, csv_path, output_path, tolerance, search_radius, class_names)
+        span.count("points", sum(summary["flags"].values()))
+
+
+def store_delta(base_path, csv_path, previous_path, changed_objects):
+    # stores the scan as keyframe or delta to the previous scan, see deltas.py
+    with tracing.span("post_processing.delta") as span:
+        span.count("points", deltas.append_scan(base_path, csv_path, previous_path, changed_objects))
+
+
+def extract_blocks(csv_path, block_size, block_points, min_points, seed):
+    # writes fixed size training blocks of the scan, see blocks.py
+    with tracing.span("post_processing.blocks") as span:
+        span.count("blocks", blocks.extract_blocks(
+            csv_path, blocks.blocks_path(csv_path), block_size, block_points, min_points, seed))
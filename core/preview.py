@@ -0,0 +1,113 @@
+import numpy as np
+
+# ---------------------------------------------------------------- #
+#                        PREVIEW SCANNER
+# ---------------------------------------------------------------- #
+#
+# Coarse proxy of the vLiDAR scanner using only NumPy. Rays are cast
+# from positions along the scanner path against the axis aligned
+# bounding boxes of the city objects. The results are used to judge
+# paths and object changes without rendering a point cloud, and do
+# not require Blender to be available.
+#
+# ---------------------------------------------------------------- #
+
+
+def ray_directions(angular_resolution):
+    # unit vectors covering the full sphere around the scanner in steps of the angular resolution (degrees)
+    azimuths = np.radians(np.arange(0.0, 360.0, angular_resolution))
+    elevations = np.radians(np.arange(-90.0 + angular_resolution / 2, 90.0, angular_resolution))
+    azimuths, elevations = np.meshgrid(azimuths, elevations)
+    azimuths = azimuths.ravel()
+    elevations = elevations.ravel()
+    return np.stack((
+        np.cos(elevations) * np.cos(azimuths),
+        np.cos(elevations) * np.sin(azimuths),
+        np.sin(elevations)), axis=1)
+
+
+def boxes_in_range(position, minimums, maximums, scan_range):
+    # indices of all boxes with any point within range of the position
+    outside = np.maximum(np.maximum(minimums - position, position - maximums), 0.0)
+    return np.flatnonzero((outside ** 2).sum(axis=1) <= scan_range ** 2)
+
+
+def cast_rays(origin, directions, minimums, maximums, scan_range, ground_height=None):
+    # returns the index of the closest box hit by each ray, or -1 if no box is hit within range
+    # the optional ground plane blocks rays the same way a box would, without being reported as a hit
+    return ray_hits(origin, directions, minimums, maximums, scan_range, ground_height)[0]
+
+
+def ray_hits(origin, directions, minimums, maximums, scan_range, ground_height=None):
+    # index of the closest box hit by each ray (-1 if none, see cast_rays) and the distance to the hit
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inverse = 1.0 / directions
+        near = (minimums[None, :, :] - origin) * inverse[:, None, :]
+        far = (maximums[None, :, :] - origin) * inverse[:, None, :]
+    # rays parallel to a slab produce nan values if the origin lies on the slab, these are treated as inside
+    enter = np.nan_to_num(np.minimum(near, far), nan=-np.inf).max(axis=2)
+    leave = np.nan_to_num(np.maximum(near, far), nan=np.inf).min(axis=2)
+    enter = np.maximum(enter, 0.0)
+    distances = np.where((leave >= enter) & (enter <= scan_range), enter, np.inf)
+    limit = np.full(len(directions), scan_range)
+    if ground_height is not None:
+        downwards = directions[:, 2] < 0
+        limit[downwards] = np.minimum(limit[downwards], (ground_height - origin[2]) / directions[downwards, 2])
+    if not distances.shape[1]:
+        return np.full(len(directions), -1), np.full(len(directions), np.inf)
+    closest = distances.argmin(axis=1)
+    closest_distances = distances[np.arange(len(directions)), closest]
+    return np.where(closest_distances <= limit, closest, -1), closest_distances
+
+
+def preview_scan(positions, minimums, maximums, scan_range, angular_resolution=5.0, ground_height=0.0):
+    # counts the preview rays hitting each box from all scanner positions
+    # only boxes within range of a position are tested, which keeps the cost per position
+    # proportional to the number of nearby objects instead of the size of the city
+    directions = ray_directions(angular_resolution)
+    hits = np.zeros(len(minimums), dtype=np.int64)
+    for position in positions:
+        candidates = boxes_in_range(position, minimums, maximums, scan_range)
+        closest = cast_rays(
+            position, directions, minimums[candidates], maximums[candidates], scan_range, ground_height)
+        np.add.at(hits, candidates[closest[closest >= 0]], 1)
+    return hits, len(positions) * len(directions)
+
+
+def preview_points(positions, minimums, maximums, scan_range, angular_resolution=5.0, ground_height=0.0):
+    # points where the preview rays hit the boxes and the index of the box hit by each point,
+    # used as a coarse stand-in for a rendered scan
+    directions = ray_directions(angular_resolution)
+    points = []
+    boxes = []
+    for position in positions:
+        candidates = boxes_in_range(position, minimums, maximums, scan_range)
+        closest, distances = ray_hits(
+            position, directions, minimums[candidates], maximums[candidates], scan_range, ground_height)
+        hit = closest >= 0
+        points.append(position + directions[hit] * distances[hit, None])
+        boxes.append(candidates[closest[hit]])
+    if not points:
+        return np.empty((0, 3)), np.empty(0, dtype=np.int64)
+    return np.concatenate(points), np.concatenate(boxes)
+
+
+def preview_report(hits, rays, names, modifiable=(), expected_points=None):
+    # summarizes the preview scan, the rays hitting each object are reported as they are and, if the
+    # expected number of points of the actual scan is known, as points from the object's share of all rays
+    visible = {name: int(count) for name, count in zip(names, hits) if count}
+    modifiable = set(modifiable)
+    visible_modifiable = [name for name in visible if name in modifiable]
+    points = None
+    if expected_points:
+        points = {name: count * expected_points / rays for name, count in visible.items()}
+    return {
+        "rays": int(rays),
+        "hit_rays": int(hits.sum()),
+        "visible_objects": len(visible),
+        "object_rays": visible,
+        "points": points,
+        "modifiable_objects": len(modifiable),
+        "visible_modifiable_objects": len(visible_modifiable),
+        "visible_modifiable_fraction": len(visible_modifiable) / len(modifiable) if modifiable else 0.0,
+    }
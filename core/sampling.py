@@ -0,0 +1,49 @@
+# ---------------------------------------------------------------- #
+#                       ADAPTIVE SAMPLING
+# ---------------------------------------------------------------- #
+#
+# Pulse rate, scan duration and scanner velocity for a target
+# number of points per scan. The fraction of pulses hitting the
+# city is similar between scans, so the number of points of a scan
+# is proportional to the number of pulses, i.e. the pulse rate
+# times the scan duration. The points per pulse are measured from
+# fully rendered scans, earlier scans are weighted less, so the
+# model follows changes of the scanner or the city.
+#
+# The scanner keeps its default velocity and the pulse rate is set
+# to take the target points along the path, within the limits of
+# the scanner. Targets beyond these limits are reached by changing
+# the scan duration, the velocity is chosen so the scanner covers
+# the whole path within the scan duration.
+#
+# ---------------------------------------------------------------- #
+
+# weight of the earlier measurements when a new scan is measured
+RATE_DECAY = 0.8
+
+# velocity of the scanner along its path without adaptive sampling
+DEFAULT_VELOCITY = 0.5
+
+
+def target_points(mode, path_length, points, density):
+    # 'POINTS' takes the given number of points per scan, 'DENSITY' the given points per unit of path length
+    if mode == 'DENSITY':
+        return density * path_length
+    return points
+
+
+def scan_timing(path_length, points, points_per_pulse, rate_limits):
+    # pulse rate, scan duration (in whole seconds, at least one) and velocity to take the given number of points,
+    # rate_limits are the lowest and highest pulse rate of the scanner, equal for scanners with a fixed rate
+    low, high = rate_limits
+    duration = max(path_length / DEFAULT_VELOCITY, 1.0)
+    rate = min(max(points / (points_per_pulse * duration), low), high)
+    duration = max(int(round(points / (points_per_pulse * rate))), 1)
+    # the rate is adjusted to the rounded duration as far as the limits allow
+    rate = min(max(points / (points_per_pulse * duration), low), high)
+    return rate, duration, path_length / duration
+
+
+def update_rate(measured_points, measured_pulses, points, pulses):
+    # adds a finished scan to the measured points and pulses, the points per pulse are their ratio
+    return measured_points * RATE_DECAY + points, measured_pulses * RATE_DECAY + pulses
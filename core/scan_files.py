@@ -0,0 +1,116 @@
+import warnings
+from itertools import islice
+
+import numpy as np
+
+from .geometry import points_in_shadows, points_in_volumes
+
+# ---------------------------------------------------------------- #
+#                          SCAN FILES
+# ---------------------------------------------------------------- #
+#
+# Reading, writing and comparing vLiDAR csv scans. The first three
+# columns of a scan contain the point coordinates, an optional
+# header line is kept as is.
+#
+# ---------------------------------------------------------------- #
+
+
+def read_scan_header(file_path):
+    # a header line is detected by trying to parse the first line as numbers
+    with open(file_path) as file:
+        first_line = file.readline()
+    try:
+        [float(value) for value in first_line.split(",")]
+        return None
+    except ValueError:
+        return first_line.rstrip("\n")
+
+
+def read_scan(file_path):
+    # reads a vLiDAR csv scan, the first three columns contain the point coordinates
+    # empty scans have the columns of their header, or only the coordinates without a header
+    header = read_scan_header(file_path)
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", "loadtxt: input contained no data", UserWarning)
+        points = np.loadtxt(file_path, delimiter=",", skiprows=0 if header is None else 1, ndmin=2)
+    if not len(points):
+        points = np.zeros((0, len(header.split(",")) if header else 3))
+    return header, points
+
+
+def read_scan_chunks(file_path, chunk_size=1000000):
+    # reads a vLiDAR csv scan in chunks of at most chunk_size points
+    # memory use is bounded by the chunk size regardless of the size of the scan
+    header = read_scan_header(file_path)
+    with open(file_path) as file:
+        if header is not None:
+            file.readline()
+        while True:
+            lines = list(islice(file, chunk_size))
+            if not lines:
+                return
+            yield np.loadtxt(lines, delimiter=",", ndmin=2)
+
+
+def count_scan_points(file_path):
+    # counts the lines of a scan without parsing them, including a last line without line break
+    lines = 0
+    last = b"\n"
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 24), b""):
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+    if last != b"\n":
+        lines += 1
+    if read_scan_header(file_path) is not None:
+        lines -= 1
+    return lines
+
+
+def write_scan(file_path, header, points):
+    np.savetxt(file_path, points, delimiter=",", fmt="%.9g", header=header or "", comments="")
+
+
+def voxel_keys(points, voxel_size, origin):
+    # packs the voxel index of each point into a single integer, 21 bits per axis
+    indices = np.floor((points - origin) / voxel_size).astype(np.int64)
+    indices &= (1 << 21) - 1
+    return (indices[:, 0] << 42) | (indices[:, 1] << 21) | indices[:, 2]
+
+
+def compare_scans(file_path, reference_file_path, tolerance):
+    # compares two scans by the overlap of the voxels occupied by their points
+    # the sampling positions of two scans never match exactly, with a voxel size
+    # equal to the tolerance both scans of the same surfaces occupy mostly the same voxels
+    _, points = read_scan(file_path)
+    _, reference = read_scan(reference_file_path)
+    if not len(points) or not len(reference):
+        return 1.0 if len(points) == len(reference) else 0.0
+    origin = np.minimum(points[:, :3].min(axis=0), reference[:, :3].min(axis=0))
+    keys = np.unique(voxel_keys(points[:, :3], tolerance, origin))
+    reference_keys = np.unique(voxel_keys(reference[:, :3], tolerance, origin))
+    shared = len(np.intersect1d(keys, reference_keys, assume_unique=True))
+    return shared / max(len(np.union1d(keys, reference_keys)), 1)
+
+
+def merge_partial_scan(previous_file_path, partial_file_paths, minimums, maximums, file_path, positions=None,
+                       scan_range=None):
+    # replaces all points of the previous scan inside the changed volumes, and in their shadows as seen from
+    # the scanner positions of the partial scans if these are given, with the points of the partial scans
+    # inside the same region
+    header, previous = read_scan(previous_file_path)
+    def changed(points):
+        mask = points_in_volumes(points[:, :3], minimums, maximums)
+        if positions is not None and len(positions):
+            mask |= points_in_shadows(points[:, :3], positions, minimums, maximums, scan_range)
+        return mask
+
+    merged = [previous[~changed(previous)]]
+    for partial_file_path in partial_file_paths:
+        _, partial = read_scan(partial_file_path)
+        if len(partial):
+            merged.append(partial[changed(partial)])
+    # empty scans may lack columns without a header, they do not contribute any points
+    merged = [points for points in merged if len(points)] or [previous]
+    write_scan(file_path, header, np.concatenate(merged))
@@ -0,0 +1,51 @@
+import importlib
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+
+# ---------------------------------------------------------------- #
+#                     STANDALONE PROCESSES
+# ---------------------------------------------------------------- #
+#
+# Process pools must not be started from within Blender. On spawn
+# platforms (macOS, Windows) each worker imports the add-on package,
+# whose __init__ imports bpy, on Linux each worker is a fork of the
+# whole Blender process. Core functions using a process pool are
+# therefore called from Blender through run, which starts this
+# script in a standalone interpreter (sys.executable is the Python
+# bundled with Blender) where the function starts its pool. The
+# arguments and the result are passed as pickle files.
+#
+# Functions without processes, like the post-processing workers,
+# use threads within Blender instead.
+#
+# ---------------------------------------------------------------- #
+
+
+def run(module, function, *args):
+    # calls function of the core module with the given arguments in a standalone interpreter
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "input.pickle")
+        output_path = os.path.join(directory, "output.pickle")
+        with open(input_path, "wb") as file:
+            pickle.dump((module, function, args), file)
+        subprocess.run([sys.executable, os.path.abspath(__file__), input_path, output_path], check=True)
+        with open(output_path, "rb") as file:
+            return pickle.load(file)
+
+
+def main(input_path, output_path):
+    with open(input_path, "rb") as file:
+        module, function, args = pickle.load(file)
+    result = getattr(importlib.import_module("core." + module), function)(*args)
+    with open(output_path, "wb") as file:
+        pickle.dump(result, file)
+
+
+if __name__ == "__main__":
+    # the directory of this script is replaced by the directory containing the core package, so the core
+    # modules are imported as package and do not shadow standard library modules such as statistics
+    sys.path[0] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    main(*sys.argv[1:3])
@@ -0,0 +1,116 @@
+import json
+
+import numpy as np
+
+from .columnar import field_name
+from .scan_files import read_scan_chunks, read_scan_header
+
+# ---------------------------------------------------------------- #
+#                          STATISTICS
+# ---------------------------------------------------------------- #
+#
+# Statistics of finished scans, computed in a single streaming pass
+# over each scan so memory does not depend on the size of the scan:
+# point counts per class, bounds, a histogram of the point density
+# on the ground plane and the throughput of the scanner. Scans are
+# checked against thresholds, a set with any failed check is marked
+# as degenerate in the summary so it can be filtered or repeated.
+#
+# ---------------------------------------------------------------- #
+
+# names of the column holding the class id, without a header the fourth column is used
+CLASS_FIELDS = ("class", "class_id", "classification", "label")
+
+# classes not counted as changed points
+UNCHANGED_CLASSES = ("initial",)
+
+
+def class_column(header, column_count):
+    if header:
+        names = [field_name(column) for column in header.split(",")]
+        for name in CLASS_FIELDS:
+            if name in names:
+                return names.index(name)
+        return None
+    return 3 if column_count > 3 else None
+
+
+def density_histogram(cell_counts):
+    # number of ground plane cells by points per cell, in bins of powers of two (1, 2-3, 4-7, ...)
+    bins = np.floor(np.log2(cell_counts)).astype(np.int64)
+    histogram = np.bincount(bins) if len(bins) else np.zeros(0, dtype=np.int64)
+    return {str(1 << i): int(count) for i, count in enumerate(histogram)}
+
+
+def scan_statistics(file_path, class_names, cell_size=1.0, chunk_size=1000000):
+    # class_names maps class ids to names, cells of the density histogram are cell_size squares
+    header = read_scan_header(file_path)
+    points = 0
+    minimum = np.full(3, np.inf)
+    maximum = np.full(3, -np.inf)
+    class_counts = np.zeros(0, dtype=np.int64)
+    cells = np.zeros(0, dtype=np.int64)
+    cell_counts = np.zeros(0, dtype=np.int64)
+    column = None
+    for chunk in read_scan_chunks(file_path, chunk_size):
+        if points == 0:
+            column = class_column(header, chunk.shape[1])
+        points += len(chunk)
+        minimum = np.minimum(minimum, chunk[:, :3].min(axis=0))
+        maximum = np.maximum(maximum, chunk[:, :3].max(axis=0))
+        if column is not None:
+            counts = np.bincount(np.rint(chunk[:, column]).astype(np.int64).clip(0))
+            size = max(len(counts), len(class_counts))
+            class_counts = np.pad(class_counts, (0, size - len(class_counts))) + np.pad(counts, (0, size - len(counts)))
+        # points per ground plane cell, reduced to occupied cells after each chunk
+        indices = np.floor(chunk[:, :2] / cell_size).astype(np.int64) + (1 << 31)
+        chunk_cells, counts = np.unique(indices[:, 0] << 32 | indices[:, 1], return_counts=True)
+        cells, inverse = np.unique(np.concatenate([cells, chunk_cells]), return_inverse=True)
+        cell_counts = np.bincount(inverse, np.concatenate([cell_counts, counts])).astype(np.int64)
+    classes = {class_names.get(class_id, str(class_id)): int(count)
+               for class_id, count in enumerate(class_counts) if count}
+    return {
+        "points": points,
+        "classes": classes,
+        "minimum": [float(value) for value in minimum] if points else None,
+        "maximum": [float(value) for value in maximum] if points else None,
+        "occupied_cells": len(cells),
+        "cell_size": cell_size,
+        "density_histogram": density_histogram(cell_counts),
+    }
+
+
+def check_scan(statistics, thresholds, initial):
+    # returns descriptions of all failed checks, changed points are not checked for the initial scan
+    issues = []
+    if statistics["points"] < thresholds["min_points"]:
+        issues.append("only %d points" % statistics["points"])
+    if not initial and statistics["points"]:
+        changed = sum(count for name, count in statistics["classes"].items() if name not in UNCHANGED_CLASSES)
+        if changed / statistics["points"] < thresholds["min_changed_fraction"]:
+            issues.append("only %d changed points" % changed)
+    path_length = statistics.get("path_length")
+    if path_length and statistics["points"] / path_length < thresholds["min_points_per_meter"]:
+        issues.append("only %.1f points per meter of path" % (statistics["points"] / path_length))
+    return issues
+
+
+def write_summary(file_path, set_name, scans, thresholds):
+    # scans is a list of statistics per scan in order, the first scan is the initial scan, with several
+    # paths per scan all scans with timestamp 0 are initial scans
+    issues = {}
+    for i, scan in enumerate(scans):
+        scan["issues"] = check_scan(scan, thresholds, scan.get("timestamp", i) == 0)
+        if scan["issues"]:
+            issues[scan["name"]] = scan["issues"]
+    summary = {
+        "set": set_name,
+        "degenerate": bool(issues),
+        "issues": issues,
+        "thresholds": thresholds,
+        "points": sum(scan["points"] for scan in scans),
+        "scans": scans,
+    }
+    with open(file_path, "w") as file:
+        json.dump(summary, file, indent=2)
+    return summary
@@ -0,0 +1,218 @@
+import json
+import os
+
+import numpy as np
+
+from . import random_seed
+from .geometry import sample_polyline
+
+# ---------------------------------------------------------------- #
+#                          CITY TILES
+# ---------------------------------------------------------------- #
+#
+# Large cities are split into square tiles of tile_size cells, the
+# tiles on the upper borders are smaller if the city size is not a
+# multiple of the tile size. Each tile is generated as a city of its
+# own, with a seed derived from the city seed and its position, and
+# is persisted to its own blend file. Only the tiles around the
+# scanner path are loaded for scanning.
+#
+# The roads of all tiles are assembled into a single road grid of
+# the whole city, from which the road graph is built. Tiles are
+# generated in order, the roads of each tile are matched to the
+# borders of its left and lower neighbours before it is saved:
+#
+#   stubs       a road of the neighbour ending at the border is
+#               continued into the tile until it reaches a road,
+#               a road of the tile ending at the border without a
+#               road on the other side is removed back to the
+#               next junction
+#   parallels   a road of the tile running along a border next to
+#               a road of the neighbour is removed, except where
+#               a road of the tile crosses the border
+#
+# The cells added and removed are returned, so the objects of the
+# tile can be changed accordingly.
+#
+#   <tile directory>/tiles.json      manifest of the tiled city
+#   <tile directory>/roads.npy       (dimension_x, dimension_y) bool
+#   <tile directory>/<tile>.blend    collection of a single tile
+#
+# ---------------------------------------------------------------- #
+
+
+def tile_name(tile_x, tile_y):
+    return "tile_" + str(tile_x) + "_" + str(tile_y)
+
+
+def create_manifest(dimension_x, dimension_y, tile_size, seed):
+    # tiles are listed row by row, origin and size are given in cells of the city grid
+    rng = np.random.default_rng([seed, dimension_x, dimension_y, tile_size])
+    tiles = []
+    for tile_y, origin_y in enumerate(range(0, dimension_y, tile_size)):
+        for tile_x, origin_x in enumerate(range(0, dimension_x, tile_size)):
+            name = tile_name(tile_x, tile_y)
+            tiles.append({
+                "name": name,
+                "index": [tile_x, tile_y],
+                "origin": [origin_x, origin_y],
+                "size": [min(tile_size, dimension_x - origin_x), min(tile_size, dimension_y - origin_y)],
+                "seed": random_seed(rng),
+                "file": name + ".blend",
+            })
+    return {
+        "dimension_x": dimension_x,
+        "dimension_y": dimension_y,
+        "tile_size": tile_size,
+        "seed": seed,
+        "tiles": tiles,
+    }
+
+
+def tile_offset(tile, dimension_x, dimension_y):
+    # world space offset moving a tile generated around the origin to its place in the city
+    # the city is centered around the origin as well, with one world unit per cell
+    return (tile["origin"][0] + tile["size"][0] / 2 - dimension_x / 2,
+            tile["origin"][1] + tile["size"][1] / 2 - dimension_y / 2)
+
+
+def insert_tile_roads(roads, tile, tile_roads):
+    # tile_roads is the (size x, size y) road grid of the tile, as built from its scenecity grid
+    origin_x, origin_y = tile["origin"]
+    size_x, size_y = tile["size"]
+    roads[origin_x:origin_x + size_x, origin_y:origin_y + size_y] = np.array(
+        [[cell is not None for cell in column] for column in tile_roads], dtype=bool).reshape(size_x, size_y)
+
+
+def along_border(line):
+    # road cells of a border line with a road on the same line next to them
+    along = np.zeros(len(line), dtype=bool)
+    along[1:] |= line[:-1]
+    along[:-1] |= line[1:]
+    return line & along
+
+
+def seam_mismatches(low, high):
+    # road cells ending at the border between two lines and pairs of cells of parallel roads on both sides
+    stubs = (low & ~high & ~along_border(low)) | (high & ~low & ~along_border(high))
+    parallels = low[:-1] & low[1:] & high[:-1] & high[1:]
+    return int(np.count_nonzero(stubs) + np.count_nonzero(parallels))
+
+
+def border_mismatches(roads, manifest):
+    # number of road cells ending at inner tile borders and of parallel roads along both sides of them
+    tile_size = manifest["tile_size"]
+    mismatches = 0
+    for x in range(tile_size, roads.shape[0], tile_size):
+        mismatches += seam_mismatches(roads[x - 1, :], roads[x, :])
+    for y in range(tile_size, roads.shape[1], tile_size):
+        mismatches += seam_mismatches(roads[:, y - 1], roads[:, y])
+    return mismatches
+
+
+def road_neighbours(roads, x, y):
+    return sum(roads[i, j] for i, j in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1))
+               if 0 <= i < roads.shape[0] and 0 <= j < roads.shape[1])
+
+
+def prune_dead_end(roads, x, y, bounds):
+    # removes the road cells of a dead end inside bounds (x0, x1, y0, y1) starting at a cell, back to a junction
+    x0, x1, y0, y1 = bounds
+    while x0 <= x < x1 and y0 <= y < y1 and roads[x, y] and road_neighbours(roads, x, y) <= 1:
+        roads[x, y] = False
+        for i, j in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+            if 0 <= i < roads.shape[0] and 0 <= j < roads.shape[1] and roads[i, j]:
+                x, y = i, j
+                break
+
+
+def match_border(roads, line, bounds):
+    # matches the road cells of the tile on roads[line] to the fixed cells of its neighbour on roads[line - 1],
+    # the tile covers bounds (line, x1, y0, y1)
+    _, x1, y0, y1 = bounds
+    low = roads[line - 1]
+    low_along = along_border(low)
+    for y in range(y0, y1):
+        if low[y] and not low_along[y]:
+            # a road of the neighbour ends at the border, it is continued until it reaches a road
+            for x in range(line, x1):
+                if roads[x, y]:
+                    break
+                roads[x, y] = True
+                if road_neighbours(roads, x, y) > 1:
+                    break
+        elif low[y] and roads[line, y]:
+            # parallel roads on both sides, the cell is kept where a road of the tile crosses the border
+            crossing = line + 1 < x1 and roads[line + 1, y]
+            if not crossing or (y > y0 and low[y - 1] and roads[line, y - 1]):
+                roads[line, y] = False
+                prune_dead_end(roads, line + 1, y, bounds)
+    for y in range(y0, y1):
+        high_along = along_border(roads[line])
+        if roads[line, y] and not low[y] and not high_along[y]:
+            # a road of the tile ends at the border without a road on the other side
+            roads[line, y] = False
+            prune_dead_end(roads, line + 1, y, bounds)
+
+
+def match_tile_borders(roads, tile):
+    # matches the roads of a tile inserted into roads to its left and lower neighbours, returns the
+    # cells of the city grid turned into roads and the cells whose roads were removed
+    origin_x, origin_y = tile["origin"]
+    size_x, size_y = tile["size"]
+    bounds = (origin_x, origin_x + size_x, origin_y, origin_y + size_y)
+    tile_roads = roads[bounds[0]:bounds[1], bounds[2]:bounds[3]]
+    generated = tile_roads.copy()
+    # matching one border may change the cells of the other border at the corner of the tile
+    for _ in range(4):
+        previous = tile_roads.copy()
+        if origin_x:
+            match_border(roads, origin_x, bounds)
+        if origin_y:
+            match_border(roads.T, origin_y, (bounds[2], bounds[3], bounds[0], bounds[1]))
+        if np.array_equal(previous, tile_roads):
+            break
+    added = np.argwhere(tile_roads & ~generated) + [origin_x, origin_y]
+    removed = np.argwhere(generated & ~tile_roads) + [origin_x, origin_y]
+    return [tuple(cell) for cell in added.tolist()], [tuple(cell) for cell in removed.tolist()]
+
+
+def road_grid(roads):
+    # road grid and road locations of the whole city in the form used to build the road graph
+    # road locations are placed in the center of their cell in world space
+    dimension_x, dimension_y = roads.shape
+    grid = [[{"location": (x, y)} if roads[x, y] else None for y in range(dimension_y)] for x in range(dimension_x)]
+    cells = np.argwhere(roads)
+    locations = [(x - dimension_x / 2 + 0.5, y - dimension_y / 2 + 0.5) for x, y in cells.tolist()]
+    return grid, locations
+
+
+def tiles_along_path(polyline, manifest, neighbours):
+    # names of all tiles the path passes through and of the given number of rings of tiles around them
+    tile_size = manifest["tile_size"]
+    tile_count_x = -(-manifest["dimension_x"] // tile_size)
+    tile_count_y = -(-manifest["dimension_y"] // tile_size)
+    samples = sample_polyline(np.asarray(polyline, dtype=float), 1.0)
+    cells = np.floor(samples[:, :2] + [manifest["dimension_x"] / 2, manifest["dimension_y"] / 2]).astype(np.int64)
+    indices = np.unique(np.floor_divide(cells, tile_size), axis=0)
+    names = set()
+    for tile_x, tile_y in indices.tolist():
+        for x in range(max(tile_x - neighbours, 0), min(tile_x + neighbours + 1, tile_count_x)):
+            for y in range(max(tile_y - neighbours, 0), min(tile_y + neighbours + 1, tile_count_y)):
+                names.add(tile_name(x, y))
+    return sorted(names)
+
+
+def write_manifest(directory, manifest, roads):
+    np.save(os.path.join(directory, "roads.npy"), roads)
+    with open(os.path.join(directory, "tiles.json"), "w") as file:
+        json.dump(manifest, file, indent=2)
+
+
+def load_manifest(directory):
+    with open(os.path.join(directory, "tiles.json")) as file:
+        return json.load(file)
+
+
+def load_roads(directory):
+    return np.load(os.path.join(directory, "roads.npy"))
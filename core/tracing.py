@@ -0,0 +1,141 @@
+import json
+import threading
+import time
+
+# ---------------------------------------------------------------- #
+#                            TRACING
+# ---------------------------------------------------------------- #
+#
+# Timing spans around the stages of city, path and dataset
+# generation. Spans are only recorded while a trace is running,
+# otherwise span() returns a shared span that does nothing, so
+# instrumented code costs a single function call per stage.
+#
+# Recorded spans can be exported as a Chrome trace (which can be
+# opened in Perfetto or chrome://tracing) and as a summary table.
+# Spans of background workers are shown on a track per thread.
+#
+# ---------------------------------------------------------------- #
+
+# list of recorded spans while a trace is running, None otherwise
+# each span is recorded as tuple (name, start, duration, counters, thread)
+_events = None
+
+
+class Span:
+    __slots__ = ("name", "start", "counters")
+
+    def __init__(self, name, counters):
+        self.name = name
+        self.start = 0.0
+        self.counters = counters
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exception):
+        duration = time.perf_counter() - self.start
+        if _events is not None:
+            _events.append((self.name, self.start, duration, self.counters, threading.get_ident()))
+        return False
+
+    def count(self, counter, value):
+        # counters are summed per span, e.g. objects touched, points or bytes written
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+
+class DisabledSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        return False
+
+    def count(self, counter, value):
+        pass
+
+
+DISABLED_SPAN = DisabledSpan()
+
+
+def span(name, **counters):
+    if _events is None:
+        return DISABLED_SPAN
+    return Span(name, counters)
+
+
+def enabled():
+    return _events is not None
+
+
+def start_trace():
+    global _events
+    _events = []
+
+
+def stop_trace():
+    # stops recording and returns all spans recorded since the trace was started
+    global _events
+    events = _events or []
+    _events = None
+    return events
+
+
+def export_chrome_trace(events, file_path):
+    # writes spans as complete events of the Chrome trace event format, timestamps are in microseconds
+    origin = min((start for _, start, _, _, _ in events), default=0.0)
+    # threads are numbered in order of their first span, the main thread is usually first
+    threads = {}
+    for event in events:
+        threads.setdefault(event[4], len(threads) + 1)
+    trace_events = [{
+        "name": name,
+        "cat": name.split(".")[0],
+        "ph": "X",
+        "ts": (start - origin) * 1e6,
+        "dur": duration * 1e6,
+        "pid": 1,
+        "tid": threads[thread],
+        "args": counters,
+    } for name, start, duration, counters, thread in events]
+    with open(file_path, "w") as file:
+        json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, file)
+
+
+def summarize(events):
+    # aggregates spans by name in order of their first occurrence
+    summary = {}
+    for name, _, duration, counters, _ in events:
+        entry = summary.setdefault(name, {"calls": 0, "total": 0.0, "max": 0.0, "counters": {}})
+        entry["calls"] += 1
+        entry["total"] += duration
+        entry["max"] = max(entry["max"], duration)
+        for counter, value in counters.items():
+            entry["counters"][counter] = entry["counters"].get(counter, 0) + value
+    return summary
+
+
+def summary_table(events):
+    summary = summarize(events)
+    width = max([len(name) for name in summary] + [5])
+    lines = [
+        "stage".ljust(width) + "  calls     total (s)      mean (s)       max (s)  counters",
+    ]
+    for name, entry in summary.items():
+        counters = ", ".join(counter + "=" + str(value) for counter, value in entry["counters"].items())
+        lines.append(
+            name.ljust(width)
+            + str(entry["calls"]).rjust(7)
+            + ("%.4f" % entry["total"]).rjust(14)
+            + ("%.4f" % (entry["total"] / entry["calls"])).rjust(14)
+            + ("%.4f" % entry["max"]).rjust(14)
+            + "  " + counters)
+    return "\n".join(lines) + "\n"
+
+
+def write_summary(events, file_path):
+    with open(file_path, "w") as file:
+        file.write(summary_table(events))
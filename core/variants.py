@@ -0,0 +1,60 @@
+import numpy as np
+
+# ---------------------------------------------------------------- #
+#                         CITY VARIANTS
+# ---------------------------------------------------------------- #
+#
+# Planning of city variants, which re-randomize cheap aspects of an
+# existing city instead of generating a new layout: the floors of
+# Buildify buildings, which props are present, the mesh of props
+# among compatible meshes and small offsets and rotations of props.
+# Roads are never changed, so road graph and scanner paths remain
+# valid. A variant is planned from the variant seed alone, objects
+# are given as names in a deterministic order.
+#
+# ---------------------------------------------------------------- #
+
+# same range of floors as used during city generation
+FLOORS_MIN = 3
+FLOORS_MAX = 10
+
+
+def compatible_meshes(meshes, tolerance):
+    # meshes maps mesh names to (tag, dimensions), meshes are compatible if they share their tag and
+    # all dimensions differ by at most the relative tolerance, returns the sorted compatible meshes per mesh
+    names = sorted(meshes)
+    dimensions = np.array([meshes[name][1] for name in names], dtype=float).reshape(-1, 3)
+    tags = np.array([meshes[name][0] for name in names])
+    ratio = np.abs(dimensions[:, None, :] - dimensions[None, :, :]) / np.maximum(
+        np.maximum(dimensions[:, None, :], dimensions[None, :, :]), 1e-6)
+    compatible = np.all(ratio <= tolerance, axis=2) & (tags[:, None] == tags[None, :])
+    return {name: [names[j] for j in np.flatnonzero(compatible[i])] for i, name in enumerate(names)}
+
+
+def plan_variant(rng, buildings, props, prop_meshes, compatible, settings):
+    # buildings and props are lists of object names, prop_meshes maps props to their mesh (or None)
+    # settings provides variant_floors, variant_removal, variant_swap, variant_jitter and variant_rotation
+    plan = {"floors": {}, "removed": [], "meshes": {}, "jitter": {}}
+    # all random values are drawn at once, so each building and prop receives the same values
+    # regardless of which changes are enabled
+    floors = rng.integers(FLOORS_MIN, FLOORS_MAX + 1, len(buildings))
+    if settings.variant_floors:
+        plan["floors"] = {name: int(count) for name, count in zip(buildings, floors)}
+    removal = rng.random(len(props))
+    swap = rng.random(len(props))
+    choice = rng.random(len(props))
+    offsets = rng.uniform(-1.0, 1.0, (len(props), 3))
+    for i, name in enumerate(props):
+        if removal[i] < settings.variant_removal:
+            plan["removed"].append(name)
+            continue
+        mesh = prop_meshes.get(name)
+        candidates = [candidate for candidate in compatible.get(mesh, []) if candidate != mesh]
+        if candidates and swap[i] < settings.variant_swap:
+            plan["meshes"][name] = candidates[int(choice[i] * len(candidates))]
+        if settings.variant_jitter > 0.0 or settings.variant_rotation > 0.0:
+            plan["jitter"][name] = [
+                float(offsets[i, 0] * settings.variant_jitter),
+                float(offsets[i, 1] * settings.variant_jitter),
+                float(offsets[i, 2] * settings.variant_rotation)]
+    return plan
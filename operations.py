@@ -0,0 +1,1867 @@
+import bpy
+import numpy as np
+from mathutils import Vector, Euler, Matrix
+from math import radians
+import time
+import os
+import json
+from .core import random_seed
+from .core import blocks, catalog, changes, columnar, deltas, estimation, geometry, instancing, path_generation
+from .core import post_processing, preview, sampling, scan_files, standalone, statistics, tiling, tracing, variants
+
+# ---------------------------------------------------------------- #
+#                          OPERATIONS
+# ---------------------------------------------------------------- #
+#
+# Section for function/method definitions that operate on the
+# Blender scene. Functions are grouped according to task, i.e.
+# city-/path-/scan-generation. Blender independent logic is found
+# in the core modules. This module is only imported once an
+# operator is executed.
+#
+# ---------------------------------------------------------------- #
+
+
+def randomize_generator_seed(context):
+    context.scene.scan_settings.seed = random_seed()
+
+
+def randomize_city_seed(context):
+    context.scene.city_settings.seed = random_seed()
+
+
+def randomize_path_seed(context):
+    context.scene.scanner_settings.path_seed = random_seed()
+
+# ------------------------------------- #
+#            City Generation
+# ------------------------------------- #
+
+
+def reset_city(context):
+    # resets transformations made to city objects
+    # restores original transforms by pulling them from delta transforms
+    city_collection = context.scene.city_collection
+    try:
+        city = bpy.data.collections[city_collection]
+    except Exception:
+        return
+    tags = [tag.strip() for tag in context.scene.object_modifier_tags.split(",")]
+    for district in city.children_recursive:
+        for obj in district.objects:
+            if any(tag in obj.name for tag in tags):
+                obj.hide_viewport = False
+                if (obj.delta_location[:3] != (0.0, 0.0, 0.0)
+                        or obj.delta_rotation_euler[:3] != (0.0, 0.0, 0.0)
+                        or obj.delta_scale[:3] != (1.0, 1.0, 1.0)):
+                    # if any delta transforms are set they are switched
+                    reset_transforms(obj)
+                    transforms_to_deltas(obj)
+                for child in obj.children_recursive:
+                    child.hide_viewport = False
+
+
+def restore_city(context):
+    # restores the city after a cancelled or failed set of scans, i.e. original transforms
+    # as well as all objects visible and classified as initial
+    reset_city(context)
+    try:
+        city = bpy.data.collections[context.scene.city_collection]
+    except Exception:
+        return
+    for district in city.children_recursive:
+        for obj in district.objects:
+            obj.class_name = "initial"
+            obj.hide_viewport = False
+
+
+def clear_city(context):
+    # removes all objects and collections created during city generation
+    path_graph_cache.clear()
+    city_collection = context.scene.city_collection
+    clear_city_variant()
+    bpy.ops.object.select_all(action='DESELECT')
+    try:
+        city = bpy.data.collections[city_collection]
+        for district in city.children_recursive:
+            for obj in district.objects:
+                obj.select_set(True)
+        bpy.ops.object.delete()
+        for district in city.children_recursive:
+            bpy.data.collections.remove(district)
+        bpy.context.scene.collection.children.unlink(city)
+        bpy.data.collections.remove(city)
+    except Exception:
+        return
+
+
+def configure_scenecity_nodes(context, dimension_x, dimension_y, seed):
+    # applies any relevant settings set in ui to relevant scenecity nodes
+    # size and seed are passed separately, since tiles of a tiled city are generated with their own
+    settings = context.scene.city_settings
+    bpy.data.node_groups["PCGeneratorCity"].nodes["grid_layout_generator"].boxes_values = settings.districts
+    bpy.data.node_groups["PCGeneratorCity"].nodes["grid_layout_generator"].random_seed = seed
+    bpy.data.node_groups["PCGeneratorCity"].nodes["grid_layout_generator"].boxes_min_max_size[0] = settings.block_min
+    bpy.data.node_groups["PCGeneratorCity"].nodes["grid_layout_generator"].boxes_min_max_size[1] = settings.block_max
+    bpy.data.node_groups["PCGeneratorCity"].nodes["Grid"].grid_size[0] = dimension_x
+    bpy.data.node_groups["PCGeneratorCity"].nodes["Grid"].grid_size[1] = dimension_y
+
+
+def randomize_buildify_levels(context, city, rng):
+    # randomizes the floors of buildify buildings, otherwise all buildify buildings would be the same height
+    buildings = []
+    tags = context.scene.buildify_building_modifier_tags
+    # this section collects all tagged buildings in a list which is then sorted by object location
+    # this step is necessary to make the city generation (specifically assigning the building floors) deterministic
+    # since SceneCity itself does not seem to name or place the buildings
+    # in a deterministic order based on the seed used
+    for district in city.children:
+        for obj in district.objects:
+            if any(tag in obj.name for tag in tags):
+                buildings.append(obj)
+    buildings.sort(key=lambda obj: (obj.matrix_world.translation.x, obj.matrix_world.translation.y))
+    for obj in buildings:
+        try:
+            nodes = obj.modifiers["GeometryNodes"]
+            floors = int(rng.integers(3, 11))
+            nodes[nodes.node_group.inputs["Max number of floors"].identifier] = floors
+            # obj.update_tag() tags object to be updated in viewport
+            # otherwise changes in level will not be displayed until
+            # further changes to the object are made
+            obj.update_tag()
+        except Exception:
+            None
+
+
+def instance_districts(context, collection, layer_collection, prefix, seed):
+    # creates a collection for each district within the given collection and places the objects of each district
+    # layer_collection is the layer collection of the given collection
+    settings = context.scene.city_settings
+    districts = ["road"]
+    districts.extend(settings.districts.replace(" ", "").split(","))
+    for district in districts:
+        # create new collection for each district and link it to city collection
+        collection.children.link(bpy.data.collections.new(prefix + district))
+    for district in districts:
+        # for each district the corresponding scenecity instancer node is called separately
+        bpy.data.node_groups["PCGeneratorCity"].nodes[district + "_portion_instancer"].random_seed = seed
+        # active layer collection determines the collection in which the instancer places the new objects
+        district_layer_collection = layer_collection.children[prefix + district]
+        node_path = "bpy.data.node_groups[\"PCGeneratorCity\"].nodes[\"" + district + "_instancer\"]"
+        bpy.context.view_layer.active_layer_collection = district_layer_collection
+        with tracing.span("city.instancer." + district) as span:
+            bpy.ops.node.objects_instancer_node_create(source_node_path=node_path)
+            span.count("objects", len(district_layer_collection.collection.objects))
+
+
+def finish_city_objects(context, collection, rng):
+    # steps applied to the objects of a city (or tile) once all districts are placed
+    settings = context.scene.city_settings
+    with tracing.span("city.buildify_levels"):
+        randomize_buildify_levels(context, collection, rng)
+    if settings.bake_buildify:
+        with tracing.span("city.bake_buildify") as span:
+            span.count("objects", bake_buildify_buildings(context, collection))
+    if settings.share_mesh_data:
+        with tracing.span("city.share_mesh_data") as span:
+            span.count("objects", share_mesh_data(collection))
+
+
+def build_city(context):
+    start = time.time()
+    city_collection = context.scene.city_collection
+    settings = context.scene.city_settings
+    if settings.randomize_seed:
+        randomize_city_seed(context)
+    rng = np.random.default_rng(settings.seed)
+    changes.bound_city_settings(settings)
+    # the guard is applied before the existing city is cleared, so a refused city keeps the existing one
+    allowed, split_tile_size = check_city_budget(context)
+    if not allowed:
+        return False
+    if settings.clear_city:
+        clear_city(context)
+    if settings.tiled or split_tile_size:
+        build_city_tiles(context, split_tile_size or settings.tile_size)
+        print("Tiled city generated in " + str(time.time() - start))
+        return True
+    memory = estimation.process_memory()
+    with tracing.span("city.configure_nodes"):
+        configure_scenecity_nodes(context, settings.dimension_x, settings.dimension_y, settings.seed)
+    city = bpy.data.collections.new(city_collection)
+    scene_collection = bpy.context.scene.collection
+    scene_collection.children.link(city)
+    instance_districts(context, city, bpy.context.view_layer.layer_collection.children[city_collection],
+                       "city_", settings.seed)
+    finish_city_objects(context, bpy.data.collections[city_collection], rng)
+    if settings.calibrate_estimate:
+        city_grid = bpy.data.node_groups["PCGeneratorCity"].nodes["grid_layout_generator"].get_grid()
+        road_grid = path_generation.build_road_grid(settings.dimension_x, settings.dimension_y, city_grid)
+        record_city_build(context, city, "city_", settings.dimension_x, settings.dimension_y, road_grid, memory)
+    end = time.time()
+    print("City generated in " + str(end - start))
+    return True
+
+
+# attribute property and number of values per element by attribute data type, attributes of other
+# types (e.g. strings) are not compared and their meshes are never shared
+MESH_ATTRIBUTE_VALUES = {
+    "FLOAT": ("value", 1, np.float32),
+    "INT": ("value", 1, np.int32),
+    "INT8": ("value", 1, np.int32),
+    "BOOLEAN": ("value", 1, bool),
+    "INT32_2D": ("value", 2, np.int32),
+    "FLOAT2": ("vector", 2, np.float32),
+    "FLOAT_VECTOR": ("vector", 3, np.float32),
+    "FLOAT_COLOR": ("color", 4, np.float32),
+    "BYTE_COLOR": ("color", 4, np.float32),
+    "QUATERNION": ("value", 4, np.float32),
+}
+
+
+def mesh_data_layers(mesh):
+    # (name, values) of the UV layers and the attributes of a mesh, positions and internal
+    # attributes (names starting with a dot) are skipped
+    layers = []
+    for uv_layer in mesh.uv_layers:
+        uvs = np.empty(len(uv_layer.data) * 2, dtype=np.float32)
+        uv_layer.data.foreach_get("uv", uvs)
+        layers.append(("uv:" + uv_layer.name, uvs))
+    for attribute in mesh.attributes:
+        if attribute.name == "position" or attribute.name.startswith(".") or attribute.name in mesh.uv_layers:
+            continue
+        if attribute.data_type not in MESH_ATTRIBUTE_VALUES:
+            layers.append(("unshared:" + attribute.name, np.frombuffer(mesh.name.encode(), dtype=np.uint8)))
+            continue
+        name, components, dtype = MESH_ATTRIBUTE_VALUES[attribute.data_type]
+        values = np.empty(len(attribute.data) * components, dtype=dtype)
+        attribute.data.foreach_get(name, values)
+        layers.append((attribute.domain + ":" + attribute.data_type + ":" + attribute.name, values))
+    return layers
+
+
+def mesh_data_signature(mesh):
+    coordinates = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coordinates)
+    loop_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vertices)
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    material_indices = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("material_index", material_indices)
+    material_names = [material.name if material else "" for material in mesh.materials]
+    return instancing.mesh_signature(coordinates, loop_vertices, loop_totals, material_indices, material_names,
+                                     mesh_data_layers(mesh))
+
+
+def share_mesh_data(city):
+    # assigns a single mesh to all city objects with identical mesh data and removes the unused copies
+    # returns the number of objects whose mesh was replaced
+    meshes = {}
+    for district in city.children_recursive:
+        for obj in district.objects:
+            if obj.type == 'MESH' and obj.data.name not in meshes:
+                meshes[obj.data.name] = obj.data
+    canonical = instancing.group_duplicates({name: mesh_data_signature(mesh) for name, mesh in meshes.items()})
+    shared = 0
+    for district in city.children_recursive:
+        for obj in district.objects:
+            if obj.type == 'MESH' and canonical[obj.data.name] != obj.data.name:
+                obj.data = meshes[canonical[obj.data.name]]
+                shared += 1
+    for name, mesh in meshes.items():
+        if canonical[name] != name and mesh.users == 0:
+            bpy.data.meshes.remove(mesh)
+    return shared
+
+
+def buildify_modifier_inputs(modifier):
+    # values of all inputs of a geometry nodes modifier, stored as id properties of the modifier
+    inputs = {}
+    for identifier in modifier.keys():
+        value = modifier[identifier]
+        inputs[identifier] = value.name if hasattr(value, "name") else (
+            list(value) if hasattr(value, "__len__") and not isinstance(value, str) else value)
+    return inputs
+
+
+def bake_buildify_buildings(context, city):
+    # replaces the buildify modifier of each building by a baked mesh, baked meshes are kept in the
+    # blend file (fake user) and reused for all buildings with the same footprint and modifier inputs
+    # returns the number of buildings baked or taken from the cache
+    tags = context.scene.buildify_building_modifier_tags
+    cache = {mesh["pcdg_bake_key"]: mesh for mesh in bpy.data.meshes if "pcdg_bake_key" in mesh}
+    context.view_layer.update()
+    depsgraph = context.evaluated_depsgraph_get()
+    baked = 0
+    for district in city.children_recursive:
+        for obj in district.objects:
+            if not any(tag in obj.name for tag in tags) or "GeometryNodes" not in obj.modifiers:
+                continue
+            modifier = obj.modifiers["GeometryNodes"]
+            if not modifier.show_viewport or modifier.node_group is None:
+                continue
+            key = instancing.bake_key(
+                modifier.node_group.name, mesh_data_signature(obj.data), buildify_modifier_inputs(modifier))
+            if key not in cache:
+                mesh = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph))
+                mesh.name = "pcdg_baked_" + modifier.node_group.name
+                mesh["pcdg_bake_key"] = key
+                mesh.use_fake_user = True
+                cache[key] = mesh
+            # the modifier is kept but disabled, so the building is no longer evaluated
+            # the footprint is kept as id property, which keeps the mesh alive for unbaking
+            obj["pcdg_footprint"] = obj.data
+            obj.data = cache[key]
+            modifier.show_viewport = False
+            modifier.show_render = False
+            baked += 1
+    return baked
+
+
+def unbake_buildify_building(obj):
+    # restores the footprint and modifier of a baked building
+    if "pcdg_footprint" not in obj.keys():
+        return False
+    obj.data = obj["pcdg_footprint"]
+    del obj["pcdg_footprint"]
+    obj.modifiers["GeometryNodes"].show_viewport = True
+    obj.modifiers["GeometryNodes"].show_render = True
+    return True
+
+
+def variant_objects(context, city):
+    # buildify buildings and props of the city, sorted by location like during city generation
+    buildify_tags = context.scene.buildify_building_modifier_tags
+    building_tags = [tag.strip() for tag in context.scene.building_modifier_tags.split(",")]
+    object_tags = [tag.strip() for tag in context.scene.object_modifier_tags.split(",")]
+    buildings = []
+    props = []
+    for district in city.children_recursive:
+        for obj in district.objects:
+            if any(tag in obj.name for tag in buildify_tags) and "GeometryNodes" in obj.modifiers:
+                buildings.append(obj)
+            elif any(tag in obj.name for tag in object_tags) and not any(tag in obj.name for tag in building_tags):
+                props.append(obj)
+    buildings.sort(key=lambda obj: (obj.matrix_world.translation.x, obj.matrix_world.translation.y))
+    props.sort(key=lambda obj: (obj.matrix_world.translation.x, obj.matrix_world.translation.y))
+    return buildings, props
+
+
+def mesh_dimensions(mesh):
+    coordinates = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coordinates)
+    coordinates = coordinates.reshape(-1, 3)
+    return coordinates.max(axis=0) - coordinates.min(axis=0) if len(coordinates) else np.zeros(3)
+
+
+def variant_removed_collection():
+    # props removed by a variant are kept in a collection outside of the scene
+    try:
+        return bpy.data.collections["pcdg_variant_removed"]
+    except KeyError:
+        collection = bpy.data.collections.new("pcdg_variant_removed")
+        collection.use_fake_user = True
+        return collection
+
+
+def clear_city_variant():
+    # removes the record of the last variant along with all props it removed
+    removed_collection = bpy.data.collections.get("pcdg_variant_removed")
+    if removed_collection is not None:
+        for obj in list(removed_collection.objects):
+            bpy.data.objects.remove(obj)
+        bpy.data.collections.remove(removed_collection)
+    text = bpy.data.texts.get("pcdg_city_variant")
+    if text is not None:
+        bpy.data.texts.remove(text)
+
+
+def create_city_variant(context):
+    # re-randomizes floors, props, prop meshes and prop placement of the existing city, the previous
+    # variant is reverted first, so every variant is based on the generated city
+    settings = context.scene.city_settings
+    if settings.variant_randomize_seed:
+        settings.variant_seed = random_seed()
+    try:
+        city = bpy.data.collections[context.scene.city_collection]
+    except KeyError:
+        print("No generated city found")
+        return
+    start = time.time()
+    revert_city_variant(context)
+    reset_city(context)
+    rng = np.random.default_rng(settings.variant_seed)
+    buildings, props = variant_objects(context, city)
+    object_tags = [tag.strip() for tag in context.scene.object_modifier_tags.split(",")]
+    prop_meshes = {}
+    meshes = {}
+    for obj in props:
+        # props with modifiers are never swapped, their modifiers might depend on the mesh
+        if obj.type == 'MESH' and not obj.modifiers:
+            prop_meshes[obj.name] = obj.data.name
+            if obj.data.name not in meshes:
+                tag = next(tag for tag in object_tags if tag in obj.name)
+                meshes[obj.data.name] = (tag, mesh_dimensions(obj.data))
+    compatible = variants.compatible_meshes(meshes, settings.variant_swap_tolerance)
+    plan = variants.plan_variant(
+        rng, [obj.name for obj in buildings], [obj.name for obj in props], prop_meshes, compatible, settings)
+
+    # the record contains the previous and new values of all changes, it is used to revert the variant
+    record = {"seed": settings.variant_seed, "floors": {}, "removed": {}, "meshes": {}, "jitter": plan["jitter"]}
+    rebake = False
+    for obj in buildings:
+        if obj.name in plan["floors"]:
+            rebake = unbake_buildify_building(obj) or rebake
+            modifier = obj.modifiers["GeometryNodes"]
+            identifier = modifier.node_group.inputs["Max number of floors"].identifier
+            record["floors"][obj.name] = [modifier[identifier], plan["floors"][obj.name]]
+            modifier[identifier] = plan["floors"][obj.name]
+            obj.update_tag()
+    removed_collection = variant_removed_collection()
+    for name in plan["removed"]:
+        obj = bpy.data.objects[name]
+        record["removed"][name] = {}
+        for removed in [obj] + list(obj.children_recursive):
+            record["removed"][name][removed.name] = [collection.name for collection in removed.users_collection]
+            for collection in removed.users_collection:
+                collection.objects.unlink(removed)
+            removed_collection.objects.link(removed)
+    for name, mesh in plan["meshes"].items():
+        obj = bpy.data.objects[name]
+        record["meshes"][name] = [obj.data.name, mesh]
+        obj.data = bpy.data.meshes[mesh]
+    for name, (offset_x, offset_y, angle) in plan["jitter"].items():
+        obj = bpy.data.objects[name]
+        obj.location.x += offset_x
+        obj.location.y += offset_y
+        obj.rotation_euler.z += radians(angle)
+    if rebake:
+        bake_buildify_buildings(context, city)
+
+    text = bpy.data.texts.get("pcdg_city_variant") or bpy.data.texts.new("pcdg_city_variant")
+    text.from_string(json.dumps(record, indent=2))
+    print("City variant " + str(settings.variant_seed) + " created in " + str(time.time() - start))
+    print("-- " + str(len(record["floors"])) + " buildings changed, " + str(len(record["removed"]))
+          + " props removed, " + str(len(record["meshes"])) + " props swapped, "
+          + str(len(record["jitter"])) + " props moved --")
+
+
+def revert_city_variant(context):
+    # reverts the last variant using its record, which is stored in the text "pcdg_city_variant"
+    text = bpy.data.texts.get("pcdg_city_variant")
+    if text is None:
+        return
+    record = json.loads(text.as_string())
+    reset_city(context)
+    rebake = False
+    for name, (floors, _) in record["floors"].items():
+        obj = bpy.data.objects.get(name)
+        if obj is None:
+            continue
+        rebake = unbake_buildify_building(obj) or rebake
+        modifier = obj.modifiers["GeometryNodes"]
+        modifier[modifier.node_group.inputs["Max number of floors"].identifier] = floors
+        obj.update_tag()
+    for objects in record["removed"].values():
+        for name, collections in objects.items():
+            obj = bpy.data.objects.get(name)
+            if obj is None:
+                continue
+            for collection in obj.users_collection:
+                collection.objects.unlink(obj)
+            for collection in collections:
+                bpy.data.collections[collection].objects.link(obj)
+    for name, (mesh, _) in record["meshes"].items():
+        if name in bpy.data.objects:
+            bpy.data.objects[name].data = bpy.data.meshes[mesh]
+    for name, (offset_x, offset_y, angle) in record["jitter"].items():
+        obj = bpy.data.objects.get(name)
+        if obj is None:
+            continue
+        obj.location.x -= offset_x
+        obj.location.y -= offset_y
+        obj.rotation_euler.z -= radians(angle)
+    if rebake:
+        bake_buildify_buildings(context, bpy.data.collections[context.scene.city_collection])
+    bpy.data.texts.remove(text)
+
+# ------------------------------------- #
+#              Tiled Cities
+# ------------------------------------- #
+
+
+def remove_collection(collection):
+    # removes a collection with all of its child collections and objects
+    # meshes only used by the removed objects are removed as well to free their memory
+    collections = [collection] + list(collection.children_recursive)
+    objects = {obj.name: obj for child in collections for obj in child.all_objects}
+    meshes = {obj.data.name: obj.data for obj in objects.values() if obj.type == 'MESH'}
+    for obj in objects.values():
+        bpy.data.objects.remove(obj, do_unlink=True)
+    for child in reversed(collections):
+        bpy.data.collections.remove(child)
+    for mesh in meshes.values():
+        if mesh.users == 0:
+            bpy.data.meshes.remove(mesh)
+
+
+def build_city_tiles(context, tile_size):
+    # generates a tiled city one tile at a time, each tile is generated as a city of its own, moved to its
+    # place in the city and written to its own blend file, so only a single tile is held in memory at once
+    settings = context.scene.city_settings
+    directory = bpy.path.abspath(settings.tile_directory)
+    os.makedirs(directory, exist_ok=True)
+    manifest = tiling.create_manifest(settings.dimension_x, settings.dimension_y, tile_size, settings.seed)
+    roads = np.zeros((settings.dimension_x, settings.dimension_y), dtype=bool)
+    # the city collection only holds the tiles loaded for scanning, it is marked as tiled since cities
+    # split by the memory guard are tiled without the tiled setting
+    city = bpy.data.collections.new(context.scene.city_collection)
+    city["pcdg_tiled"] = True
+    bpy.context.scene.collection.children.link(city)
+    for tile in manifest["tiles"]:
+        with tracing.span("city.tile") as span:
+            size_x, size_y = tile["size"]
+            configure_scenecity_nodes(context, size_x, size_y, tile["seed"])
+            collection = bpy.data.collections.new(tile["name"])
+            collection["pcdg_tile"] = tile["name"]
+            bpy.context.scene.collection.children.link(collection)
+            instance_districts(context, collection, bpy.context.view_layer.layer_collection.children[collection.name],
+                               tile["name"] + "_", tile["seed"])
+            finish_city_objects(context, collection, np.random.default_rng(tile["seed"]))
+            city_grid = bpy.data.node_groups["PCGeneratorCity"].nodes["grid_layout_generator"].get_grid()
+            tile_roads = path_generation.build_road_grid(size_x, size_y, city_grid)
+            tiling.insert_tile_roads(roads, tile, tile_roads)
+            added, removed = tiling.match_tile_borders(roads, tile)
+            match_tile_objects(collection, tile, tile["name"] + "_", added, removed)
+            span.count("border_cells", len(added) + len(removed))
+            if settings.calibrate_estimate:
+                # memory is not recorded for tiles, as memory freed by earlier tiles is reused
+                record_city_build(context, collection, tile["name"] + "_", size_x, size_y, tile_roads, None)
+            offset_x, offset_y = tiling.tile_offset(tile, settings.dimension_x, settings.dimension_y)
+            for obj in collection.all_objects:
+                # children follow their parents
+                if obj.parent is None:
+                    obj.location.x += offset_x
+                    obj.location.y += offset_y
+            tile["objects"] = len(collection.all_objects)
+            span.count("objects", tile["objects"])
+            bpy.data.libraries.write(os.path.join(directory, tile["file"]), {collection}, fake_user=True)
+            remove_collection(collection)
+    manifest["border_mismatches"] = tiling.border_mismatches(roads, manifest)
+    tiling.write_manifest(directory, manifest, roads)
+    print("-- " + str(len(manifest["tiles"])) + " tiles written to " + directory + " --")
+    if manifest["border_mismatches"]:
+        print("-- " + str(manifest["border_mismatches"]) + " road cells on tile borders could not be matched --")
+
+
+def match_tile_objects(collection, tile, prefix, added, removed):
+    # changes the objects of a tile generated around the origin to the road cells matched to its neighbours,
+    # see tiling.match_tile_borders, objects in changed cells are removed and added road cells receive a copy
+    # of a road object of the tile
+    origin_x, origin_y = tile["origin"]
+    size_x, size_y = tile["size"]
+    changed = set(added) | set(removed)
+    for obj in list(collection.all_objects):
+        if obj.parent is not None:
+            continue
+        cell = (origin_x + int(np.floor(obj.location.x + size_x / 2)),
+                origin_y + int(np.floor(obj.location.y + size_y / 2)))
+        if cell in changed:
+            for child in list(obj.children_recursive):
+                bpy.data.objects.remove(child, do_unlink=True)
+            bpy.data.objects.remove(obj, do_unlink=True)
+    roads = collection.children[prefix + "road"]
+    templates = sorted((obj for obj in roads.objects if obj.parent is None), key=lambda obj: obj.name)
+    if not templates:
+        return
+    for x, y in added:
+        road = templates[0].copy()
+        road.location.x = x - origin_x - size_x / 2 + 0.5
+        road.location.y = y - origin_y - size_y / 2 + 0.5
+        roads.objects.link(road)
+
+
+def stream_city_tiles(context, unload=True):
+    # loads the tiles along the scanner path and the tiles around them into the city collection
+    # tiles no longer needed are unloaded unless unload is False, unloading discards all changes made
+    # to the objects of a tile, returns the district collections of all newly loaded tiles
+    settings = context.scene.city_settings
+    directory = bpy.path.abspath(settings.tile_directory)
+    manifest = tiling.load_manifest(directory)
+    path_object = bpy.data.objects[context.scene.scanner_settings.scanner_path]
+    names = tiling.tiles_along_path(path_polyline(path_object), manifest, settings.tile_neighbours)
+    city = bpy.data.collections[context.scene.city_collection]
+    loaded = {tile.get("pcdg_tile"): tile for tile in city.children}
+    if unload:
+        for name, tile in loaded.items():
+            if name not in names:
+                remove_collection(tile)
+    files = {tile["name"]: tile["file"] for tile in manifest["tiles"]}
+    districts = []
+    with tracing.span("city.load_tiles") as span:
+        for name in names:
+            if name in loaded:
+                continue
+            with bpy.data.libraries.load(os.path.join(directory, files[name]), link=False) as (data_from, data_to):
+                data_to.collections = [name]
+            tile = data_to.collections[0]
+            city.children.link(tile)
+            districts.extend(tile.children_recursive)
+        span.count("tiles", len(names))
+    print("-- " + str(len(names)) + " of " + str(len(manifest["tiles"])) + " tiles loaded --")
+    return districts
+
+
+# ------------------------------------- #
+#            City Estimation
+# ------------------------------------- #
+
+# collections of the assets placed by scenecity, see README
+ASSET_COLLECTIONS = ["Buildify Buildings", "SceneCity Buildings", "SceneCity Streets", "Parks"]
+
+
+def asset_statistics():
+    # mean vertices and polygons of the mesh objects in the asset collections
+    meshes = [obj.data for name in ASSET_COLLECTIONS if name in bpy.data.collections
+              for obj in bpy.data.collections[name].all_objects if obj.type == 'MESH']
+    return {
+        "vertices": sum(len(mesh.vertices) for mesh in meshes) / max(len(meshes), 1),
+        "polygons": sum(len(mesh.polygons) for mesh in meshes) / max(len(meshes), 1),
+    }
+
+
+def record_city_build(context, collection, prefix, dimension_x, dimension_y, road_grid, memory):
+    # appends the measured objects, vertices and polygons per district of a generated city (or tile) and
+    # the growth of the process memory since memory was taken to the calibration file
+    settings = context.scene.city_settings
+    record = {
+        "dimension_x": dimension_x,
+        "dimension_y": dimension_y,
+        "block_min": settings.block_min,
+        "block_max": settings.block_max,
+        "districts": settings.districts.replace(" ", "").split(","),
+        "road_cells": sum(cell is not None for column in road_grid for cell in column),
+        "objects": {},
+        "vertices": {},
+        "polygons": {},
+        "memory": None,
+    }
+    for district in collection.children:
+        name = district.name[len(prefix):]
+        meshes = [obj.data for obj in district.all_objects if obj.type == 'MESH']
+        record["objects"][name] = len(district.all_objects)
+        record["vertices"][name] = sum(len(mesh.vertices) for mesh in meshes)
+        record["polygons"][name] = sum(len(mesh.polygons) for mesh in meshes)
+    after = estimation.process_memory()
+    if memory is not None and after is not None and after > memory:
+        record["memory"] = after - memory
+    estimation.append_record(bpy.path.abspath(settings.calibration_file), record)
+
+
+def estimate_city(context):
+    # estimate of the city for the current settings, for tiled cities of the tiles loaded around a path
+    settings = context.scene.city_settings
+    districts = settings.districts.replace(" ", "").split(",")
+    records = estimation.load_records(bpy.path.abspath(settings.calibration_file))
+    rates = estimation.fit_rates(records, districts, asset_statistics())
+    estimate = estimation.estimate_city(
+        settings.dimension_x, settings.dimension_y, settings.block_min, settings.block_max, districts, rates)
+    estimate["peak_memory"] = estimate["memory"]
+    if settings.tiled:
+        window = settings.tile_size * (2 * settings.tile_neighbours + 1)
+        estimate["peak_memory"] = estimation.estimate_city(
+            min(window, settings.dimension_x), min(window, settings.dimension_y),
+            settings.block_min, settings.block_max, districts, rates)["memory"]
+    estimate["builds"] = len(records)
+    estimate["calibrated"] = rates["calibrated"]
+    status = (str(estimate["objects"]) + " objects, " + str(estimate["vertices"]) + " vertices, "
+              + str(estimate["polygons"]) + " polygons, " + str(round(estimate["peak_memory"] / 1024 ** 2)) + " MB")
+    if not records:
+        status += " (not calibrated)"
+    context.window_manager.city_estimate = status
+    print("-- city estimate: " + status + " --")
+    return estimate, rates
+
+
+def check_city_budget(context):
+    # applies the memory guard to the current settings, returns False if the city should not be generated
+    # and the tile size if the city is split into tiles for this build, the settings are left unchanged
+    settings = context.scene.city_settings
+    if settings.estimate_guard == 'OFF':
+        return True, None
+    estimate, rates = estimate_city(context)
+    budget = settings.memory_budget * 1024 ** 2
+    if estimate["peak_memory"] <= budget:
+        return True, None
+    message = ("-- estimated memory of " + str(round(estimate["peak_memory"] / 1024 ** 2))
+               + " MB exceeds the budget of " + str(settings.memory_budget) + " MB --")
+    if settings.estimate_guard == 'WARN':
+        print(message)
+        return True, None
+    if settings.estimate_guard == 'SPLIT':
+        tile_size = estimation.split_tile_size(
+            settings.dimension_x, settings.dimension_y, settings.block_min, settings.block_max,
+            settings.districts.replace(" ", "").split(","), rates, budget, settings.tile_neighbours)
+        if tile_size is not None:
+            tile_size = max(tile_size, 10)
+            print(message)
+            print("-- city is split into tiles of " + str(tile_size) + " cells for this build --")
+            return True, tile_size
+    print(message)
+    print("-- city generation refused --")
+    return False, None
+
+
+def city_tiled(context):
+    # a city is tiled if it was generated with the tiled setting or split by the memory guard
+    city = bpy.data.collections.get(context.scene.city_collection)
+    return context.scene.city_settings.tiled or (city is not None and bool(city.get("pcdg_tiled")))
+
+
+# ------------------------------------- #
+#          Scan Path Generation
+# ------------------------------------- #
+
+
+def generate_placeholder_path(context):
+    # Due to how the vLiDAR scanner is implemented simply unassigning the scanner path
+    # is not supported. To cleanly delete the created scanner path this function
+    # creates a placeholder path, unless one already exists
+    settings = context.scene.scanner_settings
+    try:
+        bpy.data.objects[settings.placeholder_path]
+    except Exception:
+        settings.placeholder_path = ""
+    if not settings.placeholder_path:
+        path_name = "pcdg_placeholder_path"
+        path_data = bpy.data.curves.new(path_name, type='CURVE')
+        path_data.dimensions = '3D'
+        path_spline = path_data.splines.new(type='BEZIER')
+        path_spline.bezier_points[0].handle_left_type = 'VECTOR'
+        path_spline.bezier_points[0].handle_right_type = 'VECTOR'
+        placeholder_path = bpy.data.objects.new(path_name, path_data)
+        context.scene.collection.objects.link(placeholder_path)
+        settings.placeholder_path = path_name
+
+
+def clear_path(context):
+    scanner_path = context.scene.scanner_settings.scanner_path
+    if scanner_path != "":
+        try:
+            # assigns the placeholder path to the laser scanner and removes the old path
+            current_path_object = bpy.data.objects[scanner_path]
+            generate_placeholder_path(context)
+            placeholder_path = context.scene.scanner_settings.placeholder_path
+            placeholder_path_object = bpy.data.objects[placeholder_path]
+            laser_scanners = bpy.context.scene.pointCloudRenderProperties.laser_scanners
+            for scanner in laser_scanners:
+                if scanner.path.path_object and scanner.path.path_object == current_path_object:
+                    scanner.path.path_object = placeholder_path_object
+            bpy.data.objects.remove(current_path_object)
+            context.scene.scanner_settings.scanner_path = ""
+        except Exception:
+            return
+
+
+def generate_curve(context, path, graph):
+    # generates a new bezier curve for the newly generated path through the city
+    context.view_layer.active_layer_collection = context.view_layer.layer_collection
+    bpy.ops.curve.primitive_bezier_curve_add()
+    city_settings = context.scene.city_settings
+    curve = bpy.data.objects["BezierCurve"]
+    curve.name = "scanner_path"
+    bezier_points = curve.data.splines.active.bezier_points
+    if len(path) - 2 > 0:
+        # adds missing points to the curve so they match the number of points the generated path has
+        bezier_points.add(len(path) - 2)
+    offset_x, offset_y = graph[path[0]]["location"]
+    for point, node in zip(bezier_points, path):
+        x, y = graph[node]["location"]
+        x -= offset_x
+        y -= offset_y
+        point.co = Vector((x, y, 0))
+        # left and right handle type is set to 'VECTOR'
+        # handle type is very important for the vLiDAR scanner to work correclty
+        point.handle_right_type = 'VECTOR'
+        point.handle_left_type = 'VECTOR'
+    curve.location.x = float(offset_x) - (city_settings.dimension_x / 2)
+    curve.location.y = float(offset_y) - (city_settings.dimension_y / 2)
+    curve.location.z = 0.1
+    context.scene.scanner_settings.scanner_path = curve.name
+
+
+def assign_path_to_scanner(context, scanner):
+    # assigns newly generated bezier curve to vLiDAR scanner
+    scanner_path = context.scene.scanner_settings.scanner_path
+    new_path_object = bpy.data.objects[scanner_path]
+    if scanner.path.path_object:
+        # if scanner has an assigned path it is saved as the placeholder path
+        context.scene.scanner_settings.placeholder_path = scanner.path.path_object.name
+    else:
+        generate_placeholder_path(context)
+    set_scanner_path(context, scanner, new_path_object)
+
+
+def set_scanner_path(context, scanner, path_object):
+    scanner.path.path_object = path_object
+    # vLiDAR scanner path length is updated and the scan duration is set accordingly
+    bpy.ops.pcscanner.update_path_length()
+    apply_scan_sampling(context, scanner)
+    orient_scanner(scanner, path_object)
+
+
+# vLiDAR scanner properties holding the velocity and the pulse rate (samples per second) of each scanner type
+SCANNER_VELOCITY_PROPERTIES = {
+    "mobile_mapping_scanner": "mobile_mapping_velocity",
+    "artificial_scanner": "artificial_velocity",
+}
+SCANNER_RATE_PROPERTIES = {
+    "mobile_mapping_scanner": "mobile_mapping_frequency",
+    "artificial_scanner": "artificial_frequency",
+}
+
+
+def apply_scan_sampling(context, scanner):
+    # sets scan duration and velocity of the scanner for its path, by default the scanner moves at a velocity
+    # of 0.5, with adaptive sampling the pulse rate and duration are derived from the measured points per pulse
+    settings = context.scene.scanner_settings
+    duration = int(scanner.path.length / sampling.DEFAULT_VELOCITY)
+    velocity = sampling.DEFAULT_VELOCITY
+    if settings.sampling_mode != 'FIXED':
+        if settings.sampling_measured_pulses > 0:
+            points = sampling.target_points(
+                settings.sampling_mode, scanner.path.length, settings.sampling_points, settings.sampling_density)
+            rate, duration, velocity = sampling.scan_timing(
+                scanner.path.length, points, settings.sampling_measured_points / settings.sampling_measured_pulses,
+                scanner_rate_limits(scanner))
+            set_scanner_rate(scanner, rate)
+            print("-- scan duration of " + str(duration) + "s at " + str(int(rate)) + " pulses per second for "
+                  + str(int(points)) + " points --")
+        else:
+            print("-- no scans measured for adaptive sampling yet, using the default velocity --")
+    scanner.scan_duration = duration
+    if scanner.scanner_type in SCANNER_VELOCITY_PROPERTIES:
+        setattr(scanner, SCANNER_VELOCITY_PROPERTIES[scanner.scanner_type], velocity)
+
+
+def scanner_velocity(scanner):
+    if scanner.scanner_type in SCANNER_VELOCITY_PROPERTIES:
+        return getattr(scanner, SCANNER_VELOCITY_PROPERTIES[scanner.scanner_type])
+    return sampling.DEFAULT_VELOCITY
+
+
+def scanner_rate_property(scanner):
+    # name of the pulse rate property of the scanner, None if the scanner has no adjustable rate
+    name = SCANNER_RATE_PROPERTIES.get(scanner.scanner_type)
+    if name is None or name not in scanner.bl_rna.properties:
+        return None
+    return name
+
+
+def scanner_rate(scanner):
+    # pulses per second of the scanner, scanners without an adjustable rate are measured per second
+    name = scanner_rate_property(scanner)
+    return float(getattr(scanner, name)) if name else 1.0
+
+
+def scanner_rate_limits(scanner):
+    name = scanner_rate_property(scanner)
+    if name is None:
+        return 1.0, 1.0
+    rna = scanner.bl_rna.properties[name]
+    return float(rna.hard_min), float(rna.hard_max)
+
+
+def set_scanner_rate(scanner, rate):
+    name = scanner_rate_property(scanner)
+    if name is not None:
+        rna = scanner.bl_rna.properties[name]
+        setattr(scanner, name, int(round(rate)) if rna.type == 'INT' else rate)
+
+
+def expected_scan_points(context, scanner):
+    # points expected from a scan of the scanner along its path, from the points per pulse measured for
+    # adaptive sampling, None if no scans were measured yet
+    settings = context.scene.scanner_settings
+    if settings.sampling_measured_pulses <= 0 or scanner.scan_duration <= 0:
+        return None
+    return (settings.sampling_measured_points / settings.sampling_measured_pulses
+            * scanner_rate(scanner) * scanner.scan_duration)
+
+
+def measure_scan_sampling(context, scanner, file_path):
+    # adds a scan rendered along the whole path to the points per pulse used by adaptive sampling, partial
+    # re-scans and merged scans are never measured as their points do not follow from their own pulses,
+    # neither are scans of the fake scanner
+    settings = context.scene.scanner_settings
+    if settings.sampling_mode == 'FIXED' or scanner.scan_duration <= 0 or context.scene.dataset_settings.fake_scanner:
+        return
+    file_path = bpy.path.abspath(file_path)
+    if not os.path.exists(file_path):
+        return
+    settings.sampling_measured_points, settings.sampling_measured_pulses = sampling.update_rate(
+        settings.sampling_measured_points, settings.sampling_measured_pulses,
+        scan_files.count_scan_points(file_path), scanner_rate(scanner) * scanner.scan_duration)
+
+
+def orient_scanner(scanner, path_object):
+    scanner_object = scanner.camera
+    # for the scans to work correctly the object representing the scanner in the scene has to be rotated correctly
+    # the first two points of the scanner path determine the direction the object has to point
+    # which determines the axis along which the object is then rotated accordingly
+    curve_point_0 = path_object.data.splines.active.bezier_points[0]
+    curve_point_1 = path_object.data.splines.active.bezier_points[1]
+    if curve_point_1.co.x - curve_point_0.co.x != 0:
+        difference = curve_point_1.co.x - curve_point_0.co.x
+        axis = 'Y'
+    elif curve_point_0.co.y - curve_point_1.co.y != 0:
+        difference = curve_point_0.co.y - curve_point_1.co.y
+        axis = 'X'
+    degrees = 75 * (difference / abs(difference))
+    # rotation is achieved using matrix rotation and multiplication provided by Blenders mathutils library
+    # the result is then converted to Euler and assigned to the scanner object as the new Euler rotation
+    scanner_object.rotation_euler = (
+        Euler((0.0, 0.0, 0.0), 'XYZ').to_matrix() @ Matrix.Rotation(radians(degrees), 3, axis)).to_euler()
+
+
+# road graph of the current city with its dimensions, built once per city for all paths through it
+path_graph_cache = {}
+
+
+def build_path_graph(context):
+    city_settings = context.scene.city_settings
+    key = (city_tiled(context), city_settings.tile_directory, city_settings.seed,
+           city_settings.dimension_x, city_settings.dimension_y)
+    if path_graph_cache.get("key") == key:
+        return path_graph_cache["graph"], path_graph_cache["dimension_x"], path_graph_cache["dimension_y"]
+    dimension_x = city_settings.dimension_x
+    dimension_y = city_settings.dimension_y
+    if city_tiled(context):
+        # the road grid of a tiled city is assembled from all tiles, none of which have to be loaded
+        with tracing.span("path.road_grid"):
+            roads = tiling.load_roads(bpy.path.abspath(city_settings.tile_directory))
+            dimension_x, dimension_y = roads.shape
+            road_grid, road_locations = tiling.road_grid(roads)
+    else:
+        city_grid = bpy.data.node_groups["PCGeneratorCity"].nodes["grid_layout_generator"].get_grid()
+        with tracing.span("path.road_grid"):
+            road_grid = path_generation.build_road_grid(dimension_x, dimension_y, city_grid)
+        road_locations = [
+            (obj.matrix_world.translation.x, obj.matrix_world.translation.y)
+            for obj in bpy.data.objects["road"].children]
+    with tracing.span("path.graph") as span:
+        graph = path_generation.build_graph(dimension_x, dimension_y, road_grid, road_locations)
+        span.count("nodes", len(graph))
+    path_graph_cache.update({"key": key, "graph": graph, "dimension_x": dimension_x, "dimension_y": dimension_y})
+    return graph, dimension_x, dimension_y
+
+
+def generate_graph_path(context, graph, dimension_x, dimension_y, path_seed):
+    # path through the road graph with the path settings and the given seed
+    scanner_settings = context.scene.scanner_settings
+    if scanner_settings.path_starts > 1:
+        with tracing.span("path.search_paths") as span:
+            method = (scanner_settings.path_method, scanner_settings.path_multiple_amount,
+                      scanner_settings.path_neighbor_amount)
+            args = (graph, method, path_seed, scanner_settings.path_starts, scanner_settings.path_objective,
+                    path_objective_data(context, dimension_x, dimension_y), scanner_settings.path_processes)
+            if scanner_settings.path_processes:
+                # process pools run in a standalone interpreter, see core/standalone.py
+                path, score = standalone.run("path_generation", "search_paths", *args)
+            else:
+                path, score = path_generation.search_paths(*args)
+            span.count("starts", scanner_settings.path_starts)
+        if path is not None:
+            print("-- selected path with a score of " + str(score) + " --")
+            return path
+        print("-- no path found from the search starts, generating a single path --")
+    with tracing.span("path.generate_paths") as span:
+        paths = path_generation.generate_paths(graph, scanner_settings, path_seed)
+        span.count("paths", len(paths))
+    return path_generation.select_path(paths, scanner_settings.path_selection, path_seed)
+
+
+def build_path(context, stream_tiles=True):
+    # for tiled cities the tiles along the new path are loaded unless stream_tiles is False
+    clear_path(context)
+    scanner_settings = context.scene.scanner_settings
+    graph, dimension_x, dimension_y = build_path_graph(context)
+    if scanner_settings.randomize_path_seed:
+        randomize_path_seed(context)
+    path = generate_graph_path(context, graph, dimension_x, dimension_y, scanner_settings.path_seed)
+    with tracing.span("path.curve") as span:
+        generate_curve(context, path, graph)
+        span.count("points", len(path))
+    selected_scanner = bpy.context.scene.pointCloudRenderProperties.selected_scanner
+    scanner = bpy.context.scene.pointCloudRenderProperties.laser_scanners[selected_scanner]
+    assign_path_to_scanner(context, scanner)
+    if city_tiled(context) and stream_tiles:
+        stream_city_tiles(context)
+
+
+def path_objective_data(context, dimension_x, dimension_y):
+    # locations of all modifiable objects in grid coordinates (cells centered on whole numbers) for the
+    # objects objective, for tiled cities only the objects of loaded tiles are included
+    if context.scene.scanner_settings.path_objective != 'OBJECTS':
+        return None
+    tags = [tag.strip() for tag in context.scene.object_modifier_tags.split(",")]
+    locations = []
+    city = bpy.data.collections.get(context.scene.city_collection)
+    if city is not None:
+        for district in city.children_recursive:
+            for obj in district.objects:
+                if any(tag in obj.name for tag in tags):
+                    translation = obj.matrix_world.translation
+                    locations.append((translation.x + dimension_x / 2 - 0.5, translation.y + dimension_y / 2 - 0.5))
+    return {"locations": np.array(locations).reshape(-1, 2), "range": context.scene.dataset_settings.scanner_range}
+
+
+def preview_path_scan(context):
+    # estimates which objects the scanner would hit along the current scanner path
+    # using the coarse preview scanner instead of rendering a point cloud
+    settings = context.scene.scanner_settings
+    try:
+        path_object = bpy.data.objects[settings.scanner_path]
+        bpy.data.collections[context.scene.city_collection]
+    except Exception:
+        print("Preview requires a generated city and scanner path")
+        return None
+    start = time.time()
+    positions = geometry.sample_polyline(path_polyline(path_object), settings.preview_step)
+    objects, minimums, maximums = visible_city_bounds(context)
+    hits, rays = preview.preview_scan(
+        positions, minimums, maximums, context.scene.dataset_settings.scanner_range, settings.preview_resolution)
+    tags = [tag.strip() for tag in context.scene.object_modifier_tags.split(",")]
+    modifiable = [obj.name for obj in objects if any(tag in obj.name for tag in tags)]
+    selected_scanner = context.scene.pointCloudRenderProperties.selected_scanner
+    expected_points = expected_scan_points(
+        context, context.scene.pointCloudRenderProperties.laser_scanners[selected_scanner])
+    report = preview.preview_report(hits, rays, [obj.name for obj in objects], modifiable, expected_points)
+    print("Preview scan finished in " + str(time.time() - start))
+    if expected_points:
+        print("-- about " + str(int(expected_points)) + " points expected from the measured points per second --")
+    else:
+        print("-- no scans measured yet, objects are reported with the number of rays hitting them --")
+    print("-- " + str(report["visible_objects"]) + " of " + str(len(objects)) + " objects visible --")
+    print("-- " + str(report["visible_modifiable_objects"]) + " of " + str(report["modifiable_objects"])
+          + " modifiable objects visible (" + str(round(report["visible_modifiable_fraction"] * 100, 2)) + "%) --")
+    return report
+
+# ------------------------------------- #
+#             Trajectories
+# ------------------------------------- #
+
+
+def build_trajectories(context, count):
+    # with several paths per scan each scan is also rendered along additional trajectory paths through the same
+    # road graph, this replaces the additional paths, their path seeds are derived from the path seed,
+    # returns the names and path seeds of all trajectories starting with the scanner path
+    clear_trajectories()
+    scanner_settings = context.scene.scanner_settings
+    scanner_path = scanner_settings.scanner_path
+    names = [scanner_path]
+    seeds = [scanner_settings.path_seed]
+    if count < 2:
+        return names, seeds
+    graph, dimension_x, dimension_y = build_path_graph(context)
+    rng = np.random.default_rng([scanner_settings.path_seed, count])
+    for trajectory in range(1, count):
+        seed = random_seed(rng)
+        path = generate_graph_path(context, graph, dimension_x, dimension_y, seed)
+        with tracing.span("path.curve") as span:
+            generate_curve(context, path, graph)
+            span.count("points", len(path))
+        curve = bpy.data.objects[scanner_settings.scanner_path]
+        curve.name = "scanner_path_" + str(trajectory + 1)
+        curve["pcdg_trajectory"] = trajectory
+        names.append(curve.name)
+        seeds.append(seed)
+    scanner_settings.scanner_path = scanner_path
+    return names, seeds
+
+
+def clear_trajectories():
+    for obj in [obj for obj in bpy.data.objects if "pcdg_trajectory" in obj]:
+        curve = obj.data
+        bpy.data.objects.remove(obj)
+        bpy.data.curves.remove(curve)
+
+
+def select_trajectory(context, scanner, name):
+    # makes the trajectory the scanner path and assigns it to the scanner, so culling, partial re-scans
+    # and statistics follow the trajectory while it is scanned, with a single path the scanner keeps its path
+    if context.scene.dataset_settings.trajectories < 2:
+        return
+    context.scene.scanner_settings.scanner_path = name
+    path_object = bpy.data.objects[name]
+    if scanner.path.path_object != path_object:
+        set_scanner_path(context, scanner, path_object)
+
+
+def stream_trajectory_tiles(context, names):
+    # loads the tiles along all trajectories without unloading any, returns the newly loaded districts
+    scanner_settings = context.scene.scanner_settings
+    scanner_path = scanner_settings.scanner_path
+    districts = []
+    for name in names:
+        scanner_settings.scanner_path = name
+        districts.extend(stream_city_tiles(context, unload=False))
+    scanner_settings.scanner_path = scanner_path
+    return districts
+
+
+def trajectory_label(trajectories, trajectory):
+    return " along path " + str(trajectory + 1) + " of " + str(trajectories) if trajectories > 1 else ""
+
+
+def scan_file_path(dataset_settings, scan, trajectory):
+    # <prefix>_scan_<scan>.csv, with several paths per scan <prefix>_scan_<scan>_t<trajectory>.csv
+    file_path = dataset_settings.scans_directory + dataset_settings.scans_prefix + "_scan_" + str(scan).zfill(2)
+    if dataset_settings.trajectories > 1:
+        file_path += "_t" + str(trajectory + 1)
+    return file_path + ".csv"
+
+# ------------------------------------- #
+#       Scan Generation/Automation
+# ------------------------------------- #
+
+
+def apply_rotations(rotations):
+    # object rotation is achieved by making use of matrix rotation and multiplication provided
+    # by Blenders mathutils library, the resulting Euler is then assigned to the object
+    for obj, axis, degrees in rotations:
+        obj.rotation_euler = (obj.rotation_euler.to_matrix() @ Matrix.Rotation(radians(degrees), 3, axis)).to_euler()
+
+
+def transforms_to_deltas(obj):
+    # Transfers object transforms to delta transforms and vice versa
+    # Using blenders built in operators tends to be much slower in comparison
+    translation = obj.location.copy()
+    rotation = obj.rotation_euler.copy()
+    scale = obj.scale.copy()
+    obj.location = obj.delta_location
+    obj.rotation_euler = obj.delta_rotation_euler
+    obj.scale = obj.delta_scale
+    obj.delta_location = translation
+    obj.delta_rotation_euler = rotation
+    obj.delta_scale = scale
+
+
+def reset_transforms(obj):
+    obj.scale[:3] = (1, 1, 1)
+    obj.rotation_euler[:3] = (0, 0, 0)
+    obj.location[:3] = (0, 0, 0)
+
+
+def build_object_collection(context, districts=None):
+    # builds object list of all buildings and props that can receive modifications between scans
+    # modifiable objects have a corresponding tag in their object name
+    # districts defaults to all collections of the city
+    city_collection = context.scene.city_collection
+    objects = []
+    tags = [tag.strip() for tag in context.scene.object_modifier_tags.split(",")]
+    if districts is None:
+        districts = bpy.data.collections[city_collection].children_recursive
+    for district in districts:
+        # props list is generated separately for each district
+        # this is mainly done because sorting multiple shorter lists is faster
+        # than sorting the longer combined list of all districts
+        props = []
+        for obj in district.objects:
+            obj.class_name = "initial"
+            obj.hide_viewport = False
+            if any(tag in obj.name for tag in tags):
+                props.append(obj)
+                transforms_to_deltas(obj)
+        # list of props is sorted by their location in the scene
+        # this is done in order to achieve the same order each time and is required to make scans
+        # of the same city repeatable/deterministic as the order can vary otherwise
+        props.sort(key=lambda obj: (obj.matrix_world.translation.x, obj.matrix_world.translation.y))
+        objects.extend(props)
+    return objects
+
+
+def create_missing_classes(context):
+    # creates vLiDAR classes required for classification of objects
+    required_classes = [klass.strip() for klass in context.scene.object_classes.split(",")]
+    pc_class_names = [klass.name for klass in context.scene.pointCloudRenderProperties.classes]
+    pc_classes = context.scene.pointCloudRenderProperties.classes
+    for klass in required_classes:
+        if klass not in pc_class_names:
+            bpy.ops.pcscanner.add_class()
+            pc_classes[-1].name = klass
+            pc_classes[-1].class_id = len(pc_classes) - 1
+
+
+def run_scans(context):
+    # runs a whole set of scans at once
+    for _ in scan_steps(context, {}):
+        pass
+
+
+def scan_steps(context, progress):
+    # runs a set of scans one step at a time, yielding the name of each finished step, i.e. the setup
+    # and the changes, render and cleanup of each scan, progress is a dict filled with the current scan
+    # and the durations of finished scans, setting progress["cancel"] stops the set once the current
+    # scan is finished, the city is then restored to its state before the set
+    reset_city(context)
+    scan_settings = context.scene.scan_settings
+    dataset_settings = context.scene.dataset_settings
+    city_settings = context.scene.city_settings
+    scanner_settings = context.scene.scanner_settings
+    try:
+        selected_scanner = context.scene.pointCloudRenderProperties.selected_scanner
+        scanner = context.scene.pointCloudRenderProperties.laser_scanners[selected_scanner]
+    except Exception:
+        print("Could not access selected laser scanner")
+        print(Exception)
+        return
+
+    if dataset_settings.trace_enable:
+        tracing.start_trace()
+    pool = None
+    # the pool and the trace are released when the set fails or the steps are closed early
+    try:
+        if dataset_settings.randomize_scan_seed:
+            randomize_generator_seed(context)
+
+        if dataset_settings.generate_city:
+            city_settings.randomize_seed = True if dataset_settings.randomize_city_seed else False
+            scanner_settings.randomize_path_seed = True if dataset_settings.randomize_path_seed else False
+            if not build_city(context):
+                return
+            build_path(context)
+        elif city_tiled(context):
+            stream_city_tiles(context)
+        trajectories = dataset_settings.trajectories
+        trajectory_paths, trajectory_seeds = build_trajectories(context, trajectories)
+        if city_tiled(context) and trajectories > 1:
+            stream_trajectory_tiles(context, trajectory_paths[1:])
+
+        rng = np.random.default_rng(scan_settings.seed)
+        with tracing.span("scan.object_collection") as span:
+            objects = build_object_collection(context)
+            span.count("objects", len(objects))
+        create_missing_classes(context)
+        changes.bound_scan_settings(scan_settings, dataset_settings, objects)
+        # world matrices are only updated on view layer updates
+        context.view_layer.update()
+        selection_index = None
+        if scan_settings.change_selection != 'ALL':
+            # changes are selected along the scanner path, i.e. the first trajectory
+            with tracing.span("scan.selection_index"):
+                selection_index = changes.build_selection_index(
+                    objects, dataset_settings.scanner_range, scan_settings.change_selection)
+                changes.set_selection_path(
+                    selection_index, path_polyline(bpy.data.objects[scanner_settings.scanner_path]))
+        with tracing.span("scan.hidden_object_collection") as span:
+            hidden_objects = changes.build_hidden_object_collection(
+                scan_settings, dataset_settings, objects, rng, selection_index)
+            span.count("objects", len(hidden_objects))
+
+        # partial re-scans require the same path for all scans of the set
+        partial_rescan = dataset_settings.partial_rescan and not dataset_settings.scans_new_path
+        if partial_rescan:
+            with tracing.span("scan.object_bounds"):
+                bounds = {obj.name: object_bounds(obj) for obj in objects + hidden_objects}
+            previous_volumes = []
+        culling_index = None
+        if dataset_settings.cull_out_of_range:
+            with tracing.span("scan.culling_index") as span:
+                culling_index = build_culling_index(context, dataset_settings.scanner_range)
+                span.count("objects", len(culling_index["objects"]))
+
+        if dataset_settings.binary_output:
+            columnar.create_set(binary_set_path(dataset_settings))
+        if dataset_settings.delta_storage:
+            for trajectory in range(trajectories):
+                deltas.create_set(
+                    delta_set_path(dataset_settings, trajectory), dataset_settings.delta_keyframe_interval)
+        pool = post_processing.start_pool(
+            dataset_settings.post_processing_workers, dataset_settings.post_processing_queue)
+        scan_statistics = []
+        class_names = {klass.class_id: klass.name for klass in context.scene.pointCloudRenderProperties.classes}
+        progress.update({"scan": 1, "scans": dataset_settings.scans, "scan_seconds": [], "cancelled": False})
+        yield "setup"
+        scan_start = time.perf_counter()
+        # scans of all trajectories in order of scan and trajectory, with the previous scan of each trajectory
+        scan_file_paths = []
+        scan_path_seeds = []
+        previous_file_paths = []
+        for trajectory, trajectory_path in enumerate(trajectory_paths):
+            select_trajectory(context, scanner, trajectory_path)
+            print("-- starting initial scan" + trajectory_label(trajectories, trajectory) + " --")
+            scanner.file_path = scan_file_path(dataset_settings, 1, trajectory)
+            culled_objects = cull_objects(context, culling_index)
+            render_start = time.perf_counter()
+            with tracing.span("scan.render") as span:
+                render_point_cloud(context, scanner)
+                count_scan_output(span, scanner.file_path)
+            render_seconds = time.perf_counter() - render_start
+            measure_scan_sampling(context, scanner, scanner.file_path)
+            restore_culled_objects(culled_objects)
+            # the catalog takes the points by class of each scan from the statistics
+            if dataset_settings.statistics_enable or dataset_settings.catalog_enable:
+                collect_statistics(pool, scan_statistics, class_names, scanner_settings, scanner.file_path,
+                                   render_seconds, 0, trajectory)
+            if dataset_settings.delta_storage:
+                store_scan_delta(pool, dataset_settings, trajectory, None, scanner.file_path, {})
+            post_process_scan(pool, dataset_settings, scanner.file_path)
+            previous_file_paths.append(scanner.file_path)
+            scan_file_paths.append(scanner.file_path)
+            scan_path_seeds.append(trajectory_seeds[trajectory])
+            if dataset_settings.blocks_enable and dataset_settings.block_processes == 0:
+                extract_scan_blocks(
+                    pool, dataset_settings, scan_settings.seed, len(scan_file_paths) - 1, scanner.file_path)
+            if trajectory < trajectories - 1:
+                yield "render"
+        select_trajectory(context, scanner, trajectory_paths[0])
+        finish_scan_progress(progress, scan_start)
+        yield "render"
+        for scans in range(dataset_settings.scans - 1):
+            if progress.get("cancel"):
+                progress["cancelled"] = True
+                print("-- scans cancelled after scan " + str(scans + 1) + " --")
+                break
+            progress["scan"] = scans + 2
+            scan_start = time.perf_counter()
+            if dataset_settings.scans_new_path:
+                scanner_settings.path_seed = random_seed(rng)
+                # tiles are not unloaded during a set, as their objects may be changed, the objects
+                # of newly loaded tiles can receive changes from now on
+                build_path(context, stream_tiles=False)
+                trajectory_paths, trajectory_seeds = build_trajectories(context, trajectories)
+                if city_tiled(context):
+                    districts = stream_trajectory_tiles(context, trajectory_paths)
+                    tile_objects = build_object_collection(context, districts)
+                    objects.extend(tile_objects)
+                    # objects of the new tiles are added to the indices built at the start of the set
+                    context.view_layer.update()
+                    if selection_index is not None:
+                        for obj in tile_objects:
+                            changes.insert_into_selection_index(selection_index, obj)
+                    if culling_index is not None:
+                        extend_culling_index(culling_index, districts)
+                if selection_index is not None:
+                    path_object = bpy.data.objects[scanner_settings.scanner_path]
+                    changes.set_selection_path(selection_index, path_polyline(path_object))
+            # random access is achieved by shuffling the list and popping the last element(s)
+            changes.prioritize_objects(objects, rng, selection_index)
+
+            removed_objects = []
+            added_objects = []
+            modified_objects = []
+
+            if scan_settings.remove_objects_enable:
+                with tracing.span("scan.remove_objects") as span:
+                    removed_objects = changes.remove_objects(scan_settings, objects, rng)
+                    span.count("objects", len(removed_objects))
+            if scan_settings.scale_enable:
+                with tracing.span("scan.scale_objects") as span:
+                    modified = len(modified_objects)
+                    changes.scale_objects(scan_settings, objects, modified_objects, rng)
+                    span.count("objects", len(modified_objects) - modified)
+            if scan_settings.translation_enable:
+                with tracing.span("scan.translate_objects") as span:
+                    modified = len(modified_objects)
+                    changes.translate_objects(scan_settings, objects, modified_objects, rng)
+                    span.count("objects", len(modified_objects) - modified)
+            if scan_settings.rotation_enable:
+                with tracing.span("scan.rotate_objects") as span:
+                    modified = len(modified_objects)
+                    rotations = changes.rotate_objects(
+                        scan_settings, objects, modified_objects, rng, context.scene.building_modifier_tags)
+                    apply_rotations(rotations)
+                    span.count("objects", len(modified_objects) - modified)
+            if scan_settings.add_objects_enable:
+                with tracing.span("scan.add_objects") as span:
+                    added_objects = changes.add_objects(scan_settings, hidden_objects, rng, selection_index)
+                    span.count("objects", len(added_objects))
+            yield "change"
+
+            # the changes are applied once and scanned along all trajectories
+            context.view_layer.update()
+            if culling_index is not None:
+                update_culling_index(culling_index, removed_objects + modified_objects + added_objects)
+            if selection_index is not None:
+                changes.update_selection_index(selection_index, modified_objects)
+            if partial_rescan:
+                # changed volumes include the objects before and after their changes, as well as all objects
+                # changed for the previous scan since these are hidden or reclassified during cleanup
+                volumes = list(previous_volumes)
+                previous_volumes = []
+                for obj in removed_objects + modified_objects + added_objects:
+                    volumes.append(bounds[obj.name])
+                    bounds[obj.name] = object_bounds(obj)
+                    previous_volumes.append(bounds[obj.name])
+                volumes.extend(previous_volumes)
+            for trajectory, trajectory_path in enumerate(trajectory_paths):
+                select_trajectory(context, scanner, trajectory_path)
+                scanner.file_path = scan_file_path(dataset_settings, scans + 2, trajectory)
+                print("-- starting scan " + str(scans + 2) + trajectory_label(trajectories, trajectory) + " --")
+                culled_objects = cull_objects(context, culling_index)
+                render_start = time.perf_counter()
+                if partial_rescan:
+                    file_path = scanner.file_path
+                    with tracing.span("scan.partial_rescan") as span:
+                        rescan_changed_regions(context, scanner, previous_file_paths[trajectory], file_path, volumes)
+                        count_scan_output(span, file_path)
+                    if dataset_settings.partial_rescan_verify:
+                        with tracing.span("scan.verify_partial_rescan"):
+                            verify_partial_scan(context, scanner, file_path)
+                    scanner.file_path = file_path
+                else:
+                    with tracing.span("scan.render") as span:
+                        render_point_cloud(context, scanner)
+                        count_scan_output(span, scanner.file_path)
+                    measure_scan_sampling(context, scanner, scanner.file_path)
+                render_seconds = time.perf_counter() - render_start
+                restore_culled_objects(culled_objects)
+                if dataset_settings.statistics_enable or dataset_settings.catalog_enable:
+                    collect_statistics(pool, scan_statistics, class_names, scanner_settings, scanner.file_path,
+                                       render_seconds, scans + 1, trajectory)
+                if dataset_settings.change_labels:
+                    label_scan_changes(pool, dataset_settings, class_names, previous_file_paths[trajectory],
+                                       scanner.file_path)
+                if dataset_settings.delta_storage:
+                    changed_objects = {
+                        obj.name: obj.class_name for obj in removed_objects + modified_objects + added_objects}
+                    store_scan_delta(
+                        pool, dataset_settings, trajectory, previous_file_paths[trajectory], scanner.file_path,
+                        changed_objects)
+                post_process_scan(pool, dataset_settings, scanner.file_path)
+                previous_file_paths[trajectory] = scanner.file_path
+                scan_file_paths.append(scanner.file_path)
+                scan_path_seeds.append(trajectory_seeds[trajectory])
+                if dataset_settings.blocks_enable and dataset_settings.block_processes == 0:
+                    extract_scan_blocks(
+                        pool, dataset_settings, scan_settings.seed, len(scan_file_paths) - 1, scanner.file_path)
+                yield "render"
+            select_trajectory(context, scanner, trajectory_paths[0])
+            with tracing.span("scan.cleanup") as span:
+                span.count("objects", len(removed_objects) + len(modified_objects) + len(added_objects))
+                changes.post_scan_cleanup(objects, hidden_objects, removed_objects, modified_objects, added_objects)
+            finish_scan_progress(progress, scan_start)
+            yield "cleanup"
+        # a cancelled set finishes its current scan and restores the city before post-processing
+        if progress.get("cancelled"):
+            restore_city(context)
+
+        with tracing.span("post_processing.flush"):
+            post_processing.finish_pool(pool)
+        if dataset_settings.statistics_enable:
+            write_statistics(dataset_settings, scan_statistics)
+        if dataset_settings.blocks_enable and dataset_settings.block_processes > 0:
+            with tracing.span("post_processing.blocks") as span:
+                # process pools run in a standalone interpreter, see core/standalone.py
+                span.count("blocks", sum(standalone.run(
+                    "blocks", "extract_set_blocks", [bpy.path.abspath(file_path) for file_path in scan_file_paths],
+                    dataset_settings.block_size, dataset_settings.block_points, dataset_settings.block_min_points,
+                    scan_settings.seed, dataset_settings.block_processes)))
+        if dataset_settings.catalog_enable:
+            # registered before csv scans are removed, so their sizes are recorded
+            register_catalog_set(context, scan_statistics, scan_file_paths, scan_path_seeds, progress)
+        post_processed = (dataset_settings.binary_output or dataset_settings.compress_scans
+                          or dataset_settings.octree_index or dataset_settings.downsample
+                          or dataset_settings.delta_storage)
+        if post_processed and not dataset_settings.keep_csv:
+            # csv scans are only removed at the end of the set, since partial re-scans build on the previous scan
+            for file_path in scan_file_paths:
+                os.remove(bpy.path.abspath(file_path))
+        if dataset_settings.trace_enable:
+            write_trace(dataset_settings)
+    finally:
+        if pool is not None:
+            post_processing.close_pool(pool)
+        if dataset_settings.trace_enable:
+            tracing.stop_trace()
+
+
+def finish_scan_progress(progress, scan_start):
+    seconds = time.perf_counter() - scan_start
+    progress["scan_seconds"].append(seconds)
+    print("-- scan " + str(progress["scan"]) + " finished in " + str(round(seconds, 2)) + "s --")
+
+
+def scan_status(progress):
+    # fraction of finished scans and a status line with the estimated remaining time
+    if "scans" not in progress:
+        return 0.0, "Preparing scans"
+    finished = len(progress["scan_seconds"])
+    status = "Scan " + str(min(progress["scan"], progress["scans"])) + " of " + str(progress["scans"])
+    if finished:
+        mean = sum(progress["scan_seconds"]) / finished
+        remaining = int(mean * (progress["scans"] - finished))
+        status += ", " + str(round(mean, 1)) + "s per scan, about " + str(remaining // 60) + "m " \
+            + str(remaining % 60) + "s left"
+    return finished / max(progress["scans"], 1), status
+
+
+def binary_set_path(dataset_settings):
+    return bpy.path.abspath(dataset_settings.scans_directory + dataset_settings.scans_prefix)
+
+
+def delta_set_path(dataset_settings, trajectory):
+    # with several paths per scan each trajectory is stored as deltas of its own
+    if dataset_settings.trajectories > 1:
+        return binary_set_path(dataset_settings) + "_t" + str(trajectory + 1)
+    return binary_set_path(dataset_settings)
+
+
+def collect_statistics(pool, scan_statistics, class_names, scanner_settings, file_path, render_seconds,
+                       timestamp, trajectory):
+    # statistics are computed by the background workers and filled into the entry of the scan
+    file_path = bpy.path.abspath(file_path)
+    path_length = float(np.linalg.norm(np.diff(path_polyline(
+        bpy.data.objects[scanner_settings.scanner_path]), axis=0), axis=1).sum())
+    entry = {
+        "name": os.path.splitext(os.path.basename(file_path))[0],
+        "render_seconds": render_seconds,
+        "path_length": path_length,
+        "timestamp": timestamp,
+        "trajectory": trajectory,
+    }
+    scan_statistics.append(entry)
+    post_processing.submit(pool, None, post_processing.collect_statistics, entry, file_path, class_names)
+
+
+def label_scan_changes(pool, dataset_settings, class_names, previous_file_path, file_path):
+    # writes <scan>_changes.npz and <scan>_changes.json, see core/change_detection.py
+    file_path = bpy.path.abspath(file_path)
+    post_processing.submit(
+        pool, None, post_processing.label_changes, bpy.path.abspath(previous_file_path), file_path,
+        os.path.splitext(file_path)[0] + "_changes", dataset_settings.change_tolerance,
+        dataset_settings.change_search_radius, class_names)
+
+
+def extract_scan_blocks(pool, dataset_settings, seed, scan_index, file_path):
+    # writes <scan>_blocks.npz, blocks of each scan are seeded by the scan seed and the position of the scan
+    file_path = bpy.path.abspath(file_path)
+    post_processing.submit(
+        pool, None, post_processing.extract_blocks, file_path, dataset_settings.block_size,
+        dataset_settings.block_points, dataset_settings.block_min_points, (seed, scan_index))
+
+
+def store_scan_delta(pool, dataset_settings, trajectory, previous_file_path, file_path, changed_objects):
+    # deltas of a set are appended in order by the same worker, see core/deltas.py
+    base_path = delta_set_path(dataset_settings, trajectory)
+    previous_file_path = bpy.path.abspath(previous_file_path) if previous_file_path else None
+    post_processing.submit(
+        pool, base_path + ".deltas", post_processing.store_delta, base_path,
+        bpy.path.abspath(file_path), previous_file_path, changed_objects)
+
+
+def write_statistics(dataset_settings, scan_statistics):
+    thresholds = {
+        "min_points": dataset_settings.statistics_min_points,
+        "min_changed_fraction": dataset_settings.statistics_min_changed_fraction,
+        "min_points_per_meter": dataset_settings.statistics_min_points_per_meter,
+    }
+    file_path = bpy.path.abspath(
+        dataset_settings.scans_directory + dataset_settings.scans_prefix + "_statistics.json")
+    summary = statistics.write_summary(file_path, dataset_settings.scans_prefix, scan_statistics, thresholds)
+    if summary["degenerate"]:
+        print("Degenerate scan set " + dataset_settings.scans_prefix + ":")
+        for name, issues in summary["issues"].items():
+            print("  " + name + ": " + ", ".join(issues))
+
+
+def settings_values(settings):
+    # values of all properties of a settings group, vectors and enum flags as lists
+    values = {}
+    for prop in settings.bl_rna.properties:
+        if prop.identifier in ("rna_type", "name") or prop.type in ('POINTER', 'COLLECTION'):
+            continue
+        value = getattr(settings, prop.identifier)
+        if isinstance(value, set):
+            value = sorted(value)
+        elif getattr(prop, "is_array", False):
+            value = list(value)
+        values[prop.identifier] = value
+    return values
+
+
+def register_catalog_set(context, scan_statistics, scan_file_paths, scan_path_seeds, progress):
+    # adds the finished set to the catalog, with the seeds actually used after randomization
+    dataset_settings = context.scene.dataset_settings
+    city_settings = context.scene.city_settings
+    scanner_settings = context.scene.scanner_settings
+    scans = []
+    for position, file_path in enumerate(scan_file_paths):
+        file_path = bpy.path.abspath(file_path)
+        # scans are in order of scan and trajectory, the scan duration covers all trajectories of the scan
+        timestamp, trajectory = divmod(position, dataset_settings.trajectories)
+        scan = dict(scan_statistics[position]) if position < len(scan_statistics) else {}
+        scan.update({
+            "file_path": file_path,
+            "bytes": os.path.getsize(file_path) if os.path.exists(file_path) else None,
+            "scan_seconds": progress["scan_seconds"][timestamp] if timestamp < len(progress["scan_seconds"]) else None,
+            "path_seed": scan_path_seeds[position],
+            "timestamp": timestamp,
+            "trajectory": trajectory,
+        })
+        scans.append(scan)
+    set_id = catalog.register_set(bpy.path.abspath(dataset_settings.catalog_path), {
+        "prefix": dataset_settings.scans_prefix,
+        "directory": bpy.path.abspath(dataset_settings.scans_directory),
+        "cancelled": int(bool(progress.get("cancelled"))),
+        "trajectories": dataset_settings.trajectories,
+        "city_seed": city_settings.seed,
+        "scan_seed": context.scene.scan_settings.seed,
+        "path_seed": scan_path_seeds[0],
+        "path_method": scanner_settings.path_method,
+        "path_selection": scanner_settings.path_selection,
+        "dimension_x": city_settings.dimension_x,
+        "dimension_y": city_settings.dimension_y,
+        "districts": city_settings.districts,
+        "path_length": scans[0].get("path_length"),
+        "settings": {
+            "dataset_settings": settings_values(dataset_settings),
+            "scan_settings": settings_values(context.scene.scan_settings),
+            "city_settings": settings_values(city_settings),
+            "scanner_settings": settings_values(scanner_settings),
+        },
+        "scans": scans,
+    })
+    print("Registered set " + dataset_settings.scans_prefix + " as " + str(set_id) + " in the catalog")
+
+
+def post_process_scan(pool, dataset_settings, file_path):
+    # hands a finished scan to the background workers, binary conversion of a set always runs on the same worker
+    file_path = bpy.path.abspath(file_path)
+    scan_name = os.path.splitext(os.path.basename(file_path))[0]
+    tasks = []
+    if dataset_settings.downsample:
+        downsampled_path = post_processing.downsampled_path(file_path)
+        tasks.append((None, post_processing.downsample_scan, (
+            file_path, downsampled_path, dataset_settings.downsample_voxel_size,
+            dataset_settings.downsample_mode, dataset_settings.downsample_target_points)))
+        file_path = downsampled_path
+    if dataset_settings.binary_output:
+        base_path = binary_set_path(dataset_settings)
+        tasks.append((base_path, post_processing.convert_scan, (base_path, file_path, scan_name)))
+    if dataset_settings.compress_scans:
+        tasks.append((None, post_processing.compress_scan, (file_path,)))
+    if dataset_settings.octree_index:
+        tasks.append((None, post_processing.index_scan, (file_path, dataset_settings.octree_leaf_size)))
+    if dataset_settings.downsample:
+        # all other tasks work on the downsampled scan, so the tasks of the scan run one after another
+        key = binary_set_path(dataset_settings) if dataset_settings.binary_output else None
+        post_processing.submit(pool, key, post_processing.run_tasks, [task[1:] for task in tasks])
+        return
+    for key, function, args in tasks:
+        post_processing.submit(pool, key, function, *args)
+
+
+def render_point_cloud(context, scanner):
+    # renders a scan along the path of the scanner to its file path, the fake scanner writes the hits of the
+    # preview scanner instead, with the class of the hit object, so sets run without rendering for testing
+    if not context.scene.dataset_settings.fake_scanner:
+        bpy.ops.render.render_point_cloud()
+        return
+    settings = context.scene.scanner_settings
+    positions = geometry.sample_polyline(path_polyline(scanner.path.path_object), settings.preview_step)
+    objects, minimums, maximums = visible_city_bounds(context)
+    points, hits = preview.preview_points(
+        positions, minimums, maximums, context.scene.dataset_settings.scanner_range, settings.preview_resolution)
+    class_ids = {klass.name: klass.class_id for klass in context.scene.pointCloudRenderProperties.classes}
+    object_classes = np.array([class_ids.get(obj.class_name, 0) for obj in objects], dtype=np.int64)
+    scan_files.write_scan(
+        bpy.path.abspath(scanner.file_path), None, np.column_stack((points, object_classes[hits])))
+
+
+def count_scan_output(span, file_path):
+    # counts points and bytes of a finished scan, this reads the entire file and is only done while tracing
+    if not tracing.enabled():
+        return
+    file_path = bpy.path.abspath(file_path)
+    if not os.path.exists(file_path):
+        return
+    span.count("points", scan_files.count_scan_points(file_path))
+    span.count("bytes", os.path.getsize(file_path))
+
+
+def write_trace(dataset_settings):
+    # writes the recorded spans as chrome trace and as summary table next to the scans of the set
+    events = tracing.stop_trace()
+    trace_file_path = bpy.path.abspath(dataset_settings.scans_directory + dataset_settings.scans_prefix + "_trace")
+    tracing.export_chrome_trace(events, trace_file_path + ".json")
+    tracing.write_summary(events, trace_file_path + "_summary.txt")
+    print(tracing.summary_table(events))
+
+# ------------------------------------- #
+#            Partial Re-scan
+# ------------------------------------- #
+
+
+def object_bounds(obj, children=True):
+    # world space axis aligned bounding box of an object and (optionally) all of its children
+    # the bounding box corners are in object space and are transformed using the world matrix
+    corners = [obj.matrix_world @ Vector(corner) for corner in obj.bound_box]
+    if children:
+        for child in obj.children_recursive:
+            corners.extend(child.matrix_world @ Vector(corner) for corner in child.bound_box)
+    corners = np.array(corners)
+    return corners.min(axis=0), corners.max(axis=0)
+
+
+def visible_city_bounds(context):
+    # visible mesh objects of the city with the minimums and maximums of their own bounding boxes,
+    # as cast against by the preview and the fake scanner
+    city = bpy.data.collections[context.scene.city_collection]
+    objects = {obj.name: obj for district in city.children_recursive for obj in district.objects}
+    objects = [obj for obj in objects.values() if obj.type == 'MESH' and not obj.hide_viewport]
+    context.view_layer.update()
+    minimums, maximums = geometry.split_bounds([object_bounds(obj, children=False) for obj in objects])
+    return objects, minimums, maximums
+
+
+def path_polyline(path_object):
+    # scanner paths only use 'VECTOR' handles, i.e. the curve consists of straight
+    # segments between its points and can be treated as a polyline in world space
+    bezier_points = path_object.data.splines.active.bezier_points
+    return np.array([path_object.matrix_world @ point.co for point in bezier_points])
+
+
+def create_segment_curve(context, points):
+    # creates a temporary scanner path following the given world space points
+    path_name = "pcdg_partial_path"
+    path_data = bpy.data.curves.new(path_name, type='CURVE')
+    path_data.dimensions = '3D'
+    path_spline = path_data.splines.new(type='BEZIER')
+    path_spline.bezier_points.add(len(points) - 1)
+    for point, co in zip(path_spline.bezier_points, points):
+        point.co = Vector(co)
+        point.handle_right_type = 'VECTOR'
+        point.handle_left_type = 'VECTOR'
+    segment = bpy.data.objects.new(path_name, path_data)
+    context.scene.collection.objects.link(segment)
+    return segment
+
+
+def scan_path_segment(context, scanner, points, file_path):
+    # renders a scan along part of the scanner path, the scanner settings are restored afterwards
+    path_object = scanner.path.path_object
+    scan_duration = scanner.scan_duration
+    rotation = scanner.camera.rotation_euler.copy()
+    segment = create_segment_curve(context, points)
+    scanner.path.path_object = segment
+    bpy.ops.pcscanner.update_path_length()
+    # the segment is scanned at the velocity of the full path, so both take the same points along the segment
+    scanner.scan_duration = max(int(round(scanner.path.length / scanner_velocity(scanner))), 1)
+    orient_scanner(scanner, segment)
+    scanner.file_path = file_path
+    render_point_cloud(context, scanner)
+    scanner.path.path_object = path_object
+    bpy.ops.pcscanner.update_path_length()
+    scanner.scan_duration = scan_duration
+    scanner.camera.rotation_euler = rotation
+    segment_data = segment.data
+    bpy.data.objects.remove(segment)
+    bpy.data.curves.remove(segment_data)
+
+
+# spacing of the scanner positions along re-scanned segments from which the shadows of changed volumes are cast
+SHADOW_STEP = 0.5
+
+
+def rescan_changed_regions(context, scanner, previous_file_path, file_path, volumes):
+    # re-scans only the segments of the scanner path within range of any changed volume
+    # and merges the results into a copy of the previous scan
+    settings = context.scene.dataset_settings
+    padding = settings.partial_rescan_tolerance
+    minimums, maximums = geometry.split_bounds(volumes)
+    minimums, maximums = minimums - padding, maximums + padding
+    path_object = bpy.data.objects[context.scene.scanner_settings.scanner_path]
+    polyline = path_polyline(path_object)
+    runs = []
+    if len(volumes):
+        runs = geometry.segment_runs(geometry.segments_in_range(polyline, minimums, maximums, settings.scanner_range))
+    partial_file_paths = []
+    for i, (start, end) in enumerate(runs):
+        partial_file_path = file_path[:-len(".csv")] + "_partial_" + str(i) + ".csv"
+        scan_path_segment(context, scanner, polyline[start:end + 1], partial_file_path)
+        partial_file_paths.append(bpy.path.abspath(partial_file_path))
+    # points hidden or uncovered by the changes are replaced as well, i.e. points in the shadows of the changed
+    # volumes as seen from the re-scanned segments
+    positions = np.zeros((0, 3))
+    if runs:
+        positions = np.concatenate([geometry.sample_polyline(polyline[start:end + 1], SHADOW_STEP)
+                                    for start, end in runs])
+    scan_files.merge_partial_scan(
+        bpy.path.abspath(previous_file_path), partial_file_paths, minimums, maximums, bpy.path.abspath(file_path),
+        positions, settings.scanner_range)
+    for partial_file_path in partial_file_paths:
+        os.remove(partial_file_path)
+    print("-- re-scanned " + str(len(runs)) + " path segment(s) for " + str(len(volumes)) + " changed volumes --")
+
+
+def verify_partial_scan(context, scanner, file_path):
+    # renders a full scan next to the merged partial scan and compares both
+    settings = context.scene.dataset_settings
+    reference_file_path = file_path[:-len(".csv")] + "_full.csv"
+    scanner.file_path = reference_file_path
+    render_point_cloud(context, scanner)
+    overlap = scan_files.compare_scans(
+        bpy.path.abspath(file_path), bpy.path.abspath(reference_file_path), settings.partial_rescan_tolerance)
+    print("-- partial re-scan overlaps full scan by " + str(round(overlap * 100, 2)) + "% --")
+    return overlap
+
+# ------------------------------------- #
+#          Range-based Culling
+# ------------------------------------- #
+
+
+def build_culling_index(context, cell_size):
+    # builds a grid index over the bounding boxes of all city objects, see geometry.build_bounds_index
+    city = bpy.data.collections[context.scene.city_collection]
+    objects = list({obj.name: obj for district in city.children_recursive for obj in district.objects}.values())
+    index = geometry.build_bounds_index(
+        *geometry.split_bounds([object_bounds(obj, children=False) for obj in objects]), cell_size)
+    index["objects"] = objects
+    index["positions"] = {obj.name: i for i, obj in enumerate(objects)}
+    return index
+
+
+def extend_culling_index(index, districts):
+    # adds the objects of newly loaded districts to the index
+    objects = [obj for district in districts for obj in district.objects if obj.name not in index["positions"]]
+    objects = list({obj.name: obj for obj in objects}.values())
+    bounds = [object_bounds(obj, children=False) for obj in objects]
+    for obj in objects:
+        index["positions"][obj.name] = len(index["objects"])
+        index["objects"].append(obj)
+    geometry.insert_bounds_index(index, *geometry.split_bounds(bounds))
+
+
+def update_culling_index(index, objects):
+    # moves changed objects, including their children, to the grid cells of their new bounding boxes
+    for obj in objects:
+        for changed in [obj] + list(obj.children_recursive):
+            i = index["positions"].get(changed.name)
+            if i is not None:
+                geometry.update_bounds_index(index, i, *object_bounds(changed, children=False))
+
+
+def cull_objects(context, index):
+    # hides all visible city objects out of scanner range of the current scanner path
+    # only objects hidden by this function are returned, so they can be revealed after the scan
+    # without revealing objects that are hidden for other reasons, e.g. objects not yet added
+    if index is None:
+        return []
+    path_object = bpy.data.objects[context.scene.scanner_settings.scanner_path]
+    in_range = geometry.query_bounds_index(
+        index, path_polyline(path_object), context.scene.dataset_settings.scanner_range)
+    culled_objects = []
+    for i, obj in enumerate(index["objects"]):
+        if i not in in_range and not obj.hide_viewport:
+            obj.hide_viewport = True
+            culled_objects.append(obj)
+    print("-- hid " + str(len(culled_objects)) + " of " + str(len(index["objects"])) + " objects out of range --")
+    return culled_objects
+
+
+def restore_culled_objects(culled_objects):
+    for obj in culled_objects:
+        obj.hide_viewport = False
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# the core modules are imported from the repository root without Blender, as in benchmarks/run.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# synthetic cities and stand-ins of the benchmarks
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
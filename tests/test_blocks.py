@@ -0,0 +1,34 @@
+import numpy as np
+
+from core import blocks, scan_files
+
+
+def test_blocks_are_reproducible_and_independent_of_chunks(tmp_path):
+    rng = np.random.default_rng(0)
+    points = np.column_stack([rng.uniform(0, 20, (3000, 2)), rng.uniform(0, 5, 3000), rng.integers(0, 4, 3000)])
+    # a sparse block below the minimum number of points
+    points = np.concatenate([points, [[-5.0, -5, 0, 0], [-4, -4, 0, 0]]])
+    csv_path = str(tmp_path / "scan.csv")
+    scan_files.write_scan(csv_path, "x,y,z,class", points)
+    assert blocks.blocks_path(csv_path) == str(tmp_path / "scan_blocks.npz")
+    outputs = []
+    for i, chunk_size in enumerate((5000, 700, 5000)):
+        output = str(tmp_path / ("blocks" + str(i) + ".npz"))
+        assert blocks.extract_blocks(csv_path, output, 10.0, 512, 10, (7, 0), chunk_size) == 4
+        outputs.append(np.load(output))
+    for output in outputs[1:]:
+        for name in ("points", "blocks", "counts"):
+            assert np.array_equal(output[name], outputs[0][name])
+    result = outputs[0]
+    assert result["points"].shape == (4, 512, 4)
+    assert sorted(map(tuple, result["blocks"])) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+    for block, block_points, count in zip(result["blocks"], result["points"], result["counts"]):
+        inside = np.all(np.floor(points[:, :2] / 10.0) == block, axis=1)
+        assert count == min(inside.sum(), 512)
+        # the points of a block are points of the scan within the block, the first count of them distinct
+        assert np.all(np.floor(block_points[:, :2] / 10.0) == block)
+        assert len(np.unique(block_points, axis=0)) == count
+    # other seeds sample other points
+    other = str(tmp_path / "other.npz")
+    blocks.extract_blocks(csv_path, other, 10.0, 512, 10, (7, 1))
+    assert not np.array_equal(np.load(other)["points"], result["points"])
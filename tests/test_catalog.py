@@ -0,0 +1,63 @@
+import json
+
+import numpy as np
+import pytest
+
+from core import catalog
+
+
+def record(path_method, dimension, classes):
+    scans = [{"timestamp": i, "points": 100, "bytes": 1000, "render_seconds": 1.0, "classes": scan_classes}
+             for i, scan_classes in enumerate(classes)]
+    return {"prefix": "set", "path_method": path_method, "dimension_x": dimension, "dimension_y": dimension,
+            "settings": {"path_method": path_method}, "scans": scans}
+
+
+@pytest.fixture
+def catalog_path(tmp_path):
+    path = str(tmp_path / "catalog.sqlite")
+    catalog.register_set(path, record('BFS', 50, [{"initial": 100}, {"initial": 90, "new": 10}]))
+    catalog.register_set(path, record('DFS', 50, [{"initial": 100}, {"initial": 98, "new": 2}]))
+    catalog.register_set(path, record('BFS', 100, [{"initial": 100}, {"initial": 70, "moved": 30}]))
+    return path
+
+
+def test_filters(catalog_path):
+    def ids(**filters):
+        return [row["id"] for row in catalog.find_sets(catalog_path, **filters)]
+    assert ids() == [1, 2, 3]
+    assert ids(path_method='BFS') == [1, 3]
+    assert ids(path_method='BFS', dimension_x=50) == [1]
+    assert ids(new_fraction__gt=0.05) == [1]
+    assert ids(changed_fraction__ge=0.1) == [1, 3]
+    assert ids(path_method__ne='BFS') == [2]
+    assert ids(path_method__like='B%') == [1, 3]
+    assert [row["id"] for row in catalog.find_sets(catalog_path, 1, path_method='BFS')] == [1]
+    with pytest.raises(ValueError):
+        ids(settings='{}')
+    with pytest.raises(ValueError):
+        ids(path_method__in='BFS')
+    # fractions only count the scans after the initial scan
+    assert catalog.find_sets(catalog_path, dimension_x=100)[0]["changed_fraction"] == 0.3
+
+
+def test_scans_settings_and_export(catalog_path, tmp_path):
+    assert catalog.set_settings(catalog_path, 2) == {"path_method": 'DFS'}
+    assert catalog.set_settings(catalog_path, 4) is None
+    scans = catalog.set_scans(catalog_path, 1)
+    assert [scan["classes"] for scan in scans] == [{"initial": 100}, {"initial": 90, "new": 10}]
+    output = str(tmp_path / "scans.npz")
+    assert catalog.export_scans(catalog_path, output, path_method='BFS') == 4
+    columns = np.load(output)
+    assert columns["set_id"].tolist() == [1, 1, 3, 3]
+    assert columns["class_new"].tolist() == [0, 10, 0, 0]
+
+
+def test_command_line(catalog_path, capsys):
+    assert catalog.parse_filters(["dimension_x=50", "new_fraction__gt=0.05", "path_method=BFS"]) == \
+        {"dimension_x": 50, "new_fraction__gt": 0.05, "path_method": "BFS"}
+    catalog.main(["query", catalog_path, "dimension_x=50"])
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 3 and lines[0].split("\t") == list(catalog.SET_COLUMNS)
+    catalog.main(["scans", catalog_path, "3"])
+    assert json.loads(capsys.readouterr().out.splitlines()[1])["classes"] == {"initial": 70, "moved": 30}
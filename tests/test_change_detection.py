@@ -0,0 +1,69 @@
+import numpy as np
+
+from core import change_detection, scan_files
+
+
+def write_scans(directory):
+    # a previous scan and a scan with unchanged, moved, new and removed points and a class column
+    rng = np.random.default_rng(3)
+    previous = rng.uniform(0, 20, (2000, 3))
+    points = previous[:1500] + rng.normal(0, 0.002, (1500, 3))
+    points[1000:1200] += (0.3, 0, 0)
+    points = np.concatenate([points, rng.uniform(30, 40, (300, 3))])
+    classes = np.repeat([0, 1, 2], (1000, 200, 600))
+    previous_path = str(directory / "previous.csv")
+    file_path = str(directory / "scan.csv")
+    scan_files.write_scan(previous_path, "x,y,z,class", np.column_stack([previous, np.zeros(len(previous))]))
+    scan_files.write_scan(file_path, "x,y,z,class", np.column_stack([points, classes]))
+    return previous_path, file_path
+
+
+def brute_force_labels(previous, points, tolerance, search_radius):
+    # reference labels from the distances of all pairs of points
+    distances = np.sqrt(((points[:, None] - previous[None]) ** 2).sum(axis=2))
+    nearest = distances.argmin(axis=1)
+    nearest_distances = distances[np.arange(len(points)), nearest]
+    flags = np.where(nearest_distances <= tolerance, change_detection.UNCHANGED,
+                     np.where(nearest_distances <= search_radius, change_detection.MOVED, change_detection.NEW))
+    displacements = np.where((nearest_distances <= search_radius)[:, None], points - previous[nearest], 0)
+    removed = np.flatnonzero(distances.min(axis=0) > tolerance)
+    return flags, displacements, removed
+
+
+def test_streamed_labels_match_brute_force_labels(tmp_path):
+    previous_path, file_path = write_scans(tmp_path)
+    output_path = str(tmp_path / "scan_changes")
+    summary = change_detection.label_scan_changes(previous_path, file_path, output_path, 0.05, 1.0,
+                                                  {0: "initial", 1: "moved", 2: "new"}, chunk_size=333)
+    previous, points = scan_files.read_scan(previous_path)[1][:, :3], scan_files.read_scan(file_path)[1][:, :3]
+    flags, displacements, removed = brute_force_labels(previous, points, 0.05, 1.0)
+    labels = np.load(output_path + ".npz")
+    assert np.array_equal(labels["flags"], flags)
+    assert np.allclose(labels["displacements"], displacements, atol=1e-6)
+    assert np.array_equal(labels["removed"], removed)
+    assert summary["flags"] == {"unchanged": 1300, "moved": 200, "new": 300}
+    assert summary["removed"] == 700
+    assert summary["classes"]["moved"] == {"unchanged": 0, "moved": 200, "new": 0}
+
+
+def test_scan_without_trailing_newline(tmp_path):
+    previous_path, file_path = write_scans(tmp_path)
+    with open(file_path, "rb") as file:
+        data = file.read()
+    with open(file_path, "wb") as file:
+        file.write(data.rstrip(b"\n"))
+    assert scan_files.count_scan_points(file_path) == 1800
+    summary = change_detection.label_scan_changes(previous_path, file_path, str(tmp_path / "scan_changes"),
+                                                  0.05, 1.0, {}, chunk_size=333)
+    assert np.load(str(tmp_path / "scan_changes.npz"))["flags"].shape == (1800,)
+    assert sum(summary["flags"].values()) == 1800
+
+
+def test_empty_scan(tmp_path):
+    previous_path, _ = write_scans(tmp_path)
+    file_path = str(tmp_path / "empty.csv")
+    scan_files.write_scan(file_path, "x,y,z,class", np.zeros((0, 4)))
+    summary = change_detection.label_scan_changes(previous_path, file_path, str(tmp_path / "empty_changes"),
+                                                  0.05, 1.0, {})
+    assert np.load(str(tmp_path / "empty_changes.npz"))["flags"].shape == (0,)
+    assert summary["removed"] == 2000
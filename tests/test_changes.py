@@ -0,0 +1,28 @@
+import numpy as np
+
+from core import changes
+
+
+class Obj:
+    def __init__(self, name):
+        self.name = name
+
+
+def test_weighted_selection_picks_objects_out_of_range():
+    # objects are popped from the end of the list, out of range objects have no distance in the index
+    index = {"mode": 'WEIGHTED', "scan_range": 1.0, "distances": {str(i): 0.0 for i in range(50)}}
+    rng = np.random.default_rng(3)
+    picked = 0
+    for _ in range(200):
+        objects = [Obj(str(i)) for i in range(100)]
+        changes.prioritize_objects(objects, rng, index)
+        picked += sum(int(obj.name) >= 50 for obj in objects[-10:])
+    # out of range objects are picked, but much less often than objects on the path
+    assert 0 < picked < 200 * 10 / 2
+
+
+def test_in_range_selection_picks_objects_in_range_first():
+    index = {"mode": 'IN_RANGE', "scan_range": 1.0, "distances": {str(i): 0.0 for i in range(50)}}
+    objects = [Obj(str(i)) for i in range(100)]
+    changes.prioritize_objects(objects, np.random.default_rng(3), index)
+    assert all(int(obj.name) < 50 for obj in objects[-50:])
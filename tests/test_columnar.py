@@ -0,0 +1,23 @@
+import os
+
+import numpy as np
+import pytest
+
+from core import columnar, scan_files
+
+
+def test_scans_with_other_columns_are_rejected(tmp_path):
+    base_path = str(tmp_path / "set")
+    columnar.create_set(base_path)
+    points = np.column_stack([np.arange(30).reshape(10, 3), np.arange(10) % 3])
+    scan_files.write_scan(str(tmp_path / "scan_0.csv"), "x,y,z,class", points)
+    scan_files.write_scan(str(tmp_path / "scan_1.csv"), "x,y,z,class,intensity",
+                          np.column_stack([points, np.ones(10)]))
+    assert columnar.append_csv_scan(base_path, str(tmp_path / "scan_0.csv"), "scan_0", chunk_size=4) == 10
+    size = os.path.getsize(columnar.field_path(base_path, "xyz"))
+    with pytest.raises(ValueError, match="scan_1"):
+        columnar.append_csv_scan(base_path, str(tmp_path / "scan_1.csv"), "scan_1", chunk_size=4)
+    # nothing of the rejected scan is written
+    assert os.path.getsize(columnar.field_path(base_path, "xyz")) == size
+    assert [scan["name"] for scan in columnar.load_index(base_path)["scans"]] == ["scan_0"]
+    assert np.array_equal(columnar.read_fields(base_path, 0)["class"], points[:, 3])
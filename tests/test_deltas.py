@@ -0,0 +1,31 @@
+import numpy as np
+
+from core import deltas, scan_files
+
+
+def test_scans_are_restored_from_keyframes_and_deltas(tmp_path):
+    rng = np.random.default_rng(0)
+    base_path = str(tmp_path / "set")
+    deltas.create_set(base_path, 3)
+    points = np.column_stack([rng.uniform(0, 10, (300, 3)), np.zeros(300)])
+    scans = []
+    previous_path = None
+    for i in range(5):
+        # some points of objects are removed and points of new objects are added at random positions
+        keep = rng.random(len(points)) > 0.1
+        added = np.column_stack([rng.uniform(0, 10, (20, 3)), np.full(20, i + 1)])
+        points = np.insert(points[keep], rng.integers(0, keep.sum(), 20), added, axis=0) if i else points
+        csv_path = str(tmp_path / ("scan_" + str(i) + ".csv"))
+        scan_files.write_scan(csv_path, "x,y,z,class", points)
+        stored = deltas.append_scan(base_path, csv_path, previous_path, {"object_" + str(i): "new"})
+        scans.append(scan_files.read_scan(csv_path)[1])
+        assert stored == (len(points) if i % 3 == 0 else 20)
+        previous_path = csv_path
+    index = deltas.load_index(base_path)
+    assert [entry["file"].split(".")[1] for entry in index["scans"]] == \
+        ["keyframe", "delta", "delta", "keyframe", "delta"]
+    cache = {}
+    for i, scan in enumerate(scans):
+        assert np.array_equal(deltas.read_scan_at(base_path, i), scan)
+        assert np.array_equal(deltas.read_scan_at(base_path, "scan_" + str(i), index, cache), scan)
+    assert sorted(cache) == list(range(5))
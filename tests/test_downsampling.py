@@ -0,0 +1,58 @@
+import numpy as np
+
+from core import downsampling, scan_files
+
+
+def write_scan(path, points):
+    scan_files.write_scan(str(path), "x,y,z,class", points)
+    return str(path)
+
+
+def test_centroids_and_majority_votes(tmp_path):
+    points = np.array([[0.1, 0.1, 0.1, 1], [0.3, 0.3, 0.3, 1], [0.5, 0.5, 0.5, 2], [1.5, 0.5, 0.5, 3]])
+    output = str(tmp_path / "downsampled.csv")
+    assert downsampling.downsample_scan(write_scan(tmp_path / "scan.csv", points), output, 1.0,
+                                        chunk_size=2) == (4, 2, 1.0)
+    header, result = scan_files.read_scan(output)
+    assert header == "x,y,z,class"
+    result = result[np.argsort(result[:, 0])]
+    assert np.allclose(result, [[0.3, 0.3, 0.3, 1], [1.5, 0.5, 0.5, 3]])
+
+
+def test_columns_without_header(tmp_path):
+    # the fourth column is voted on as class column, the intensity column after it is averaged
+    points = np.array([[0.1, 0.1, 0.1, 1, 10], [0.3, 0.3, 0.3, 1, 20], [0.5, 0.5, 0.5, 2, 60]])
+    scan = str(tmp_path / "scan.csv")
+    scan_files.write_scan(scan, None, points)
+    output = str(tmp_path / "downsampled.csv")
+    downsampling.downsample_scan(scan, output, 1.0)
+    assert np.allclose(scan_files.read_scan(output)[1], [[0.3, 0.3, 0.3, 1, 30]])
+
+
+def test_point_targets(tmp_path):
+    rng = np.random.default_rng(0)
+    points = np.column_stack([rng.uniform(-10, 10, (2000, 3)), rng.integers(0, 4, 2000)])
+    scan = write_scan(tmp_path / "scan.csv", points)
+    points = scan_files.read_scan(scan)[1]
+    for mode in ('CENTROID', 'NEAREST'):
+        results = []
+        for chunk_size in (2000, 300):
+            output = str(tmp_path / (mode + str(chunk_size) + ".csv"))
+            _, count, voxel_size = downsampling.downsample_scan(scan, output, 0.5, mode, 200, chunk_size)
+            # voxels of 4 cover 6 x 6 x 6 voxels of the scan, more than the target
+            assert count <= 200 and voxel_size == 8.0
+            result = scan_files.read_scan(output)[1]
+            assert len(np.unique(np.floor(result[:, :3] / voxel_size), axis=0)) == count
+            results.append(result[np.lexsort(result.T[::-1])])
+        if mode == 'CENTROID':
+            # sums and votes are coarsened exactly, the result does not depend on when the scan is coarsened
+            assert np.allclose(results[0], results[1])
+        else:
+            # nearest keeps points of the scan
+            for result in results:
+                assert (result[:, None, :] == points[None, :, :]).all(axis=2).any(axis=1).all()
+
+
+def test_empty_scan(tmp_path):
+    output = str(tmp_path / "downsampled.csv")
+    assert downsampling.downsample_scan(write_scan(tmp_path / "scan.csv", np.zeros((0, 4))), output, 1.0)[:2] == (0, 0)
@@ -0,0 +1,16 @@
+import numpy as np
+
+from core import instancing
+
+
+def test_signatures_include_layers():
+    quad = (np.array([0, 0, 0, 1, 0, 0, 1, 1, 0, 0, 1, 0], dtype=np.float32), np.arange(4), [4], [0], ["brick"])
+    uvs = ("uv:UVMap", np.array([0, 0, 1, 0, 1, 1, 0, 1], dtype=np.float32))
+    weights = ("POINT:FLOAT:weight", np.ones(4, dtype=np.float32))
+    signature = instancing.mesh_signature(*quad, [uvs, weights])
+    assert instancing.mesh_signature(*quad, [weights, uvs]) == signature
+    assert instancing.mesh_signature(*quad, [uvs]) != signature
+    assert instancing.mesh_signature(*quad, [(uvs[0], uvs[1][::-1].copy()), weights]) != signature
+    assert instancing.mesh_signature(*quad[:4], ["brick", "glass"], [uvs, weights]) != signature
+    assert instancing.group_duplicates({"a": signature, "b": signature, "c": instancing.mesh_signature(*quad)}) == \
+        {"a": "a", "b": "a", "c": "c"}
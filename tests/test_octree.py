@@ -0,0 +1,44 @@
+import numpy as np
+
+from core import octree
+
+
+def uneven_points():
+    # a dense cluster and a few sparse points, so only some nodes are split below the root
+    rng = np.random.default_rng(1)
+    cluster = rng.normal(0.0, 0.05, (5000, 3))
+    sparse = rng.uniform(-10.0, 10.0, (50, 3))
+    return np.concatenate([cluster, sparse])
+
+
+def build(points, leaf_size=100):
+    meta, nodes, order = octree.build_octree(points, leaf_size)
+    return dict(meta, origin=np.array(meta["origin"]), nodes=nodes, points=points[order])
+
+
+def sorted_rows(points):
+    return points[np.lexsort(points.T[::-1])]
+
+
+def test_representatives_lie_in_their_nodes():
+    index = build(uneven_points())
+    nodes = index["nodes"]
+    assert (nodes["representative"] >= nodes["start"]).all()
+    assert (nodes["representative"] < nodes["start"] + nodes["count"]).all()
+
+
+def test_query_box_matches_brute_force():
+    points = uneven_points()
+    index = build(points)
+    for minimum, maximum in [((-0.05, -0.05, -0.05), (0.1, 0.05, 0.2)), ((-10, -10, -10), (0, 10, 10)),
+                             ((2, 2, 2), (9, 9, 9))]:
+        expected = points[np.all((points >= minimum) & (points <= maximum), axis=1)]
+        assert np.array_equal(sorted_rows(octree.query_box(index, minimum, maximum)), sorted_rows(expected))
+
+
+def test_query_radius_matches_brute_force():
+    points = uneven_points()
+    index = build(points)
+    for center, radius in [((0, 0, 0), 0.05), ((0.1, 0, 0), 0.2), ((5, 5, 5), 6.0)]:
+        expected = points[np.sum((points - center) ** 2, axis=1) <= radius ** 2]
+        assert np.array_equal(sorted_rows(octree.query_radius(index, center, radius)), sorted_rows(expected))
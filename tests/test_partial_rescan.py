@@ -0,0 +1,83 @@
+import numpy as np
+
+from core import geometry, preview, scan_files
+
+
+def write(path, points, header="x,y,z,class"):
+    scan_files.write_scan(str(path), header, np.asarray(points, dtype=float).reshape(-1, 4))
+    return str(path)
+
+
+def test_segments_in_range_of_changed_volumes():
+    polyline = np.array([[0.0, 0, 0], [10, 0, 0], [20, 0, 0], [30, 0, 0], [40, 0, 0]])
+    minimums = np.array([[14.0, 3, 0], [38, -1, 0]])
+    maximums = np.array([[16.0, 4, 2], [39, 1, 2]])
+    in_range = geometry.segments_in_range(polyline, minimums, maximums, 3.5)
+    assert in_range.tolist() == [False, True, False, True]
+    assert geometry.segment_runs(in_range) == [(1, 2), (3, 4)]
+    assert geometry.segment_runs(np.array([True, True, False])) == [(0, 2)]
+
+
+def test_merge_replaces_points_inside_changed_volumes(tmp_path):
+    rng = np.random.default_rng(0)
+    previous = np.column_stack([rng.uniform(0, 10, (500, 3)), np.zeros(500)])
+    minimums, maximums = np.array([[2.0, 2, 2]]), np.array([[4.0, 4, 4]])
+    # the full re-scan of the changed city, the partial scan covers the changed volume and beyond
+    full = previous[~geometry.points_in_volumes(previous[:, :3], minimums, maximums)]
+    changed = np.column_stack([rng.uniform(2, 4, (40, 3)), np.ones(40)])
+    full = np.concatenate([full, changed])
+    partial = np.concatenate([changed, np.column_stack([rng.uniform(5, 6, (30, 3)), np.ones(30)])])
+    output = tmp_path / "merged.csv"
+    scan_files.merge_partial_scan(
+        write(tmp_path / "previous.csv", previous), [write(tmp_path / "partial.csv", partial)],
+        minimums, maximums, str(output))
+    header, merged = scan_files.read_scan(str(output))
+    assert header == "x,y,z,class"
+    assert np.allclose(np.sort(merged, axis=0), np.sort(full, axis=0))
+    assert scan_files.compare_scans(str(output), write(tmp_path / "full.csv", full), 0.05) == 1.0
+
+
+def test_empty_scans(tmp_path):
+    empty = write(tmp_path / "empty.csv", [])
+    points = write(tmp_path / "points.csv", [[1.0, 1, 1, 0], [5, 5, 5, 0]])
+    assert scan_files.read_scan(empty)[1].shape == (0, 4)
+    assert scan_files.compare_scans(empty, empty, 0.05) == 1.0
+    assert scan_files.compare_scans(empty, points, 0.05) == 0.0
+    output = str(tmp_path / "merged.csv")
+    scan_files.merge_partial_scan(points, [empty], np.array([[0.0, 0, 0]]), np.array([[2.0, 2, 2]]), output)
+    assert np.allclose(scan_files.read_scan(output)[1], [[5, 5, 5, 0]])
+    scan_files.merge_partial_scan(empty, [points], np.array([[0.0, 0, 0]]), np.array([[2.0, 2, 2]]), output)
+    assert np.allclose(scan_files.read_scan(output)[1], [[1, 1, 1, 0]])
+
+
+def visible_points(points, positions, minimums, maximums):
+    # points seen from any of the positions without a box in between, as the scanner would return them
+    visible = np.zeros(len(points), dtype=bool)
+    for position in positions:
+        directions = points - position
+        distances = np.linalg.norm(directions, axis=1)
+        _, hits = preview.ray_hits(position, directions / distances[:, None], minimums, maximums, 100.0)
+        visible |= hits >= distances
+    return points[visible]
+
+
+def test_removed_box_uncovers_wall(tmp_path):
+    # a wall behind a box, the box is removed for the next scan
+    positions = np.column_stack([np.zeros(5), np.linspace(-1, 1, 5), np.ones(5)])
+    y, z = np.meshgrid(np.linspace(-6, 6, 49), np.linspace(0, 4, 17))
+    wall = np.column_stack([np.full(y.size, 10.0), y.ravel(), z.ravel()])
+    minimums, maximums = np.array([[4.0, -1.5, 0]]), np.array([[5.0, 1.5, 2.5]])
+    box = np.column_stack(
+        [np.full(16, 4.0), np.repeat(np.linspace(-1.5, 1.5, 4), 4), np.tile(np.linspace(0, 2.5, 4), 4)])
+    previous = np.concatenate([visible_points(wall, positions, minimums, maximums), box])
+    full = wall
+    assert len(previous) - len(box) < len(wall)
+    paths = [write(tmp_path / name, np.column_stack([points, np.zeros(len(points))]))
+             for name, points in (("previous.csv", previous), ("partial.csv", full), ("full.csv", full))]
+    # only the box itself is replaced without shadows, the wall behind it stays uncovered
+    scan_files.merge_partial_scan(paths[0], [paths[1]], minimums, maximums, str(tmp_path / "boxes.csv"))
+    assert scan_files.compare_scans(str(tmp_path / "boxes.csv"), paths[2], 0.05) < 1.0
+    scan_files.merge_partial_scan(paths[0], [paths[1]], minimums, maximums, str(tmp_path / "merged.csv"),
+                                  positions, 20.0)
+    merged = scan_files.read_scan(str(tmp_path / "merged.csv"))[1]
+    assert np.allclose(np.sort(merged, axis=0), np.sort(np.column_stack([full, np.zeros(len(full))]), axis=0))
@@ -0,0 +1,34 @@
+import numpy as np
+import synthetic
+
+from core import path_generation
+
+
+def test_search_is_independent_of_the_number_of_processes():
+    size = 30
+    grid, road_locations = synthetic.city_grid(size, size)
+    graph = path_generation.build_graph(
+        size, size, path_generation.build_road_grid(size, size, grid), road_locations)
+    data = {"locations": np.random.default_rng(12345).uniform(0, size, (size * size // 10, 2)), "range": 5.0}
+    for objective in ('LENGTH', 'OBJECTS'):
+        path, score = path_generation.search_paths(graph, ('BFS', 10, 2), 12345, 8, objective, data)
+        assert path
+        for processes in (1, 2):
+            assert path_generation.search_paths(
+                graph, ('BFS', 10, 2), 12345, 8, objective, data, processes) == (path, score)
+
+
+def test_starts_without_paths_are_skipped(monkeypatch):
+    size = 30
+    grid, road_locations = synthetic.city_grid(size, size)
+    graph = path_generation.build_graph(
+        size, size, path_generation.build_road_grid(size, size, grid), road_locations)
+    paths_from_node = path_generation.paths_from_node
+    leaves = sorted((node for node, data in graph.items() if data["type"] != "node"), key=int)
+    kept = set(leaves[::2])
+    monkeypatch.setattr(path_generation, "paths_from_node", lambda graph, node, *args: (
+        paths_from_node(graph, node, *args) if node in kept else []))
+    path, score = path_generation.search_paths(graph, ('BFS', 10, 2), 12345, 8, 'LENGTH')
+    assert path and path[0] in kept
+    monkeypatch.setattr(path_generation, "paths_from_node", lambda *args: [])
+    assert path_generation.search_paths(graph, ('BFS', 10, 2), 12345, 8, 'LENGTH') == (None, -np.inf)
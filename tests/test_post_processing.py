@@ -0,0 +1,31 @@
+import threading
+
+from core import post_processing
+
+
+def test_closed_pool_drops_queued_tasks():
+    pool = post_processing.start_pool(1, 4)
+    started = threading.Event()
+    release = threading.Event()
+    done = []
+
+    def block():
+        started.set()
+        release.wait()
+
+    post_processing.submit(pool, None, block)
+    for i in range(3):
+        post_processing.submit(pool, None, done.append, i)
+    started.wait()
+    threading.Timer(0.1, release.set).start()
+    post_processing.close_pool(pool)
+    assert done == [] and not pool["threads"]
+
+
+def test_finished_pool_runs_all_tasks():
+    pool = post_processing.start_pool(2, 2)
+    done = []
+    for i in range(10):
+        post_processing.submit(pool, "key", done.append, i)
+    post_processing.finish_pool(pool)
+    assert done == list(range(10))
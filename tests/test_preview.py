@@ -0,0 +1,53 @@
+import numpy as np
+
+from core import geometry, preview
+
+
+def test_rays_hit_the_closest_box():
+    # a box in front of a larger box along +x, both hit only by rays towards +x
+    minimums = np.array([[5.0, -1, -1], [10, -5, -5]])
+    maximums = np.array([[6.0, 1, 1], [11, 5, 5]])
+    directions = np.array([[1.0, 0, 0], [-1, 0, 0], [0, 0, 1]])
+    closest, distances = preview.ray_hits(np.zeros(3), directions, minimums, maximums, 20.0)
+    assert closest.tolist() == [0, -1, -1]
+    assert np.isclose(distances[0], 5.0)
+    # out of range and blocked by the ground plane
+    assert preview.cast_rays(np.zeros(3), directions, minimums, maximums, 4.0).tolist() == [-1, -1, -1]
+    assert preview.cast_rays(np.array([0.0, 0, 1]), np.array([[0.6, 0, -0.8]]), minimums, maximums, 20.0,
+                             ground_height=0.0).tolist() == [-1]
+
+
+def test_ray_directions_are_unit_vectors():
+    directions = preview.ray_directions(10.0)
+    assert directions.shape == (36 * 18, 3)
+    assert np.allclose(np.linalg.norm(directions, axis=1), 1.0)
+
+
+def test_preview_points_lie_on_their_boxes():
+    rng = np.random.default_rng(0)
+    minimums = rng.uniform(-20, 20, (30, 3))
+    maximums = minimums + rng.uniform(0.5, 3, (30, 3))
+    positions = rng.uniform(-20, 20, (4, 3))
+    points, boxes = preview.preview_points(positions, minimums, maximums, 15.0, angular_resolution=5.0,
+                                           ground_height=-30.0)
+    assert len(points) == len(boxes) > 0
+    assert np.all(points >= minimums[boxes] - 1e-9) and np.all(points <= maximums[boxes] + 1e-9)
+    # every point is counted as hit of its box
+    hits, rays = preview.preview_scan(positions, minimums, maximums, 15.0, angular_resolution=5.0,
+                                      ground_height=-30.0)
+    assert rays == 4 * 72 * 36
+    assert np.array_equal(hits, np.bincount(boxes, minlength=len(minimums)))
+    report = preview.preview_report(hits, rays, [str(i) for i in range(30)], modifiable=["0", "1"])
+    assert report["hit_rays"] == len(points)
+    assert report["modifiable_objects"] == 2
+    assert report["points"] is None and sum(report["object_rays"].values()) == len(points)
+    # points are estimated from the share of all rays of each object
+    report = preview.preview_report(hits, rays, [str(i) for i in range(30)], expected_points=rays * 10)
+    assert np.isclose(sum(report["points"].values()), len(points) * 10)
+
+
+def test_split_bounds():
+    minimums, maximums = geometry.split_bounds([((0, 0, 0), (1, 2, 3)), (np.array([4, 5, 6]), np.array([7, 8, 9]))])
+    assert np.array_equal(minimums, [[0, 0, 0], [4, 5, 6]]) and np.array_equal(maximums, [[1, 2, 3], [7, 8, 9]])
+    minimums, maximums = geometry.split_bounds([])
+    assert minimums.shape == maximums.shape == (0, 3)
@@ -0,0 +1,29 @@
+import pytest
+
+from core import sampling
+
+
+def test_rate_takes_target_points_at_default_velocity():
+    rate, duration, velocity = sampling.scan_timing(100.0, 1000000, 0.5, (1000, 100000))
+    assert duration == 200 and velocity == sampling.DEFAULT_VELOCITY
+    assert rate * duration * 0.5 == pytest.approx(1000000)
+
+
+def test_duration_follows_clamped_rates():
+    # the target can not be reached at the default velocity with the highest rate, the scanner slows down
+    rate, duration, velocity = sampling.scan_timing(10.0, 1000000, 0.5, (1000, 20000))
+    assert rate == 20000 and duration == 100 and velocity == pytest.approx(0.1)
+    # a lower target than the lowest rate allows at the default velocity speeds the scanner up
+    rate, duration, velocity = sampling.scan_timing(100.0, 10000, 0.5, (1000, 20000))
+    assert rate == 1000 and duration == 20 and velocity == pytest.approx(5.0)
+    # scanners with a fixed rate only change duration and velocity
+    rate, duration, velocity = sampling.scan_timing(100.0, 10000, 100.0, (1.0, 1.0))
+    assert rate == 1.0 and duration == 100 and velocity == pytest.approx(1.0)
+
+
+def test_target_points_and_measurements():
+    assert sampling.target_points('DENSITY', 20.0, 0, 100.0) == 2000.0
+    assert sampling.target_points('POINTS', 20.0, 500, 100.0) == 500
+    points, pulses = sampling.update_rate(0.0, 0.0, 100, 200)
+    points, pulses = sampling.update_rate(points, pulses, 300, 400)
+    assert (points, pulses) == (380.0, 560.0)
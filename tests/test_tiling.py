@@ -0,0 +1,47 @@
+import numpy as np
+import synthetic
+
+from core import path_generation, tiling
+
+
+def build_roads(manifest, match):
+    roads = np.zeros((manifest["dimension_x"], manifest["dimension_y"]), dtype=bool)
+    for tile in manifest["tiles"]:
+        size_x, size_y = tile["size"]
+        grid, _ = synthetic.city_grid(size_x, size_y, seed=tile["seed"])
+        tiling.insert_tile_roads(roads, tile, path_generation.build_road_grid(size_x, size_y, grid))
+        generated = roads.copy()
+        if match:
+            added, removed = tiling.match_tile_borders(roads, tile)
+            # only cells of the tile are changed
+            assert all(not generated[cell] and roads[cell] for cell in added)
+            assert all(generated[cell] and not roads[cell] for cell in removed)
+            assert np.array_equal(roads[:tile["origin"][0]], generated[:tile["origin"][0]])
+    return roads
+
+
+def test_adjacent_tiles_are_matched():
+    manifest = tiling.create_manifest(30, 15, 15, 7)
+    assert len(manifest["tiles"]) == 2
+    assert tiling.border_mismatches(build_roads(manifest, False), manifest) > 0
+    assert tiling.border_mismatches(build_roads(manifest, True), manifest) == 0
+
+
+def test_tile_grids_are_matched():
+    for seed in range(20):
+        manifest = tiling.create_manifest(45, 40, 15, seed)
+        assert tiling.border_mismatches(build_roads(manifest, True), manifest) == 0
+
+
+def test_border_mismatches():
+    # a single border between the cells 2 and 3 on x
+    manifest = {"tile_size": 3}
+    roads = np.zeros((6, 3), dtype=bool)
+    # a road crossing the border is matched, a road ending at it is not
+    roads[:, 0] = True
+    roads[:3, 2] = True
+    assert tiling.border_mismatches(roads, manifest) == 1
+    # parallel roads on both sides of the border
+    roads[:] = False
+    roads[2:4, :] = True
+    assert tiling.border_mismatches(roads, manifest) == 2
@@ -0,0 +1,23 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from core import variants
+
+
+def test_props_do_not_depend_on_floors():
+    buildings = ["building.%03d" % i for i in range(20)]
+    props = ["prop.%03d" % i for i in range(50)]
+    prop_meshes = {name: "bench" if i % 2 else "lamp" for i, name in enumerate(props)}
+    compatible = variants.compatible_meshes(
+        {"bench": ("bench", (2, 1, 1)), "bench.001": ("bench", (2, 1, 1.05)), "lamp": ("lamp", (1, 1, 4))}, 0.1)
+    plans = []
+    for floors in (True, False):
+        settings = SimpleNamespace(variant_floors=floors, variant_removal=0.2, variant_swap=0.5,
+                                   variant_jitter=0.3, variant_rotation=0.1)
+        plans.append(variants.plan_variant(np.random.default_rng(7), buildings, props, prop_meshes, compatible,
+                                           settings))
+    assert len(plans[0]["floors"]) == 20 and not plans[1]["floors"]
+    for key in ("removed", "meshes", "jitter"):
+        assert plans[0][key] == plans[1][key]
+    assert plans[0]["meshes"]